@@ -1,7 +1,12 @@
 from __future__ import absolute_import, division, unicode_literals
 
+import copy
+import hashlib
+import json
+import logging
 import os
 import re
+import threading
 import urlparse
 from collections import defaultdict
 from datetime import datetime
@@ -11,9 +16,13 @@ from jsonschema.compat import str_types
 
 from flexget.event import fire_event
 from flexget.utils import qualities, template
-from flexget.utils.tools import parse_timedelta
+from flexget.utils.tools import LRUCache, parse_timedelta
+
+log = logging.getLogger('config_schema')
 
 schema_paths = {}
+# Changed whenever a registered schema changes, compiled validators of older generations are not used
+_schema_generation = 0
 
 
 # TODO: Rethink how config key and schema registration work
@@ -24,6 +33,9 @@ def register_schema(path, schema):
     :param path: Path to make schema available
     :param schema: The schema, or function which returns the schema
     """
+    global _schema_generation
+    if schema_paths.get(path) != schema:
+        _schema_generation += 1
     schema_paths[path] = schema
 
 
@@ -96,14 +108,9 @@ def process_config(config, schema=None, set_defaults=True):
     """
     if schema is None:
         schema = get_schema()
-    resolver = RefResolver.from_schema(schema)
-    validator = SchemaValidator(schema, resolver=resolver, format_checker=format_checker)
-    if set_defaults:
-        validator.VALIDATORS['properties'] = validate_properties_w_defaults
-    try:
-        errors = list(validator.iter_errors(config))
-    finally:
-        validator.VALIDATORS['properties'] = jsonschema.Draft4Validator.VALIDATORS['properties']
+    with _validator_lock:
+        # Validators keep state while validating, and resolved refs are cached in them
+        errors = list(get_validator(schema, set_defaults).iter_errors(config))
     # Customize the error messages
     for e in errors:
         set_error_message(e)
@@ -111,6 +118,97 @@ def process_config(config, schema=None, set_defaults=True):
     return errors
 
 
+def get_validator(schema, set_defaults=False):
+    """
+    Returns a validator for `schema`. Validators are cached, so $refs are only resolved once as long as the
+    registered schemas do not change.
+    """
+    key = (id(schema), set_defaults)
+    with _validator_lock:
+        cached = _validator_cache.get(key)
+        # Cache holds a reference to the schema, so its id can not be reused while cached
+        if cached and cached[0] is schema and cached[1] == _schema_generation:
+            return cached[2]
+        validator_class = DefaultsValidator if set_defaults else SchemaValidator
+        validator = validator_class(schema, resolver=RefResolver.from_schema(schema), format_checker=format_checker)
+        _validator_cache[key] = (schema, _schema_generation, validator)
+        return validator
+
+
+class IncrementalValidator(object):
+    """
+    Validates the root config like :func:`process_config`, but only validates the root sections, and items of
+    sections which are dicts of similar items (eg. tasks and templates), that have changed since they were last
+    validated successfully. Defaults set by the earlier validation are restored to unchanged items.
+    """
+
+    def __init__(self):
+        self.generation = None
+        # (pre validation hash, post validation hash, validated config) by config path
+        self.valid = {}
+        # Schemas used to validate structure of the root and item sections, without validating their contents
+        self.structure_schemas = {}
+        self.lock = threading.RLock()
+
+    def structure_schema(self, path, schema):
+        if path not in self.structure_schemas:
+            structure = dict(schema)
+            if path:
+                structure['additionalProperties'] = {}
+            else:
+                structure['properties'] = dict((key, {'default': s['default']} if 'default' in s else {})
+                                               for key, s in schema.get('properties', {}).iteritems())
+            self.structure_schemas[path] = structure
+        return self.structure_schemas[path]
+
+    def validate(self, config):
+        """:returns: A list with :class:`jsonschema.ValidationError`s if any"""
+        with self.lock:
+            schema = get_schema()
+            if self.generation != _schema_generation:
+                self.generation = _schema_generation
+                self.valid = {}
+                self.structure_schemas = {}
+            errors = process_config(config, self.structure_schema((), schema))
+            if not isinstance(config, dict):
+                return errors
+            # Find the parts of config which can be validated separately
+            parts = []
+            for key, value in config.iteritems():
+                key_schema = schema['properties'].get(key)
+                if key_schema is None:
+                    continue
+                if _is_item_section(key_schema) and isinstance(value, dict):
+                    errors.extend(_prefix_errors(process_config(value, self.structure_schema((key,), key_schema)),
+                                                 [key]))
+                    parts.extend(((key, name), value, name, key_schema['additionalProperties']) for name in value)
+                else:
+                    parts.append(((key,), config, key, key_schema))
+            checked = 0
+            for path, parent, name, part_schema in parts:
+                digest = _config_hash(parent[name])
+                valid = digest is not None and self.valid.get(path)
+                if valid and digest == valid[1]:
+                    continue
+                if valid and digest == valid[0]:
+                    parent[name] = copy.deepcopy(valid[2])
+                    continue
+                checked += 1
+                part_errors = process_config(parent[name], part_schema)
+                if part_errors:
+                    errors.extend(_prefix_errors(part_errors, path))
+                    self.valid.pop(path, None)
+                elif digest is not None:
+                    self.valid[path] = (digest, _config_hash(parent[name]), copy.deepcopy(parent[name]))
+            log.debug('validated %s of %s config sections' % (checked, len(parts)))
+            if not errors:
+                # Forget about parts which have been removed from the config
+                current = set(part[0] for part in parts)
+                for path in set(self.valid) - current:
+                    del self.valid[path]
+            return errors
+
+
 def parse_time(time_string):
     """Parse a time string from the config into a :class:`datetime.time` object."""
     formats = ['%I:%M %p', '%H:%M', '%H:%M:%S']
@@ -133,6 +231,29 @@ def parse_interval(interval_string):
 ## Public API end here, the rest should not be used outside this module
 
 
+def _is_item_section(schema):
+    """Tells whether items in config section with `schema` can be validated separately."""
+    return (isinstance(schema, dict) and isinstance(schema.get('additionalProperties'), dict) and
+            not any(key in schema for key in ('properties', 'patternProperties', '$ref', 'allOf', 'anyOf', 'oneOf',
+                                              'not', 'dependencies', 'minProperties', 'maxProperties')))
+
+
+def _config_hash(config):
+    """:returns: Hash of `config`, or None if it could not be calculated"""
+    try:
+        return hashlib.md5(json.dumps(config, sort_keys=True, default=unicode).encode('utf-8')).digest()
+    except (TypeError, ValueError):
+        return None
+
+
+def _prefix_errors(errors, path):
+    """Makes paths of `errors` relative to the config root, instead of the validated part at `path`."""
+    for e in errors:
+        e.path.extendleft(reversed(path))
+        e.json_pointer = '/' + '/'.join(map(unicode, e.path))
+    return errors
+
+
 class RefResolver(jsonschema.RefResolver):
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('handlers', {'': resolve_ref})
@@ -327,3 +448,7 @@ validators = {
 }
 
 SchemaValidator = jsonschema.validators.extend(jsonschema.Draft4Validator, validators)
+DefaultsValidator = jsonschema.validators.extend(SchemaValidator, {'properties': validate_properties_w_defaults})
+
+_validator_cache = LRUCache(max_weight=100, cache_time=None)
+_validator_lock = threading.RLock()
@@ -9,7 +9,7 @@ import time
 import rpyc
 from rpyc.utils.server import ThreadedServer
 
-from flexget.utils.log import capture_output
+from flexget.utils.log import capture_thread_output
 from flexget.utils.tools import console
 
 log = logging.getLogger('ipc')
@@ -18,7 +18,7 @@ log = logging.getLogger('ipc')
 rpyc.core.protocol.DEFAULT_CONFIG['safe_attrs'].update(['items'])
 rpyc.core.protocol.DEFAULT_CONFIG['allow_pickle'] = True
 
-IPC_VERSION = 2
+IPC_VERSION = 3
 AUTH_ERROR = 'authentication error'
 AUTH_SUCCESS = 'authentication success'
 
@@ -52,7 +52,7 @@ class DaemonService(rpyc.Service):
         return IPC_VERSION
 
     def exposed_execute(self, options=None):
-        with capture_output(self.client_out_stream):
+        with capture_thread_output(self.client_out_stream):
             if options:
                 # Dictionaries are pass by reference with rpyc, turn this into a real dict on our side
                 options = rpyc.utils.classic.obtain(options)
@@ -68,7 +68,7 @@ class DaemonService(rpyc.Service):
                 time.sleep(0.3)
 
     def exposed_reload(self):
-        with capture_output(self.client_out_stream):
+        with capture_thread_output(self.client_out_stream):
             log.info('Reloading config from disk.')
             try:
                 self.manager.load_config()
@@ -77,8 +77,20 @@ class DaemonService(rpyc.Service):
             else:
                 log.info('Config successfully reloaded from disk.')
 
+    def exposed_cache_stats(self):
+        from flexget.utils.cached_input import cached
+        return cached.cache.stats()
+
+    def exposed_request_stats(self):
+        from flexget.utils.requests import host_limits
+        return host_limits.stats()
+
+    def exposed_seen_cache_stats(self):
+        from flexget.plugins.filter.seen import seen_cache
+        return seen_cache.stats()
+
     def exposed_shutdown(self, finish_queue=False):
-        with capture_output(self.client_out_stream):
+        with capture_thread_output(self.client_out_stream):
             log.info('Shutdown requested over ipc.')
             self.manager.shutdown(finish_queue=finish_queue)
 
@@ -69,6 +69,62 @@ def set_task(task):
     FlexGetLogger.local.task = task
 
 
+def set_output(stream):
+    """Log records and std output of the current thread are also written to `stream`, None to stop."""
+    FlexGetLogger.local.output = stream
+
+
+def get_output():
+    return getattr(FlexGetLogger.local, 'output', None)
+
+
+class ThreadOutputHandler(logging.Handler):
+    """Writes records to the output stream of the thread which logged them, see :func:`set_output`."""
+
+    def emit(self, record):
+        stream = get_output()
+        if stream is None:
+            return
+        try:
+            stream.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+class ThreadOutputStream(object):
+    """Wraps std output, writes are also copied to the output stream of the writing thread."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        output = get_output()
+        if output is not None:
+            output.write(data)
+        self.stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_output_installed = False
+_output_lock = threading.Lock()
+
+
+def install_output_handler():
+    """Installs the handler and std output wrappers used by :func:`set_output`, once."""
+    global _output_installed
+
+    with _output_lock:
+        if _output_installed:
+            return
+        handler = ThreadOutputHandler()
+        handler.setFormatter(FlexGetFormatter())
+        logging.getLogger().addHandler(handler)
+        sys.stdout, sys.stderr = ThreadOutputStream(sys.stdout), ThreadOutputStream(sys.stderr)
+        _output_installed = True
+
+
 _logging_configured = False
 _buff_handler = None
 _logging_started = False
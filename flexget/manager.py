@@ -19,15 +19,15 @@ import yaml
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import SingletonThreadPool
 
 # These need to be declared before we start importing from other flexget modules, since they might import them
-from flexget.utils.sqlalchemy_utils import ContextSession
+from flexget.utils.sqlalchemy_utils import (ContextSession, create_sqlite_engine, database_settings,
+                                            sqlite_in_memory)
 Base = declarative_base()
 Session = sessionmaker(class_=ContextSession)
 
 from flexget import config_schema, db_schema, logger
-from flexget.event import fire_event
+from flexget.event import event, fire_event
 from flexget.ipc import IPCClient, IPCServer
 from flexget.task import Task
 from flexget.task_queue import TaskQueue
@@ -46,6 +46,17 @@ def before_commit(session):
         log.debug('BUG?: Database writes should not be tried when there is no database lock.')
 
 
+class ConfigError(ValueError):
+    """Raised when config does not pass schema validation."""
+
+    def __init__(self, message, errors):
+        """
+        :param errors: List of :class:`jsonschema.ValidationError`s
+        """
+        super(ConfigError, self).__init__(message)
+        self.errors = errors
+
+
 class Manager(object):
 
     """Manager class for FlexGet
@@ -111,6 +122,7 @@ class Manager(object):
         self.config_path = None
         self.db_filename = None
         self.engine = None
+        self.database_settings = {}
         self.lockfile = None
         self.database_uri = None
         self.db_upgraded = False
@@ -118,6 +130,7 @@ class Manager(object):
         self.is_daemon = False
 
         self.config = {}
+        self.config_validator = config_schema.IncrementalValidator()
 
         self.ipc_server = IPCServer(self, options.ipc_port)
         self.task_queue = TaskQueue()
@@ -288,7 +301,7 @@ class Manager(object):
         # Otherwise we run the execution ourselves
         with self.acquire_lock():
             fire_event('manager.execute.started', self)
-            self.task_queue.start()
+            self.task_queue.start(self.config.get('max_concurrent_tasks', 1))
             self.execute(options)
             self.shutdown(finish_queue=True)
             self.task_queue.wait()
@@ -316,7 +329,7 @@ class Manager(object):
                 self.is_daemon = True
                 self.ipc_server.start()
                 fire_event('manager.daemon.started', self)
-                self.task_queue.start()
+                self.task_queue.start(self.config.get('max_concurrent_tasks', 1))
                 self.task_queue.wait()
                 fire_event('manager.daemon.completed', self)
         elif options.action == 'status':
@@ -358,7 +371,7 @@ class Manager(object):
         from flexget.ui import webui
         with self.acquire_lock():
             self.ipc_server.start()
-            self.task_queue.start()
+            self.task_queue.start(self.config.get('max_concurrent_tasks', 1))
             webui.start(self)
             self.task_queue.wait()
 
@@ -521,9 +534,10 @@ class Manager(object):
 
     def update_config(self, config):
         """
-        Provide a new config for the manager to use.
+        Provide a new config for the manager to use. Only the parts of config which have changed since the last
+        validation are validated again.
 
-        :raises: `ValueError` and rolls back to previous config if the provided config is not valid.
+        :raises: :class:`ConfigError` and rolls back to previous config if the provided config is not valid.
         """
         old_config = self.config
         self.config = config
@@ -533,8 +547,9 @@ class Manager(object):
                 log.critical("[%s] %s", error.json_pointer, error.message)
             log.debug('invalid config, rolling back')
             self.config = old_config
-            raise ValueError('Config did not pass schema validation')
+            raise ConfigError('Config did not pass schema validation', errors)
         log.debug('New config data loaded.')
+        self.configure_database()
         fire_event('manager.config_updated', self)
 
     def save_config(self):
@@ -561,7 +576,7 @@ class Manager(object):
         :returns: A list of `ValidationError`s
         """
         fire_event('manager.before_config_validate', self)
-        return config_schema.process_config(self.config)
+        return self.config_validator.validate(self.config)
 
     def init_sqlalchemy(self):
         """Initialize SQLAlchemy"""
@@ -595,10 +610,7 @@ class Manager(object):
         # fire up the engine
         log.debug('Connecting to: %s' % self.database_uri)
         try:
-            self.engine = sqlalchemy.create_engine(self.database_uri,
-                                                   echo=self.options.debug_sql,
-                                                   poolclass=SingletonThreadPool,
-                                                   connect_args={'check_same_thread': False, 'timeout': 10})
+            self.engine = create_sqlite_engine(self.database_uri, self.database_settings, echo=self.options.debug_sql)
         except ImportError:
             print('FATAL: Unable to use SQLite. Are you running Python 2.5 - 2.7 ?\n'
                   'Python should normally have SQLite support built in.\n'
@@ -626,6 +638,32 @@ class Manager(object):
                       (e.message, self.config_base), file=sys.stderr)
             raise
 
+    def configure_database(self):
+        """
+        Apply the `database` config section. The engine is replaced if the settings have changed and no task is
+        running, sessions created after that use the new engine. Otherwise the settings are applied on a later reload
+        or restart.
+        """
+        settings = database_settings(self.config.get('database'))
+        if settings == self.database_settings:
+            return
+        if self.engine is None or sqlite_in_memory(self.database_uri):
+            # Replacing the engine of an in-memory database would replace the database
+            self.database_settings = settings
+            return
+
+        def replace_engine():
+            log.debug('Database settings changed, reconnecting: %s' % settings)
+            old_engine = self.engine
+            self.engine = create_sqlite_engine(self.database_uri, settings, echo=self.options.debug_sql)
+            Session.configure(bind=self.engine)
+            old_engine.dispose()
+            self.database_settings = settings
+
+        if not self.task_queue.run_if_idle(replace_engine):
+            log.warning('Tasks are running, database settings will be applied when config is reloaded with no '
+                        'tasks running, or on restart.')
+
     def _read_lock(self):
         """
         Read the values from the lock file. Returns None if there is no current lock file.
@@ -816,3 +854,20 @@ class Manager(object):
                 log.info('Removed test database')
         if not self.unit_test:  # don't scroll "nosetests" summary results when logging is enabled
             log.debug('Shutdown completed')
+
+
+@event('config.register')
+def register_config():
+    config_schema.register_config_key('database', {
+        'type': 'object',
+        'properties': {
+            'performance': {'type': 'boolean', 'description': 'Use recommended settings for any not given.'},
+            'wal': {'type': 'boolean', 'description': 'Use write-ahead log, readers do not block the writer.'},
+            'synchronous': {'type': 'string', 'enum': ['off', 'normal', 'full']},
+            'mmap_size': {'type': 'integer', 'minimum': 0, 'description': 'Memory mapped I/O size in MB.'},
+            'cache_size': {'type': 'integer', 'minimum': 0, 'description': 'Page cache size in MB.'},
+            'pool_size': {'type': 'integer', 'minimum': 1,
+                          'description': 'Share a pool of connections between threads.'}
+        },
+        'additionalProperties': False
+    })
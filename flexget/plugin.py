@@ -3,11 +3,15 @@
 
 from __future__ import absolute_import, division, unicode_literals
 
+import hashlib
+import importlib
+import json
 import logging
 import os
 import pkgutil
 import re
 import sys
+import threading
 import time
 import warnings
 from itertools import ifilter
@@ -17,7 +21,7 @@ from requests import RequestException
 from flexget import plugins as plugins_pkg
 from flexget import config_schema
 from flexget.event import add_event_handler as add_phase_handler
-from flexget.event import fire_event, remove_event_handlers
+from flexget.event import fire_event, get_events, remove_event_handler, remove_event_handlers
 
 log = logging.getLogger('plugin')
 
@@ -184,6 +188,15 @@ _loaded_plugins = {}
 _plugin_options = []
 _new_phase_queue = {}
 
+# Module whose plugin.register handler is being ran
+_registering_module = None
+# Serializes importing of lazy plugin modules
+_lazy_lock = threading.RLock()
+# Modules which have added task phases
+_phase_modules = set()
+# Increase when contents of the plugin manifest change
+MANIFEST_VERSION = 1
+
 
 def register_task_phase(name, before=None, after=None):
     """Adds a new task phase to the available phases."""
@@ -193,6 +206,7 @@ def register_task_phase(name, before=None, after=None):
         raise RegisterException('You must specify either a before or after phase.')
     if name in task_phases or name in _new_phase_queue:
         raise RegisterException('Phase %s already exists.' % name)
+    _phase_modules.add(sys._getframe(1).f_globals.get('__name__'))
 
     def add_phase(phase_name, before, after):
         if not before is None and not before in task_phases:
@@ -226,7 +240,7 @@ class PluginInfo(dict):
     dupe_counter = 0
 
     def __init__(self, plugin_class, name=None, groups=None, builtin=False, debug=False, api_ver=1,
-                 contexts=None, category=None):
+                 contexts=None, category=None, locks=None):
         """
         Register a plugin.
 
@@ -239,6 +253,9 @@ class PluginInfo(dict):
         :param list contexts: List of where this plugin is configurable. Can be 'task', 'root', or None
         :param string category: The type of plugin. Can be one of the task phases.
             Defaults to the package name containing the plugin.
+        :param list locks: Names of shared resources (eg. database tables) this plugin needs exclusive access to.
+            Tasks running concurrently never hold the same lock, see :class:`flexget.task.TaskLocks`. Plugins which
+            only use the resources in some tasks (eg. builtins) can define a `needs_locks(task)` method.
         """
         dict.__init__(self)
 
@@ -268,19 +285,76 @@ class PluginInfo(dict):
         self.debug = debug
         self.contexts = contexts
         self.category = category
+        self.locks = frozenset(locks or [])
         self.phase_handlers = {}
+        # Module which registered the plugin, None if registered outside of plugin.register event
+        self.module = _registering_module
+        self.lazy = False
 
         self.plugin_class = plugin_class
         self.instance = None
 
-        if self.name in plugins:
+        existing = plugins.get(self.name)
+        if existing is not None and existing.lazy:
+            # Module of a lazy loaded plugin has been imported, replace the placeholder
+            existing.resolve(self)
+        elif existing is not None:
             PluginInfo.dupe_counter += 1
             log.critical('Error while registering plugin %s. A plugin with the same name is already registered' %
                          self.name)
         else:
             plugins[self.name] = self
 
+    @classmethod
+    def from_manifest(cls, module, data):
+        """
+        Creates a placeholder for a plugin from the plugin manifest. Its module is imported when the plugin is first
+        used, ie. one of its phase handlers is called or :attr:`instance` is accessed.
+        """
+        info = cls.__new__(cls)
+        dict.__init__(info)
+        info.update(data)
+        info.locks = frozenset(info.locks)
+        info.module = module
+        info.lazy = True
+        info.phase_handlers = {}
+        plugins[info.name] = info
+        return info
+
+    def load(self):
+        """Imports the module of a lazy loaded plugin."""
+        if self.lazy:
+            _load_lazy_module(self.module)
+        if self.lazy:
+            raise DependencyError(issued_by=self.name, missing=self.module,
+                                  message='Plugin `%s` was not registered by module %s' % (self.name, self.module))
+
+    def resolve(self, plugin_info):
+        """Turns lazy loaded placeholder into the real plugin `plugin_info`."""
+        for key in ('api_ver', 'groups', 'builtin', 'debug', 'contexts', 'category', 'locks', 'module',
+                    'plugin_class', 'instance'):
+            self[key] = plugin_info[key]
+        self.lazy = False
+        lazy_handlers = self.phase_handlers
+        self.phase_handlers = {}
+        self.initialize()
+        for phase, handler in lazy_handlers.iteritems():
+            remove_event_handler(handler.name, handler.func)
+            # Keep priorities possibly altered while plugin was not loaded (eg. by plugin_priority)
+            if phase in self.phase_handlers:
+                self.phase_handlers[phase].priority = handler.priority
+
+    def manifest(self):
+        """:return: Data needed to create lazy loaded placeholder of this plugin with :meth:`from_manifest`"""
+        return {'name': self.name, 'api_ver': self.api_ver, 'groups': self.groups, 'builtin': self.builtin,
+                'debug': self.debug, 'contexts': self.contexts, 'category': self.category,
+                'locks': sorted(self.locks), 'schema': self.schema,
+                'phases': dict((phase, handler.priority) for phase, handler in self.phase_handlers.iteritems())}
+
     def initialize(self):
+        if self.lazy:
+            self._initialize_lazy()
+            return
         if self.instance is not None:
             # We already initialized
             return
@@ -303,6 +377,19 @@ class PluginInfo(dict):
 
         self.build_phase_handlers()
 
+    def _initialize_lazy(self):
+        if 'phases' not in self:
+            # We already initialized
+            return
+        if self.schema is not None:
+            config_schema.register_schema(self.schema['id'], self.schema)
+        for phase, handler_prio in self.pop('phases').iteritems():
+            if phase not in phase_methods:
+                continue
+            event = add_phase_handler('plugin.%s.%s' % (self.name, phase), _LazyHandler(self, phase), handler_prio)
+            event.plugin = self
+            self.phase_handlers[phase] = event
+
     def reset_phase_handlers(self):
         """Temporary utility method"""
         self.phase_handlers = {}
@@ -333,6 +420,9 @@ class PluginInfo(dict):
     def __getattr__(self, attr):
         if attr in self:
             return self[attr]
+        if attr in ('instance', 'plugin_class') and self.get('lazy'):
+            self.load()
+            return self[attr]
         return dict.__getattribute__(self, attr)
 
     def __setattr__(self, attr, value):
@@ -347,6 +437,30 @@ class PluginInfo(dict):
 register = PluginInfo
 
 
+class _LazyHandler(object):
+    """Phase handler of a lazy loaded plugin, imports the plugin and calls the real handler."""
+
+    def __init__(self, plugin_info, phase):
+        self.plugin_info = plugin_info
+        self.phase = phase
+        self.__name__ = 'lazy_%s_%s' % (plugin_info.name, phase)
+
+    def __call__(self, *args, **kwargs):
+        self.plugin_info.load()
+        return self.plugin_info.phase_handlers[self.phase](*args, **kwargs)
+
+
+def _load_lazy_module(name):
+    """Imports plugin module `name` and registers its plugins."""
+    with _lazy_lock:
+        if name not in sys.modules:
+            log.debug('Loading plugin module %s' % name)
+            _import_plugin_module(name, lambda: importlib.import_module(name))
+        _register_plugins()
+        for plugin in plugins.values():
+            plugin.initialize()
+
+
 def _strip_trailing_sep(path):
     return path.rstrip("\\/")
 
@@ -373,14 +487,17 @@ def _get_standard_plugins_path():
 def _load_plugins_from_dirs(dirs):
     """
     :param list dirs: Directories from where plugins are loaded from
+    :returns: Names of the plugin modules found
     """
 
     log.debug('Trying to load plugins from: %s' % dirs)
     # add all dirs to plugins_pkg load path so that plugins are loaded from flexget and from ~/.flexget/plugins/
     plugins_pkg.__path__ = map(_strip_trailing_sep, dirs)
+    modules = []
     for importer, name, ispkg in pkgutil.walk_packages(dirs, plugins_pkg.__name__ + '.'):
         if ispkg:
             continue
+        modules.append(name)
         # Don't load any plugins again if they are already loaded
         # This can happen if one plugin imports from another plugin
         if name in sys.modules:
@@ -389,50 +506,205 @@ def _load_plugins_from_dirs(dirs):
         # Don't load from pyc files
         if not loader.filename.endswith('.py'):
             continue
-        try:
-            loaded_module = loader.load_module(name)
-        except DependencyError as e:
-            if e.has_message():
-                msg = e.message
-            else:
-                msg = 'Plugin `%s` requires `%s` to load.' % (e.issued_by or name, e.missing or 'N/A')
-            if not e.silent:
-                log.warning(msg)
-            else:
-                log.debug(msg)
-        except ImportError as e:
-            log.critical('Plugin `%s` failed to import dependencies' % name)
-            log.exception(e)
-        except Exception as e:
-            log.critical('Exception while loading plugin %s' % name)
-            log.exception(e)
-            raise
-        else:
-            log.trace('Loaded module %s from %s' % (name, loaded_module.__file__))
+        _import_plugin_module(name, lambda: loader.load_module(name))
 
     if _new_phase_queue:
         for phase, args in _new_phase_queue.iteritems():
             log.error('Plugin %s requested new phase %s, but it could not be created at requested '
                       'point (before, after). Plugin is not working properly.' % (args[0], phase))
+    return modules
 
 
-def load_plugins():
-    """Load plugins from the standard plugin paths."""
+def _import_plugin_module(name, load):
+    """
+    :param name: Name of the plugin module
+    :param load: Function which imports the module
+    """
+    try:
+        loaded_module = load()
+    except DependencyError as e:
+        if e.has_message():
+            msg = e.message
+        else:
+            msg = 'Plugin `%s` requires `%s` to load.' % (e.issued_by or name, e.missing or 'N/A')
+        if not e.silent:
+            log.warning(msg)
+        else:
+            log.debug(msg)
+    except ImportError as e:
+        log.critical('Plugin `%s` failed to import dependencies' % name)
+        log.exception(e)
+    except Exception as e:
+        log.critical('Exception while loading plugin %s' % name)
+        log.exception(e)
+        raise
+    else:
+        log.trace('Loaded module %s from %s' % (name, loaded_module.__file__))
+
+
+def _register_plugins():
+    """Fires pending `plugin.register` handlers, keeping track of the module doing the registering."""
+    global _registering_module
+    # Plugins should only be registered once, remove their handlers before calling them
+    while True:
+        try:
+            handlers = list(get_events('plugin.register'))
+        except KeyError:
+            return
+        remove_event_handlers('plugin.register')
+        for handler in handlers:
+            _registering_module = getattr(handler.func, '__module__', None)
+            try:
+                handler()
+            finally:
+                _registering_module = None
+
+
+def _get_manifest_path(dirs):
+    """
+    :param dirs: Plugin search path, installs with different plugin paths keep separate manifests
+    :returns: Path of the plugin manifest file, or None if the manifest is disabled
+    """
+    path = os.environ.get('FLEXGET_PLUGIN_MANIFEST')
+    if path is None:
+        key = hashlib.md5(json.dumps(dirs)).hexdigest()[:8]
+        path = os.path.join(os.path.expanduser('~'), '.flexget', 'plugin-manifest-%s.json' % key)
+    return path or None
+
+
+def _plugin_files(dirs):
+    """:returns: Dict of plugin source file paths and their modification times found from `dirs`"""
+    files = {}
+    for path in dirs:
+        for root, dirnames, filenames in os.walk(path):
+            for filename in filenames:
+                if filename.endswith('.py'):
+                    filename = os.path.join(root, filename)
+                    files[filename] = os.path.getmtime(filename)
+    return files
+
+
+def _eager_modules():
+    """
+    :returns: Set of plugin modules which must be imported on every startup, because they do more than register
+      plugins (handle other events, declare database tables, add task phases ...)
+    """
+    from flexget.event import _events
+    from flexget.manager import Base
+
+    eager = set(_phase_modules)
+    for name, handlers in _events.iteritems():
+        if not name.startswith('plugin.'):
+            eager.update(getattr(handler.func, '__module__', None) for handler in handlers)
+    eager.update(cls.__module__ for cls in Base._decl_class_registry.itervalues() if hasattr(cls, '__module__'))
+    for plugin in plugins.itervalues():
+        if plugin.module is None:
+            # Registered outside of plugin.register event
+            eager.add(plugin.plugin_class.__module__)
+            continue
+        try:
+            json.dumps(plugin.manifest())
+        except (TypeError, ValueError):
+            eager.add(plugin.module)
+    return eager
+
+
+def _build_manifest(dirs, modules):
+    """
+    :param list dirs: Directories plugins were loaded from
+    :param list modules: Names of plugin modules in import order
+    :returns: Manifest allowing :func:`load_plugins` to only import modules whose plugins are used
+    """
+    from flexget import __version__
+
+    # Modules which failed to import are retried on every startup
+    eager = _eager_modules() | set(name for name in modules if name not in sys.modules)
+    by_module = {}
+    for plugin in plugins.itervalues():
+        by_module.setdefault(plugin.module, []).append(plugin.manifest())
+    return {'version': MANIFEST_VERSION, 'flexget': __version__, 'paths': dirs, 'files': _plugin_files(dirs),
+            'modules': [{'name': name, 'lazy': name not in eager, 'plugins': by_module.get(name, [])}
+                        for name in modules]}
+
+
+def _read_manifest(path, dirs):
+    """:returns: Plugin manifest from `path`, or None if it does not exist or is out of date"""
+    from flexget import __version__
+
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (IOError, ValueError) as e:
+        log.debug('Unable to read plugin manifest %s: %s' % (path, e))
+        return None
+    if (manifest.get('version') != MANIFEST_VERSION or manifest.get('flexget') != __version__ or
+            manifest.get('paths') != dirs or manifest.get('files') != _plugin_files(dirs)):
+        log.debug('Plugin manifest is out of date')
+        return None
+    return manifest
+
+
+def _write_manifest(path, manifest):
+    try:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        if os.path.exists(path):
+            # os.rename does not replace existing files on windows
+            os.remove(path)
+        os.rename(tmp_path, path)
+    except (IOError, OSError) as e:
+        log.debug('Unable to write plugin manifest %s: %s' % (path, e))
+
+
+def _load_plugins_from_manifest(dirs, manifest):
+    """
+    Imports only the modules marked eager in `manifest`, plugins of other modules are registered as placeholders
+    which import their module when first used.
+    """
+    plugins_pkg.__path__ = map(_strip_trailing_sep, dirs)
+    for module in manifest['modules']:
+        name = module['name']
+        if not module['lazy'] and name not in sys.modules:
+            _import_plugin_module(name, lambda: importlib.import_module(name))
+    _register_plugins()
+    for module in manifest['modules']:
+        for data in module['plugins']:
+            if data['name'] not in plugins:
+                PluginInfo.from_manifest(module['name'], data)
+
+
+def load_plugins(lazy=False):
+    """
+    Load plugins from the standard plugin paths.
+
+    :param bool lazy: Use plugin manifest to only import modules of plugins when they are used. Manifest is (re)built
+      when missing or when plugin files have changed.
+    """
     global plugins_loaded
 
     start_time = time.time()
-    # Import all the plugins
-    _load_plugins_from_dirs(_get_standard_plugins_path())
-    # Register them
-    fire_event('plugin.register')
-    # Plugins should only be registered once, remove their handlers after
-    remove_event_handlers('plugin.register')
-    # After they have all been registered, instantiate them
-    for plugin in plugins.values():
-        plugin.initialize()
+    dirs = _get_standard_plugins_path()
+    manifest_path = _get_manifest_path(dirs) if lazy else None
+    manifest = _read_manifest(manifest_path, dirs)
+    with _lazy_lock:
+        if manifest:
+            _load_plugins_from_manifest(dirs, manifest)
+        else:
+            # Import all the plugins
+            modules = _load_plugins_from_dirs(dirs)
+            # Register them
+            _register_plugins()
+        # After they have all been registered, instantiate them
+        for plugin in plugins.values():
+            plugin.initialize()
+    if manifest_path and not manifest:
+        _write_manifest(manifest_path, _build_manifest(dirs, modules))
     took = time.time() - start_time
     plugins_loaded = True
-    log.debug('Plugins took %.2f seconds to load' % took)
+    log.debug('Plugins took %.2f seconds%s to load' % (took, ' (lazily)' if manifest else ''))
 
 
 def get_plugins(phase=None, group=None, context=None, category=None, name=None, min_api=None):
@@ -0,0 +1,78 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+
+from rpyc.utils.classic import obtain
+
+from flexget import options, plugin
+from flexget.event import event
+from flexget.ipc import IPCClient
+from flexget.utils.cached_input import cached
+from flexget.utils.requests import host_limits
+from flexget.utils.tools import console
+
+try:
+    from flexget.plugins.filter.seen import seen_cache
+except ImportError:
+    raise plugin.DependencyError(issued_by='cli_cache', missing='seen',
+                                 message='Cache commandline interface not loaded')
+
+log = logging.getLogger('cache')
+
+
+def do_cli(manager, options):
+    if options.cache_action == 'stats':
+        stats(manager)
+
+
+def stats(manager):
+    # The memory cache only lives in a running daemon
+    ipc_info = manager.check_ipc_info()
+    if ipc_info:
+        try:
+            client = IPCClient(ipc_info['port'], ipc_info['password'])
+        except ValueError as e:
+            log.error(e)
+            return
+        try:
+            data = obtain(client.cache_stats())
+            request_stats = obtain(client.request_stats())
+            seen_stats = obtain(client.seen_cache_stats())
+        finally:
+            client.close()
+    else:
+        console('No daemon is running, showing the cache of this process only.')
+        data = cached.cache.stats()
+        request_stats = host_limits.stats()
+        seen_stats = seen_cache.stats()
+    lookups = data['hits'] + data['misses']
+    console('Input memory cache:')
+    console('  %-12s %s' % ('inputs', data['keys']))
+    console('  %-12s %s / %s' % ('entries', data['weight'], data['max_weight']))
+    console('  %-12s %.1f / %.1f MB' % ('memory', data['size'] / 1024 / 1024, (data['max_size'] or 0) / 1024 / 1024))
+    console('  %-12s %s (%.0f%%)' % ('hits', data['hits'], data['hits'] / lookups * 100 if lookups else 0))
+    console('  %-12s %s' % ('misses', data['misses']))
+    console('  %-12s %s' % ('evictions', data['evictions']))
+    console('  %-12s %s' % ('expirations', data['expirations']))
+    queried = seen_stats['hits'] + seen_stats['false_positives']
+    console('Seen cache:')
+    console('  %-12s %s' % ('values', seen_stats['values']))
+    console('  %-12s %s' % ('forgotten', seen_stats['forgotten']))
+    console('  %-12s %s' % ('rebuilds', seen_stats['rebuilds']))
+    console('  %-12s %s' % ('skipped', seen_stats['skipped']))
+    console('  %-12s %s' % ('hits', seen_stats['hits']))
+    console('  %-12s %s (%.0f%%)' % ('false hits', seen_stats['false_positives'],
+                                     seen_stats['false_positives'] / queried * 100 if queried else 0))
+    if request_stats:
+        console('Requests by host:')
+        console('  %-40s %-10s %-8s %s' % ('Host', 'Requests', 'Waits', 'Waited'))
+        for host, host_stats in sorted(request_stats.iteritems()):
+            console('  %-40s %-10s %-8s %.1fs' % (host, host_stats['requests'], host_stats['waits'],
+                                                 host_stats['queued']))
+
+
+@event('options.register')
+def register_parser_arguments():
+    parser = options.register_command('cache', do_cli, help='view input cache, seen cache and request statistics')
+    subparsers = parser.add_subparsers(title='Actions', metavar='<action>', dest='cache_action')
+    subparsers.add_parser('stats', help='show hit, miss and eviction counts of the input memory cache and the seen '
+                                        'cache, and requests made to each host')
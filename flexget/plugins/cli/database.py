@@ -1,13 +1,25 @@
 from __future__ import unicode_literals, division, absolute_import
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
 
 from flexget import options
 from flexget.db_schema import reset_schema, plugin_schemas
 from flexget.event import event
 from flexget.manager import Base, Session
+from flexget.utils.sqlalchemy_utils import PERFORMANCE_SETTINGS, create_sqlite_engine, database_settings
 from flexget.utils.tools import console
 
 
 def do_cli(manager, options):
+    if options.db_action == 'benchmark':
+        # Uses a scratch database, no need for the lock
+        benchmark(manager, options)
+        return
     with manager.acquire_lock():
         if options.db_action == 'cleanup':
             cleanup(manager)
@@ -67,6 +79,98 @@ def reset_plugin(options):
             console('Unable to reset %s: %s' % (plugin, e.message))
 
 
+def benchmark(manager, options):
+    settings = database_settings(manager.config.get('database'))
+    name = 'configured'
+    if not settings:
+        settings, name = dict(PERFORMANCE_SETTINGS), 'performance'
+    console('Running %s transactions with %s concurrent readers on a scratch database ...' %
+            (options.transactions, options.readers))
+    # Use the same disk as the real database
+    tmp_dir = tempfile.mkdtemp(prefix='db-benchmark-', dir=manager.config_base)
+    try:
+        before = run_benchmark(os.path.join(tmp_dir, 'default.sqlite'), {}, options.transactions, options.readers)
+        after = run_benchmark(os.path.join(tmp_dir, 'tuned.sqlite'), settings, options.transactions, options.readers)
+    finally:
+        shutil.rmtree(tmp_dir)
+    console('%-28s %12s %12s' % ('', 'default', name))
+    console('-' * 54)
+    rows = [('commit latency avg (ms)', 'commit_avg', '%.2f'),
+            ('commit latency p95 (ms)', 'commit_p95', '%.2f'),
+            ('commits/s with readers', 'commit_rate', '%.0f'),
+            ('reader queries/s', 'read_rate', '%.0f'),
+            ('reader max wait (ms)', 'read_max', '%.2f'),
+            ('database locked errors', 'locked', '%d')]
+    for title, key, fmt in rows:
+        console('%-28s %12s %12s' % (title, fmt % before[key], fmt % after[key]))
+    console('Settings used: %s' % ', '.join('%s=%s' % item for item in sorted(settings.iteritems())))
+
+
+def run_benchmark(path, settings, transactions, readers):
+    """
+    Measure commit latency, and reader/writer contention on a new sqlite database at `path`.
+
+    :returns: Dict of results
+    """
+    engine = create_sqlite_engine('sqlite:///%s' % path.replace('\\', '\\\\'), settings)
+    results = {'locked': 0}
+    try:
+        engine.execute('CREATE TABLE benchmark (id INTEGER PRIMARY KEY, value TEXT)')
+
+        def commit(i):
+            with engine.begin() as connection:
+                connection.execute('INSERT INTO benchmark (value) VALUES (?)', 'value %s' % i)
+
+        # Commit latency without contention
+        latencies = []
+        for i in xrange(transactions):
+            start = time.time()
+            commit(i)
+            latencies.append(time.time() - start)
+        latencies.sort()
+        results['commit_avg'] = sum(latencies) / len(latencies) * 1000
+        results['commit_p95'] = latencies[int(len(latencies) * 0.95)] * 1000
+
+        # Writer with concurrent readers
+        done = threading.Event()
+        read_times = []
+        lock = threading.Lock()
+
+        def reader():
+            while not done.is_set():
+                start = time.time()
+                try:
+                    engine.execute('SELECT count(*), max(value) FROM benchmark').fetchall()
+                except OperationalError:
+                    with lock:
+                        results['locked'] += 1
+                    continue
+                with lock:
+                    read_times.append(time.time() - start)
+
+        threads = [threading.Thread(target=reader) for _ in xrange(readers)]
+        for thread in threads:
+            thread.start()
+        start = time.time()
+        try:
+            for i in xrange(transactions):
+                try:
+                    commit(i)
+                except OperationalError:
+                    results['locked'] += 1
+        finally:
+            took = time.time() - start
+            done.set()
+            for thread in threads:
+                thread.join()
+        results['commit_rate'] = transactions / took
+        results['read_rate'] = len(read_times) / took
+        results['read_max'] = max(read_times or [0]) * 1000
+    finally:
+        engine.dispose()
+    return results
+
+
 @event('options.register')
 def register_parser_arguments():
     parser = options.register_command('database', do_cli, help='utilities to manage the FlexGet database')
@@ -76,6 +180,12 @@ def register_parser_arguments():
     reset_parser = subparsers.add_parser('reset', add_help=False, help='reset the entire database (DANGEROUS!)')
     reset_parser.add_argument('--sure', action='store_true', required=True,
                               help='you must use this flag to indicate you REALLY want to do this')
+    benchmark_parser = subparsers.add_parser('benchmark', help='measure commit latency and reader/writer contention '
+                                                               'with default and configured database settings')
+    benchmark_parser.add_argument('--transactions', type=int, default=200, metavar='NUM',
+                                  help='number of transactions to commit (default: %(default)s)')
+    benchmark_parser.add_argument('--readers', type=int, default=4, metavar='NUM',
+                                  help='number of concurrent reader threads (default: %(default)s)')
     reset_plugin_parser = subparsers.add_parser('reset-plugin', help='reset the database for a specific plugin')
     reset_plugin_parser.add_argument('reset_plugin', metavar='<plugin>', nargs='?',
                                  help='name of plugin to reset (if omitted, known plugins will be listed)')
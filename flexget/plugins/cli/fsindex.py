@@ -0,0 +1,55 @@
+from __future__ import unicode_literals, division, absolute_import
+import time
+
+from flexget import options
+from flexget.event import event
+from flexget.manager import Session
+from flexget.utils.fsindex import IndexedRoot, forget, scan
+from flexget.utils.tools import console
+
+
+def do_cli(manager, options):
+    if options.fsindex_action == 'status':
+        status()
+    elif options.fsindex_action == 'rebuild':
+        with manager.acquire_lock():
+            rebuild(options.paths)
+
+
+def status():
+    with Session() as session:
+        roots = session.query(IndexedRoot).order_by(IndexedRoot.path).all()
+        if not roots:
+            console('Filesystem index is empty.')
+            return
+        console('%-50s %-8s %-10s %s' % ('Path', 'Dirs', 'Items', 'Last scan'))
+        console('-' * 79)
+        for root in roots:
+            items = sum(len(indexed_dir.files) for indexed_dir in root.dirs)
+            last_scan = root.last_scan.strftime('%Y-%m-%d %H:%M') if root.last_scan else 'never'
+            console('%-50s %-8s %-10s %s' % (root.path, len(root.dirs), items, last_scan))
+
+
+def rebuild(paths):
+    with Session() as session:
+        if not paths:
+            paths = [root.path for root in session.query(IndexedRoot).all()]
+        for folder in paths:
+            forget(session, folder)
+        # Make sure the old listings are gone before scanning again
+        session.flush()
+        for folder in paths:
+            start = time.time()
+            items = scan(session, folder)
+            console('Indexed %s items in %s (%.1f seconds)' % (len(items), folder, time.time() - start))
+    console('Filesystem index rebuilt.')
+
+
+@event('options.register')
+def register_parser_arguments():
+    parser = options.register_command('fsindex', do_cli, help='view and rebuild the index of scanned local paths')
+    subparsers = parser.add_subparsers(title='Actions', metavar='<action>', dest='fsindex_action')
+    subparsers.add_parser('status', help='list indexed paths')
+    rebuild_parser = subparsers.add_parser('rebuild', help='list indexed paths again from scratch')
+    rebuild_parser.add_argument('paths', nargs='*', metavar='<path>',
+                                help='paths to rebuild, all indexed paths if not given (also adds new paths)')
@@ -9,6 +9,8 @@ from flexget.event import event
 log = logging.getLogger('performance')
 
 performance = {}
+# Database commits of each phase, by task name
+phase_commits = {}
 
 _start = {}
 
@@ -25,6 +27,8 @@ def startup(manager):
     if manager.options.execute.debug_perf:
         log.info('Enabling plugin and SQLAlchemy performance debugging')
         import time
+        from flexget.plugin import task_phases
+        from flexget.utils.sqlalchemy_utils import commit_count
 
         # Monkeypatch query counter for SQLAlchemy
         from sqlalchemy.engine import Connection
@@ -45,16 +49,25 @@ def startup(manager):
             fd = _start.setdefault(task.name, {})
             fd.setdefault('time', {})[keyword] = time.time()
             fd.setdefault('queries', {})[keyword] = query_count
+            fd.setdefault('commits', {})[keyword] = commit_count()
 
         @event('task.execute.after_plugin')
         def after(task, keyword):
             took = time.time() - _start[task.name]['time'][keyword]
             queries = query_count - _start[task.name]['queries'][keyword]
+            commits = commit_count() - _start[task.name]['commits'][keyword]
             # Store results, increases previous values
             pd = performance.setdefault(task.name, {})
             data = pd.setdefault(keyword, {})
             data['took'] = data.get('took', 0) + took
             data['queries'] = data.get('queries', 0) + queries
+            data['commits'] = data.get('commits', 0) + commits
+
+        @event('task.execute.completed')
+        def completed(task):
+            counts = phase_commits.setdefault(task.name, {})
+            for phase, commits in task.commit_counts.iteritems():
+                counts[phase] = counts.get(phase, 0) + commits
 
         @event('manager.execute.completed')
         def results(manager):
@@ -64,7 +77,16 @@ def startup(manager):
                     took = results['took']
                     queries = results['queries']
                     if took > 0.1 or queries > 10:
-                        log.info('%-15s took %0.2f sec (%s queries)' % (keyword, took, queries))
+                        log.info('%-15s took %0.2f sec (%s queries, %s commits)' %
+                                 (keyword, took, queries, results['commits']))
+            for name, counts in phase_commits.iteritems():
+                # Commits of a task wide commit group are done after all phases
+                phases = [p for p in task_phases + ['task'] if counts.get(p)]
+                log.info('Database commits for task %s: %s (total %s)' %
+                         (name, ', '.join('%s %s' % (p, counts[p]) for p in phases), sum(counts.itervalues())))
+            from flexget.utils.requests import host_limits
+            for host, stats in sorted(host_limits.stats().iteritems()):
+                log.info('%-30s %s requests, waited %0.2f sec' % (host, stats['requests'], stats['queued']))
 
 
 @event('options.register')
@@ -15,7 +15,7 @@ def plugins_summary(manager, options):
     print('-' * 79)
 
     # print the list
-    for plugin in sorted(get_plugins(phase=options.phase, group=options.group)):
+    for plugin in sorted(get_plugins(phase=options.phase, group=options.group), key=lambda p: p.name):
         # do not include test classes, unless in debug mode
         if plugin.get('debug_plugin', False) and not options.debug:
             continue
@@ -9,9 +9,9 @@ from flexget.manager import Session
 from flexget.utils.tools import console
 
 try:
-    from flexget.plugins.filter.series import (Series, Episode, Release, SeriesTask, forget_series,
-                                               forget_series_episode, set_series_begin, normalize_series_name,
-                                               new_eps_after, get_latest_release)
+    from flexget.plugins.filter.series import (Series, SeriesSummary, Episode, forget_series, forget_series_episode,
+                                               set_series_begin, normalize_series_name, ensure_series_summaries,
+                                               update_series_summaries)
 except ImportError:
     raise plugin.DependencyError(issued_by='cli_series', missing='series',
                                  message='Series commandline interface not loaded')
@@ -39,20 +39,20 @@ def display_summary(options):
 
     session = Session()
     try:
-        query = (session.query(Series).outerjoin(Series.episodes).outerjoin(Episode.releases).
-                 outerjoin(Series.in_tasks).group_by(Series.id))
+        if ensure_series_summaries(session):
+            session.commit()
+        query = session.query(Series, SeriesSummary).join(Series.summary)
         if options.configured == 'configured':
-            query = query.having(func.count(SeriesTask.id) >= 1)
+            query = query.filter(SeriesSummary.configured == True)
         elif options.configured == 'unconfigured':
-            query = query.having(func.count(SeriesTask.id) < 1)
+            query = query.filter(SeriesSummary.configured == False)
         if options.premieres:
-            query = (query.having(func.max(Episode.season) <= 1).having(func.max(Episode.number) <= 2).
-                     having(func.count(SeriesTask.id) < 1)).filter(Release.downloaded == True)
+            query = query.filter(SeriesSummary.premiere == True).filter(SeriesSummary.configured == False)
         if options.new:
-            query = query.having(func.max(Episode.first_seen) > datetime.now() - timedelta(days=options.new))
+            query = query.filter(SeriesSummary.last_seen > datetime.now() - timedelta(days=options.new))
         if options.stale:
-            query = query.having(func.max(Episode.first_seen) < datetime.now() - timedelta(days=options.stale))
-        for series in query.order_by(Series.name).yield_per(10):
+            query = query.filter(SeriesSummary.last_seen < datetime.now() - timedelta(days=options.stale))
+        for series, summary in query.order_by(Series.name).yield_per(100):
             series_name = series.name
             if len(series_name) > 30:
                 series_name = series_name[:27] + '...'
@@ -62,14 +62,13 @@ def display_summary(options):
             status = 'N/A'
             age = 'N/A'
             episode_id = 'N/A'
-            latest = get_latest_release(series)
-            if latest:
-                if latest.first_seen > datetime.now() - timedelta(days=2):
+            if summary.latest_episode_id:
+                if summary.latest_first_seen > datetime.now() - timedelta(days=2):
                     new_ep = '>'
-                behind = new_eps_after(latest)
-                status = get_latest_status(latest)
-                age = latest.age
-                episode_id = latest.identifier
+                behind = summary.behind
+                status = summary.latest_status
+                age = summary.latest_age
+                episode_id = summary.latest_identifier
 
             if behind:
                 episode_id += ' +%s' % behind
@@ -103,6 +102,7 @@ def begin(manager, options):
             console(e)
         else:
             console('Episodes for `%s` will be accepted starting with `%s`' % (series.name, ep_id))
+            update_series_summaries(session, [series])
             session.commit()
     finally:
         session.close()
@@ -136,24 +136,6 @@ def forget(manager, options):
     manager.config_changed()
 
 
-def get_latest_status(episode):
-    """
-    :param episode: Instance of Episode
-    :return: Status string for given episode
-    """
-    status = ''
-    for release in sorted(episode.releases, key=lambda r: r.quality):
-        if not release.downloaded:
-            continue
-        status += release.quality.name
-        if release.proper_count > 0:
-            status += '-proper'
-            if release.proper_count > 1:
-                status += str(release.proper_count)
-        status += ', '
-    return status.rstrip(', ') if status else None
-
-
 def display_details(name):
     """Display detailed series information, ie. series show NAME"""
 
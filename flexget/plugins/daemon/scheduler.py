@@ -1,13 +1,16 @@
 from __future__ import unicode_literals, division, absolute_import
 from datetime import datetime, timedelta, time as dt_time
+import heapq
+import itertools
 import logging
+import random
 import threading
 import time
 
 from sqlalchemy import Column, DateTime, Integer
 
 from flexget import db_schema
-from flexget.config_schema import register_config_key, parse_time
+from flexget.config_schema import register_config_key, parse_interval, parse_time, format_checker
 from flexget.event import event
 from flexget.manager import Session
 from flexget.utils.sqlalchemy_utils import table_schema
@@ -58,9 +61,13 @@ main_schema = {
             'items': {
                 'properties': {
                     'tasks': {'type': ['array', 'string'], 'items': {'type': 'string'}},
-                    'interval': yaml_schedule
+                    'interval': yaml_schedule,
+                    'cron': {'type': 'string', 'format': 'cron'},
+                    'jitter': {'type': 'string', 'format': 'interval'}
                 },
-                'required': ['tasks', 'interval'],
+                'required': ['tasks'],
+                'oneOf': [{'required': ['interval']}, {'required': ['cron']}],
+                'error_oneOf': 'Schedule must be specified with one of `interval` or `cron`',
                 'additionalProperties': False
             }
         },
@@ -93,13 +100,15 @@ def db_upgrade(ver, session):
 @event('manager.daemon.started')
 @event('manager.config_updated')
 def setup_scheduler(manager):
-    """Starts, stops or restarts the scheduler when config changes."""
+    """Starts, stops or reloads the scheduler when config changes."""
     if not manager.is_daemon:
         return
     scheduler = Scheduler(manager)
-    if scheduler.is_alive():
+    if not manager.config.get('schedules', True):
         scheduler.stop()
-    if manager.config.get('schedules', True):
+    elif scheduler.is_alive() and not scheduler.stopping:
+        scheduler.reload()
+    else:
         scheduler.start()
 
 
@@ -112,16 +121,81 @@ def stop_scheduler(manager):
     scheduler.wait()
 
 
+class LastRuns(object):
+    """
+    In memory cache of the last run times of all triggers.
+    All times are read from the database at once, changes are written back in batches by :meth:`flush`.
+    """
+
+    def __init__(self):
+        self.last_runs = {}
+        self.dirty = set()
+        self.flushed = time.time()
+
+    def load(self):
+        session = Session()
+        try:
+            self.last_runs = dict(session.query(DBTrigger.uid, DBTrigger.last_run))
+        finally:
+            session.close()
+        self.dirty = set()
+        log.debug('loaded last_run of %s triggers from the database' % len(self.last_runs))
+
+    def get(self, uid):
+        return self.last_runs.get(uid)
+
+    def set(self, uid, last_run):
+        self.last_runs[uid] = last_run
+        self.dirty.add(uid)
+
+    def flush(self):
+        """Write all changed last_run times to the database in one transaction."""
+        self.flushed = time.time()
+        if not self.dirty:
+            return
+        dirty, self.dirty = self.dirty, set()
+        session = Session()
+        try:
+            existing = dict((db_trigger.uid, db_trigger) for db_trigger in
+                            session.query(DBTrigger).filter(DBTrigger.uid.in_(dirty)))
+            for uid in dirty:
+                db_trigger = existing.get(uid)
+                if not db_trigger:
+                    db_trigger = DBTrigger(uid)
+                    session.add(db_trigger)
+                db_trigger.last_run = self.last_runs[uid]
+            session.commit()
+        except Exception:
+            # Try again with the next batch
+            self.dirty.update(dirty)
+            raise
+        finally:
+            session.close()
+        log.debug('recorded last_run of %s triggers to the database' % len(dirty))
+
+
 @singleton
 class Scheduler(object):
-    # We use a regular list for periodic jobs, so you must hold this lock while using it
-    triggers_lock = threading.Lock()
+    """
+    Fires triggers from a heap ordered by their next run time. The scheduler thread sleeps until the first trigger in
+    the heap is due, or until it is woken early by :meth:`reload` or :meth:`stop`. The thread blocks without a timeout
+    while sleeping, a timer wakes it when it is due.
+    """
+    # Seconds between writing changed last_run times to the database
+    flush_interval = 60
+    # Seconds to wait before checking again when the tasks from the last run of a trigger are still running
+    retry_delay = 5
 
     def __init__(self, manager):
         self.manager = manager
         self.triggers = []
         self.running_triggers = {}
         self.waiting_triggers = set()
+        self.last_runs = LastRuns()
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._reload = False
         self._stop = threading.Event()
         self._thread = None
 
@@ -141,74 +215,137 @@ class Scheduler(object):
         if self.is_alive():
             log.debug('Stopping scheduler')
             self._stop.set()
+            self.wake()
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    def reload(self):
+        """Reload schedules from the config without restarting the scheduler thread."""
+        with self._condition:
+            self._reload = True
+            self._condition.notify()
+
+    def wake(self):
+        with self._condition:
+            self._condition.notify()
 
     def is_alive(self):
         return self._thread and self._thread.is_alive()
 
+    def _sleep(self, timeout=None):
+        """Sleep until woken, or `timeout` seconds have passed. Condition must be held."""
+        timer = None
+        if timeout is not None:
+            # Waiting with a timeout polls on python 2
+            timer = threading.Timer(timeout, self.wake)
+            timer.daemon = True
+            timer.start()
+        try:
+            self._condition.wait()
+        finally:
+            if timer:
+                timer.cancel()
+
     def wait(self):
         while self.is_alive():
             time.sleep(0.5)
 
     def load_schedules(self):
         """Clears current schedules and loads them from the config."""
-        with self.triggers_lock:
-            self.triggers = []
-            if 'schedules' not in self.manager.config:
-                log.info('No schedules defined in config. Defaulting to run all tasks on a 1 hour interval.')
-            for item in self.manager.config.get('schedules', [{'tasks': ['*'], 'interval': {'hours': 1}}]):
-                tasks = item['tasks']
-                if not isinstance(tasks, list):
-                    tasks = [tasks]
-                self.triggers.append(Trigger(item['interval'], tasks, options={'cron': True}))
-
-    def queue_pending_jobs(self):
-        # Add pending jobs to the run queue
-        with self.triggers_lock:
-            for trigger in self.triggers:
-                if trigger.should_run:
-                    if trigger in self.running_triggers:
-                        if trigger not in self.waiting_triggers:
-                            log.error('Not firing schedule %r. Tasks from last run have still not finished.' % trigger)
-                            log.error('You may need to increase the interval for this schedule.')
-                            self.waiting_triggers.add(trigger)
-                        continue
-                    options = dict(trigger.options)
-                    # If the user has specified all tasks with '*', don't add tasks option at all, so that manual
-                    # tasks are not executed
-                    if trigger.tasks != ['*']:
-                        options['tasks'] = trigger.tasks
-                    if trigger in self.waiting_triggers:
-                        self.waiting_triggers.remove(trigger)
-                    self.running_triggers[trigger] = self.manager.execute(options=options, priority=5)
-                    trigger.trigger()
+        self.triggers = []
+        if 'schedules' not in self.manager.config:
+            log.info('No schedules defined in config. Defaulting to run all tasks on a 1 hour interval.')
+        for item in self.manager.config.get('schedules', [{'tasks': ['*'], 'interval': {'hours': 1}}]):
+            tasks = item['tasks']
+            if not isinstance(tasks, list):
+                tasks = [tasks]
+            trigger = Trigger(item.get('interval'), tasks, options={'cron': True}, cron=item.get('cron'),
+                              jitter=item.get('jitter'))
+            trigger.last_run = self.last_runs.get(hash(trigger))
+            trigger.schedule_next_run()
+            self.triggers.append(trigger)
+        self._heap = [(trigger.timestamp, next(self._counter), trigger) for trigger in self.triggers]
+        heapq.heapify(self._heap)
+        log.debug('loaded %s schedules' % len(self.triggers))
+
+    def queue_pending_jobs(self, now=None):
+        """
+        Add jobs of all due triggers to the run queue.
+
+        :return: Number of seconds until the next trigger is due, or None if there are no triggers.
+        """
+        if now is None:
+            now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            trigger = heapq.heappop(self._heap)[2]
+            finished_events = self.running_triggers.get(trigger)
+            if finished_events is not None:
+                if not all(e.is_set() for e in finished_events):
+                    if trigger not in self.waiting_triggers:
+                        log.error('Not firing schedule %r. Tasks from last run have still not finished.' % trigger)
+                        log.error('You may need to increase the interval for this schedule.')
+                        self.waiting_triggers.add(trigger)
+                    heapq.heappush(self._heap, (now + self.retry_delay, next(self._counter), trigger))
+                    continue
+                del self.running_triggers[trigger]
+            options = dict(trigger.options)
+            # If the user has specified all tasks with '*', don't add tasks option at all, so that manual
+            # tasks are not executed
+            if trigger.tasks != ['*']:
+                options['tasks'] = trigger.tasks
+            self.waiting_triggers.discard(trigger)
+            self.running_triggers[trigger] = self.manager.execute(options=options, priority=5)
+            trigger.trigger()
+            self.last_runs.set(hash(trigger), trigger.last_run)
+            heapq.heappush(self._heap, (trigger.timestamp, next(self._counter), trigger))
+        if self._heap:
+            return max(self._heap[0][0] - now, 0)
 
     def run(self):
         log.debug('scheduler started')
+        self.last_runs.load()
         self.load_schedules()
-        while not self._stop.wait(5):
-            # Event.wait returns None on python 2.6, manually check the flag. #2705
-            if self._stop.is_set():
-                break
+        while not self._stop.is_set():
             try:
-                for trigger_id, finished_events in self.running_triggers.items():
-                    if all(e.is_set() for e in finished_events):
-                        del self.running_triggers[trigger_id]
-                self.queue_pending_jobs()
+                with self._condition:
+                    if self._reload:
+                        self._reload = False
+                        self.load_schedules()
+                    timeout = self.queue_pending_jobs()
+                    if self.last_runs.dirty:
+                        flush_in = self.last_runs.flushed + self.flush_interval - time.time()
+                        if flush_in <= 0:
+                            self.last_runs.flush()
+                        elif timeout is None or flush_in < timeout:
+                            timeout = flush_in
+                    if self._stop.is_set() or self._reload:
+                        continue
+                    self._sleep(timeout)
             except Exception:
                 log.exception('BUG: Unhandled error in scheduler thread.')
                 # This is just to prevent spamming if we get in an error loop. Maybe should be different.
                 log.error('Attempting to continue running scheduler thread in one minute.')
-                time.sleep(60)
+                with self._condition:
+                    if not self._stop.is_set():
+                        self._sleep(60)
                 continue
+        try:
+            self.last_runs.flush()
+        except Exception:
+            log.exception('Unable to record last_run of triggers to the database.')
         log.debug('scheduler shut down')
 
 
 class Trigger(object):
-    def __init__(self, interval, tasks, options=None):
+    def __init__(self, interval, tasks, options=None, cron=None, jitter=None):
         """
         :param dict interval: An interval dictionary from the config.
         :param list tasks: List of task names specified to run. Wildcards are allowed.
         :param dict options: Dictionary of options that should be applied to this run.
+        :param string cron: Cron expression, used instead of `interval`.
+        :param jitter: Maximum random delay added to each run, as interval string or :class:`datetime.timedelta`.
         """
         self.tasks = tasks
         self.options = options
@@ -216,15 +353,25 @@ class Trigger(object):
         self.amount = None
         self.on_day = None
         self.at_time = None
+        self.cron = None
         self.last_run = None
         self.run_at = None
-        self.interval = interval
-        self._get_db_last_run()
+        # Random delay added to run_at
+        self.jitter_delay = timedelta()
+        if jitter and not isinstance(jitter, timedelta):
+            jitter = parse_interval(jitter)
+        self.jitter = jitter
+        if cron:
+            self.cron = cron if isinstance(cron, CronExpression) else CronExpression(cron)
+        else:
+            self.interval = interval
         self.schedule_next_run()
 
     # Handles getting and setting interval in form validated by config
     @property
     def interval(self):
+        if not self.unit:
+            return None
         interval = {self.unit: self.amount}
         if self.at_time:
             interval['at_time'] = self.at_time
@@ -238,6 +385,7 @@ class Trigger(object):
             for attr in ['unit', 'amount', 'on_day', 'at_time']:
                 setattr(self, attr, None)
             return
+        interval = dict(interval)
         for unit in UNITS:
             self.amount = interval.pop(unit, None)
             if self.amount:
@@ -255,69 +403,174 @@ class Trigger(object):
         self.schedule_next_run()
 
     def trigger(self):
-        """Call when trigger is activated. Records current run time and schedules next run."""
-        self.last_run = datetime.now()
-        self._set_db_last_run()
+        """
+        Call when trigger is activated. Records current run time and schedules next run. Jitter delay is not included
+        in the run time, so that interval schedules do not drift.
+        """
+        self.last_run = datetime.now() - self.jitter_delay
         self.schedule_next_run()
 
     @property
     def should_run(self):
         return self.run_at and datetime.now() >= self.run_at
 
+    @property
+    def timestamp(self):
+        """Next run time as seconds since the epoch, used to order triggers in the scheduler heap."""
+        return time.mktime(self.run_at.timetuple()) + self.run_at.microsecond / 1000000
+
     @property
     def period(self):
         return timedelta(**{self.unit: self.amount})
 
     def schedule_next_run(self):
-        last_run = self.last_run
-        if not last_run:
-            # Pretend we ran one period ago
-            last_run = datetime.now() - self.period
-        if self.on_day:
-            days_ahead = WEEKDAYS.index(self.on_day) - last_run.weekday()
-            if days_ahead <= 0:  # Target day already happened this week
-                days_ahead += 7
-            self.run_at = last_run + timedelta(days=days_ahead, weeks=self.amount-1)
+        if self.cron:
+            self.run_at = self.cron.next_run(self.last_run or datetime.now())
+        elif self.unit:
+            last_run = self.last_run
+            if not last_run:
+                # Pretend we ran one period ago
+                last_run = datetime.now() - self.period
+            if self.on_day:
+                days_ahead = WEEKDAYS.index(self.on_day) - last_run.weekday()
+                if days_ahead <= 0:  # Target day already happened this week
+                    days_ahead += 7
+                self.run_at = last_run + timedelta(days=days_ahead, weeks=self.amount-1)
+            else:
+                self.run_at = last_run + self.period
+            if self.at_time:
+                self.run_at = self.run_at.replace(hour=self.at_time.hour, minute=self.at_time.minute,
+                                                  second=self.at_time.second)
         else:
-            self.run_at = last_run + self.period
-        if self.at_time:
-            self.run_at = self.run_at.replace(hour=self.at_time.hour, minute=self.at_time.minute,
-                                              second=self.at_time.second)
-
-    def _get_db_last_run(self):
-        session = Session()
-        try:
-            db_trigger = session.query(DBTrigger).get(hash(self))
-            if db_trigger:
-                self.last_run = db_trigger.last_run
-                log.debug('loaded last_run from the database')
-        finally:
-            session.close()
-
-    def _set_db_last_run(self):
-        session = Session()
-        try:
-            db_trigger = session.query(DBTrigger).get(hash(self))
-            if not db_trigger:
-                db_trigger = DBTrigger(hash(self))
-                session.add(db_trigger)
-            db_trigger.last_run = self.last_run
-            session.commit()
-        finally:
-            session.close()
-        log.debug('recorded last_run to the database')
+            return
+        self.jitter_delay = timedelta()
+        if self.jitter:
+            # Spread out triggers which would otherwise fire at the same moment
+            self.jitter_delay = timedelta(seconds=random.uniform(0, self.jitter.total_seconds()))
+            self.run_at += self.jitter_delay
 
     def __hash__(self):
         """A unique id which describes this trigger."""
+        if self.cron:
+            return hash(('cron', self.cron.expression) + tuple(sorted(self.tasks)))
         return hash(tuple(sorted(self.interval.iteritems())) + tuple(sorted(self.tasks)))
 
     def __eq__(self, other):
-        return (self.interval, self.tasks) == (other.interval, other.tasks)
+        return (self.interval, self.cron, self.tasks) == (other.interval, other.cron, other.tasks)
 
     def __repr__(self):
+        if self.cron:
+            return 'Trigger(tasks=%r, cron=%r)' % (self.tasks, self.cron.expression)
         return 'Trigger(tasks=%r, amount=%r, unit=%r)' % (self.tasks, self.amount, self.unit)
 
 
+class CronExpression(object):
+    """
+    Standard five field cron expression: minute, hour, day of month, month and day of week.
+
+    Fields may contain ``*``, numbers, ranges ``1-5``, steps ``*/15`` or ``1-30/2`` and comma separated lists of those.
+    Months and days of week may also be given as three letter names. When both day of month and day of week are
+    restricted, either of them matching is enough, like in cron. The shortcuts ``@hourly``, ``@daily``, ``@weekly``,
+    ``@monthly`` and ``@yearly`` are also accepted.
+    """
+
+    fields = [('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7)]
+    names = {
+        'month': ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'],
+        'weekday': ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+    }
+    shortcuts = {
+        '@hourly': '0 * * * *',
+        '@daily': '0 0 * * *',
+        '@midnight': '0 0 * * *',
+        '@weekly': '0 0 * * 0',
+        '@monthly': '0 0 1 * *',
+        '@yearly': '0 0 1 1 *',
+        '@annually': '0 0 1 1 *'
+    }
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        parts = self.shortcuts.get(self.expression.lower(), self.expression).split()
+        if len(parts) != len(self.fields):
+            raise ValueError('Cron expression `%s` must have %s fields' % (expression, len(self.fields)))
+        for (name, low, high), part in zip(self.fields, parts):
+            setattr(self, name, self._parse_field(name, part.lower(), low, high))
+        if 7 in self.weekday:
+            self.weekday = (self.weekday - set([7])) | set([0])
+        # Like in cron, day fields starting with * (eg. */2) do not restrict days when combined with the other
+        self.any_day = parts[2].startswith('*')
+        self.any_weekday = parts[4].startswith('*')
+
+    def _parse_value(self, name, value):
+        if name in self.names and value in self.names[name]:
+            return self.names[name].index(value) + (1 if name == 'month' else 0)
+        return int(value)
+
+    def _parse_field(self, name, field, low, high):
+        values = set()
+        for item in field.split(','):
+            item, stepped, step = item.partition('/')
+            try:
+                step = int(step) if step else 1
+                if item == '*':
+                    start, end = low, high
+                elif '-' in item:
+                    start, end = [self._parse_value(name, v) for v in item.split('-', 1)]
+                else:
+                    start = self._parse_value(name, item)
+                    end = high if stepped else start
+            except ValueError:
+                raise ValueError('Invalid %s `%s` in cron expression `%s`' % (name, item, self.expression))
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError('Invalid %s `%s` in cron expression `%s`' % (name, item, self.expression))
+            values.update(xrange(start, end + 1, step))
+        return values
+
+    def _day_matches(self, date):
+        weekday = (date.weekday() + 1) % 7
+        if self.any_day or self.any_weekday:
+            return date.day in self.day and weekday in self.weekday
+        return date.day in self.day or weekday in self.weekday
+
+    def next_run(self, after):
+        """Returns the first time matching the expression strictly after datetime `after`."""
+        run = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Four years covers every valid day of month, including February 29
+        limit = run + timedelta(days=4 * 366)
+        while run <= limit:
+            if run.month not in self.month:
+                if run.month == 12:
+                    run = run.replace(year=run.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    run = run.replace(month=run.month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(run):
+                run = (run + timedelta(days=1)).replace(hour=0, minute=0)
+            elif run.hour not in self.hour:
+                run = (run + timedelta(hours=1)).replace(minute=0)
+            elif run.minute not in self.minute:
+                run += timedelta(minutes=1)
+            else:
+                return run
+        raise ValueError('Cron expression `%s` never matches' % self.expression)
+
+    def __eq__(self, other):
+        return isinstance(other, CronExpression) and self.expression == other.expression
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'CronExpression(%r)' % self.expression
+
+
+@format_checker.checks('cron', raises=ValueError)
+def is_cron(instance):
+    if not isinstance(instance, basestring):
+        return True
+    return CronExpression(instance)
+
+
 @event('config.register')
 def register_config():
     register_config_key('schedules', main_schema)
@@ -54,4 +54,4 @@ class FilterAllSeries(FilterSeriesBase):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterAllSeries, 'all_series', api_ver=2)
+    plugin.register(FilterAllSeries, 'all_series', api_ver=2, locks=['series'])
@@ -1,11 +1,59 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
+from datetime import date, datetime, timedelta
 
 from flexget import plugin
 from flexget.event import event
 
 log = logging.getLogger('crossmatch')
 
+MISSING = object()
+
+# Field values of these types are indexed by hash, since equal values of them also have equal hashes
+INDEXED_TYPES = (unicode, str, int, long, float, bool, type(None), datetime, date, timedelta)
+
+
+class MatchIndex(object):
+    """
+    Index of entries by their field values. Finds the entries which may have a common field value with an entry
+    without comparing it to all of them.
+    """
+
+    def __init__(self, entries, fields):
+        self.entries = entries
+        self.fields = fields
+        # Positions of the entries for each field and value
+        self.index = dict((field, {}) for field in fields)
+        # Positions of entries with values that can not be indexed, these are always compared
+        self.unindexed = dict((field, []) for field in fields)
+        for position, entry in enumerate(entries):
+            for field in fields:
+                value = entry.get(field, MISSING)
+                if value is MISSING:
+                    continue
+                if type(value) in INDEXED_TYPES:
+                    self.index[field].setdefault(value, []).append(position)
+                else:
+                    self.unindexed[field].append(position)
+
+    def candidates(self, entry):
+        """
+        :param entry: :class:`flexget.entry.Entry` to match
+        :return: List of indexed entries which may intersect with `entry`, in their original order
+        """
+        positions = set()
+        for field in self.fields:
+            value = entry.get(field, MISSING)
+            if value is MISSING:
+                continue
+            if type(value) in INDEXED_TYPES:
+                positions.update(self.index[field].get(value, ()))
+                positions.update(self.unindexed[field])
+            else:
+                # Value could be equal to anything
+                return self.entries
+        return [self.entries[position] for position in sorted(positions)]
+
 
 class CrossMatch(object):
     """
@@ -37,32 +85,32 @@ class CrossMatch(object):
         fields = config['fields']
         action = config['action']
 
-        match_entries = []
-
-        # TODO: xxx
-        # we probably want to have common "run and combine inputs" function sometime soon .. this code is in
-        # few places already (discover, inputs, ...)
-        # code written so that this can be done easily ...
+        inputs = []
         for item in config['from']:
             for input_name, input_config in item.iteritems():
                 input = plugin.get_plugin_by_name(input_name)
                 if input.api_ver == 1:
                     raise plugin.PluginError('Plugin %s does not support API v2' % input_name)
-                method = input.phase_handlers['input']
-                try:
-                    result = method(task, input_config)
-                except plugin.PluginError as e:
-                    log.warning('Error during input plugin %s: %s' % (input_name, e))
-                    continue
-                if result:
-                    match_entries.extend(result)
-                else:
-                    log.warning('Input %s did not return anything' % input_name)
-                    continue
+                inputs.append({input_name: input_config})
+
+        def run_input(item):
+            try:
+                return self.get_input_entries(task, item)
+            except plugin.PluginError as e:
+                log.warning('Error during input plugin %s: %s' % (item.keys()[0], e))
+
+        # Inputs may be ran in parallel (see parallel_inputs), results are still merged in configured order
+        match_entries = []
+        for item, result in zip(inputs, task.run_parallel(run_input, inputs)):
+            if result:
+                match_entries.extend(result)
+            else:
+                log.warning('Input %s did not return anything' % item.keys()[0])
 
         # perform action on intersecting entries
+        index = MatchIndex(match_entries, fields)
         for entry in task.entries:
-            for generated_entry in match_entries:
+            for generated_entry in index.candidates(entry):
                 log.trace('checking if %s matches %s' % (entry['title'], generated_entry['title']))
                 common = self.entry_intersects(entry, generated_entry, fields)
                 if common:
@@ -73,6 +121,16 @@ class CrossMatch(object):
                     if action == 'accept':
                         entry.accept(msg)
 
+    def get_input_entries(self, task, item):
+        """
+        Runs input plugin configured in `item` (dict with input name as key and it's config as value).
+        Inputs which cache their results (eg. rss) do so here as well, others (eg. listdir) are always ran.
+        """
+        input_name, input_config = item.items()[0]
+        method = plugin.get_plugin_by_name(input_name).phase_handlers['input']
+        result = method(task, input_config)
+        return list(result) if result else []
+
     def entry_intersects(self, e1, e2, fields=None):
         """
         :param e1: First :class:`flexget.entry.Entry`
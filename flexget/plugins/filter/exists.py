@@ -7,6 +7,7 @@ from path import path
 from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
+from flexget.utils.fsindex import scan
 
 log = logging.getLogger('exists')
 
@@ -41,7 +42,8 @@ class FilterExists(object):
             folder = path(folder).expanduser()
             if not folder.exists():
                 raise plugin.PluginWarning('Path %s does not exist' % folder, log)
-            for p in folder.walk(errors='warn'):
+            for item in scan(task.session, folder):
+                p = item.path
                 key = p.name
                 # windows file system is not case sensitive
                 if platform.system() == 'Windows':
@@ -58,4 +60,4 @@ class FilterExists(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterExists, 'exists', api_ver=2)
+    plugin.register(FilterExists, 'exists', api_ver=2, locks=['fsindex'])
@@ -8,6 +8,7 @@ from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
 from flexget.plugin import get_plugin_by_name
+from flexget.utils.fsindex import scan
 from flexget.utils.tools import TimedDict
 
 log = logging.getLogger('exists_movie')
@@ -76,7 +77,7 @@ class FilterExistsMovie(object):
             # scan through
 
             # TODO: add also video files?
-            for item in folder.walkdirs(errors='warn'):
+            for item in (info.path for info in scan(task.session, folder) if info.isdir):
                 if item.name.lower() in self.skip:
                     continue
                 count_dirs += 1
@@ -127,4 +128,4 @@ class FilterExistsMovie(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterExistsMovie, 'exists_movie', groups=['exists'], api_ver=2)
+    plugin.register(FilterExistsMovie, 'exists_movie', groups=['exists'], api_ver=2, locks=['fsindex'])
@@ -7,6 +7,7 @@ from path import path
 from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
+from flexget.utils.fsindex import scan
 from flexget.utils.log import log_once
 from flexget.utils.template import RenderError
 from flexget.plugins.parsers import ParseWarning
@@ -71,18 +72,22 @@ class FilterExistsSeries(object):
             log.warning('No accepted entries have series information. exists_series cannot filter them')
             return
 
+        # List the paths once for all series
+        folders = []
+        for folder in paths:
+            folder = path(folder).expanduser()
+            if not folder.isdir():
+                log.warning('Directory %s does not exist', folder)
+                continue
+            folders.append([item.path for item in scan(task.session, folder)])
+
         # scan through
         # For speed, only test accepted entries since our priority should be after everything is accepted.
         for series in accepted_series:
             # make new parser from parser in entry
             series_parser = accepted_series[series][0]['series_parser']
-            for folder in paths:
-                folder = path(folder).expanduser()
-                if not folder.isdir():
-                    log.warning('Directory %s does not exist', folder)
-                    continue
-
-                for filename in folder.walk(errors='warn'):
+            for filenames in folders:
+                for filename in filenames:
                     # run parser on filename data
                     try:
                         disk_parser = get_plugin_by_name('parsing').instance.parse_series(data=filename.name, name=series_parser.name)
@@ -119,4 +124,4 @@ class FilterExistsSeries(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterExistsSeries, 'exists_series', groups=['exists'], api_ver=2)
+    plugin.register(FilterExistsSeries, 'exists_series', groups=['exists'], api_ver=2, locks=['fsindex'])
@@ -3,24 +3,81 @@ import __builtin__
 import logging
 import re
 import datetime
-from copy import copy
+import weakref
 
 from flexget import plugin
 from flexget.event import event
 from flexget.task import Task
 from flexget.entry import Entry
+from flexget.utils.tools import LRUCache
 
 log = logging.getLogger('if')
 
 
-def safer_eval(statement, locals):
-    """A safer eval function. Does not allow __ or try statements, only includes certain 'safe' builtins."""
-    allowed_builtins = ['True', 'False', 'str', 'unicode', 'int', 'float', 'len', 'any', 'all', 'sorted']
-    for name in allowed_builtins:
-        locals[name] = getattr(__builtin__, name)
+# Builtins available in conditions
+ALLOWED_BUILTINS = dict((name, getattr(__builtin__, name)) for name in
+                        ['True', 'False', 'str', 'unicode', 'int', 'float', 'len', 'any', 'all', 'sorted'])
+
+_compiled = LRUCache(max_weight=1000, cache_time=None)
+
+
+def compile_condition(statement):
+    """
+    Checks the statement does not contain forbidden constructs and compiles it. Compiled statements are cached.
+
+    :raises ValueError: If statement is not allowed.
+    :raises SyntaxError: If statement is not a valid expression.
+    """
+    try:
+        return _compiled[statement]
+    except KeyError:
+        pass
     if re.search(r'__|try\s*:|lambda', statement):
         raise ValueError('`__`, lambda or try blocks not allowed in if statements.')
-    return eval(statement, {'__builtins__': None}, locals)
+    code = _compiled[statement] = compile(statement, '<if>', 'eval')
+    return code
+
+
+def safer_eval(statement, locals):
+    """A safer eval function. Does not allow __ or try statements, only includes certain 'safe' builtins."""
+    locals.update(ALLOWED_BUILTINS)
+    return eval(compile_condition(statement), {'__builtins__': None}, locals)
+
+
+class EntryNamespace(object):
+    """
+    Eval namespace of a condition. Names are looked up from `names` and then from the entry, without copying it.
+    Lazy fields of the entry are evaluated when the condition uses them.
+    """
+
+    def __init__(self, entry, names):
+        self.entry = entry
+        self.names = names
+
+    def __getitem__(self, key):
+        if key in self.names:
+            return self.names[key]
+        return self.entry[key]
+
+
+class Condition(object):
+    """A condition of the plugin config, compiled once for the task."""
+
+    def __init__(self, task, requirement, action):
+        self.requirement = requirement
+        self.action = action
+        self.code = None
+        self.error = None
+        try:
+            self.code = compile_condition(requirement)
+        except (ValueError, SyntaxError) as e:
+            self.error = e
+        # Task to run plugins of the action with, the entries are swapped in for each phase
+        self.fake_task = None
+        if not isinstance(action, basestring):
+            self.fake_task = Task(task.manager, task.name, config=action, options=task.options)
+            self.plugins = [(plugin.get_plugin_by_name(plugin_name), plugin_config)
+                            for plugin_name, plugin_config in action.iteritems()]
 
 
 class FilterIf(object):
@@ -41,26 +98,42 @@ class FilterIf(object):
         }
     }
 
-    def check_condition(self, condition, entry):
+    def __init__(self):
+        # Compiled conditions for each running task
+        self.conditions = weakref.WeakKeyDictionary()
+
+    def check_condition(self, condition, entry, now=None):
         """Checks if a given `entry` passes `condition`"""
+        if not isinstance(condition, Condition):
+            condition = Condition(None, condition, 'accept')
+        if condition.error:
+            log.error('Error occured while evaluating statement `%s`. (%s)' % (condition.requirement, condition.error))
+            return
         # Make entry fields and other utilities available in the eval namespace
-        # We need our namespace to be an Entry instance for lazy loading to work
-        eval_locals = copy(entry)
-        eval_locals.update({'has_field': lambda f: f in entry,
-                            'timedelta': datetime.timedelta,
-                            'now': datetime.datetime.now()})
+        names = {'has_field': lambda f: f in entry,
+                 'timedelta': datetime.timedelta,
+                 'now': now or datetime.datetime.now()}
+        names.update(ALLOWED_BUILTINS)
         try:
-            # Restrict eval namespace to have no globals and locals only from eval_locals
-            passed = safer_eval(condition, eval_locals)
+            # Restrict eval namespace to have no globals and locals only from the entry and names
+            passed = eval(condition.code, {'__builtins__': None}, EntryNamespace(entry, names))
             if passed:
-                log.debug('%s matched requirement %s' % (entry['title'], condition))
+                log.debug('%s matched requirement %s' % (entry['title'], condition.requirement))
             return passed
         except NameError as e:
             # Extract the name that did not exist
             missing_field = e.args[0].split('\'')[1]
             log.debug('%s does not contain the field %s' % (entry['title'], missing_field))
         except Exception as e:
-            log.error('Error occured while evaluating statement `%s`. (%s)' % (condition, e))
+            log.error('Error occured while evaluating statement `%s`. (%s)' % (condition.requirement, e))
+
+    def get_conditions(self, task, config):
+        conditions = self.conditions.get(task)
+        # Config is a copy in every phase, compiled again only if it was changed
+        if conditions is None or conditions[0] != config:
+            conditions = (config, [Condition(task, *item.items()[0]) for item in config])
+            self.conditions[task] = conditions
+        return conditions[1]
 
     def __getattr__(self, item):
         """Provides handlers for all phases."""
@@ -75,31 +148,31 @@ class FilterIf(object):
                 'accept': Entry.accept,
                 'reject': Entry.reject,
                 'fail': Entry.fail}
-            for item in config:
-                requirement, action = item.items()[0]
-                passed_entries = [e for e in task.entries if self.check_condition(requirement, e)]
-                if isinstance(action, basestring):
+            now = datetime.datetime.now()
+            for condition in self.get_conditions(task, config):
+                if condition.fake_task is None:
                     if not phase == 'filter':
                         continue
                     # Simple entry action (accept, reject or fail) was specified as a string
-                    for entry in passed_entries:
-                        entry_actions[action](entry, 'Matched requirement: %s' % requirement)
+                    for entry in task.entries:
+                        if self.check_condition(condition, entry, now):
+                            entry_actions[condition.action](entry, 'Matched requirement: %s' % condition.requirement)
                 else:
                     # Other plugins were specified to run on this entry
-                    fake_task = Task(task.manager, task.name, config=action, options=task.options)
-                    fake_task.session = task.session
-                    # This entry still belongs to our feed, accept/reject etc. will carry through.
-                    fake_task.all_entries[:] = passed_entries
-
                     methods = {}
-                    for plugin_name, plugin_config in action.iteritems():
-                        p = plugin.get_plugin_by_name(plugin_name)
+                    for p, plugin_config in condition.plugins:
                         method = p.phase_handlers.get(phase)
                         if method:
-                            methods[method] = (fake_task, plugin_config)
+                            methods[method] = plugin_config
+                    if not methods:
+                        continue
+                    fake_task = condition.fake_task
+                    fake_task.session = task.session
+                    # This entry still belongs to our feed, accept/reject etc. will carry through.
+                    fake_task.all_entries[:] = [e for e in task.entries if self.check_condition(condition, e, now)]
                     # Run the methods in priority order
                     for method in sorted(methods, reverse=True):
-                        method(*methods[method])
+                        method(fake_task, methods[method])
 
         handle_phase.priority = 80
         return handle_phase
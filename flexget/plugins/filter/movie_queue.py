@@ -304,4 +304,4 @@ def queue_get(session=None, downloaded=False):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterMovieQueue, 'movie_queue', api_ver=2)
+    plugin.register(FilterMovieQueue, 'movie_queue', api_ver=2, locks=['movie_queue'])
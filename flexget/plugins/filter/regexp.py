@@ -10,6 +10,8 @@ from flexget.event import event
 
 log = logging.getLogger('regexp')
 
+DEFAULT_FIELDS = ['title', 'description']
+
 
 class FilterRegexp(object):
 
@@ -164,26 +166,17 @@ class FilterRegexp(object):
         :param not_regexps: None or list of regexps that can NOT match
         :return: Field matching
         """
-        unquote = ['url']
-        for field in find_from or ['title', 'description']:
-            # Only evaluate lazy fields if find_from has been explicitly specified
-            if not entry.get(field, eval_lazy=find_from):
-                continue
-            # Make all fields into lists for search purposes
-            values = entry[field]
-            if not isinstance(values, list):
-                values = [values]
-            for value in values:
-                if not isinstance(value, basestring):
-                    continue
-                if field in unquote:
-                    value = urllib.unquote(value)
-                    # If none of the not_regexps match
+        return self.match_field(EntryValues(entry), regexp, find_from, not_regexps)
+
+    def match_field(self, values, regexp, find_from=None, not_regexps=None):
+        """Same as :meth:`matches`, but searches from :class:`EntryValues` of the entry."""
+        for field in find_from or DEFAULT_FIELDS:
+            for value in values.get(field, find_from):
                 if regexp.search(value):
                     # Make sure the not_regexps do not match for this field
                     for not_regexp in not_regexps or []:
-                        if self.matches(entry, not_regexp, find_from=[field]):
-                            entry.trace('Configured not_regexp %s matched, ignored' % not_regexp)
+                        if any(not_regexp.search(not_value) for not_value in values.get(field, [field])):
+                            values.entry.trace('Configured not_regexp %s matched, ignored' % not_regexp)
                             break
                     else:  # None of the not_regexps matched
                         return field
@@ -200,37 +193,152 @@ class FilterRegexp(object):
         rest = []
         method = Entry.accept if 'accept' in operation else Entry.reject
         match_mode = 'excluding' not in operation
+        regexps = [regexp_opts.items()[0] for regexp_opts in regexps]
+        if match_mode:
+            regexp_list = RegexpList([(regexp, opts.get('from')) for regexp, opts in regexps])
         for entry in task.entries:
             log.trace('testing %i regexps to %s' % (len(regexps), entry['title']))
-            for regexp_opts in regexps:
-                regexp, opts = regexp_opts.items()[0]
-
-                # check if entry matches given regexp configuration
-                field = self.matches(entry, regexp, opts.get('from'), opts.get('not'))
-
-                # Run if we are in match mode and have a hit, or are in non-match mode and don't have a hit
-                if match_mode == bool(field):
-                    # Creates the string with the reason for the hit
-                    matchtext = 'regexp \'%s\' ' % regexp.pattern + ('matched field \'%s\'' %
-                                                                     field if match_mode else 'didn\'t match')
-                    log.debug('%s for %s' % (matchtext, entry['title']))
-                    # apply settings to entry and run the method on it
-                    if opts.get('path'):
-                        entry['path'] = opts['path']
-                    if opts.get('set'):
-                        # invoke set plugin with given configuration
-                        log.debug('adding set: info to entry:"%s" %s' % (entry['title'], opts['set']))
-                        set = plugin.get_plugin_by_name('set')
-                        set.instance.modify(entry, opts['set'])
-                    method(entry, matchtext)
-                    # We had a match so break out of the regexp loop.
-                    break
+            values = EntryValues(entry)
+            if match_mode:
+                # Let combined regexps find the candidates, only those need to be checked against `not` regexps
+                index = regexp_list.first_match(values)
+                while index is not None:
+                    regexp, opts = regexps[index]
+                    field = self.match_field(values, regexp, opts.get('from'), opts.get('not'))
+                    if field:
+                        self.apply(entry, method, regexp, opts, 'matched field \'%s\'' % field)
+                        break
+                    index = regexp_list.first_match(values, index + 1)
+                else:
+                    index = None
             else:
+                for index, (regexp, opts) in enumerate(regexps):
+                    if not self.match_field(values, regexp, opts.get('from'), opts.get('not')):
+                        self.apply(entry, method, regexp, opts, 'didn\'t match')
+                        break
+                else:
+                    index = None
+            if index is None:
                 # We didn't run method for any of the regexps, add this entry to rest
                 entry.trace('None of configured %s regexps matched' % operation)
                 rest.append(entry)
         return rest
 
+    def apply(self, entry, method, regexp, opts, result):
+        # Creates the string with the reason for the hit
+        matchtext = 'regexp \'%s\' %s' % (regexp.pattern, result)
+        log.debug('%s for %s' % (matchtext, entry['title']))
+        # apply settings to entry and run the method on it
+        if opts.get('path'):
+            entry['path'] = opts['path']
+        if opts.get('set'):
+            # invoke set plugin with given configuration
+            log.debug('adding set: info to entry:"%s" %s' % (entry['title'], opts['set']))
+            set = plugin.get_plugin_by_name('set')
+            set.instance.modify(entry, opts['set'])
+        method(entry, matchtext)
+
+
+class EntryValues(object):
+    """String values of entry fields to search from, read and normalized only once per entry."""
+
+    unquote = ['url']
+
+    def __init__(self, entry):
+        self.entry = entry
+        self._values = {}
+
+    def get(self, field, eval_lazy=None):
+        """
+        :param eval_lazy: Lazy fields are only evaluated if this is true
+        :return: List of string values of the field
+        """
+        key = (field, bool(eval_lazy))
+        if key not in self._values:
+            values = []
+            if self.entry.get(field, eval_lazy=eval_lazy):
+                # Make all fields into lists for search purposes
+                values = self.entry[field]
+                if not isinstance(values, list):
+                    values = [values]
+                values = [urllib.unquote(value) if field in self.unquote else value
+                          for value in values if isinstance(value, basestring)]
+            self._values[key] = values
+        return self._values[key]
+
+
+class RegexpList(object):
+    """
+    Finds the first regexp of a list which matches an entry.
+
+    Consecutive regexps searching from the same fields are combined into alternations of named groups, so one search
+    tests many of them. At any position the alternation matches the first of its regexps that matches there, so the
+    lowest index found over all match positions is the first regexp matching anywhere.
+    """
+
+    # Python 2 re module supports at most 100 groups in a regexp
+    max_groups = 99
+    # Backreferences, named groups and inline flags would change meaning in a combined regexp
+    uncombinable = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?[iLmsux]+\)')
+
+    def __init__(self, regexps):
+        """
+        :param regexps: List of (compiled regexp, list of fields or None) tuples
+        """
+        self.regexps = [regexp for regexp, fields in regexps]
+        # List of (start index, end index, fields, combined regexp or None)
+        self.chunks = []
+        start = 0
+        while start < len(regexps):
+            fields = regexps[start][1]
+            end = start
+            groups = 0
+            while end < len(regexps) and regexps[end][1] == fields:
+                regexp = regexps[end][0]
+                if self.uncombinable.search(regexp.pattern) or groups + regexp.groups + 1 > self.max_groups:
+                    break
+                groups += regexp.groups + 1
+                end += 1
+            combined = None
+            if end - start > 1:
+                try:
+                    combined = re.compile('|'.join('(?P<r%d>%s)' % (index, self.regexps[index].pattern)
+                                                   for index in xrange(start, end)), re.IGNORECASE | re.UNICODE)
+                except (re.error, OverflowError, AssertionError) as e:
+                    log.debug('unable to combine regexps, testing them one by one: %s' % e)
+            end = max(end, start + 1)
+            self.chunks.append((start, end, fields, combined))
+            start = end
+
+    def first_match(self, values, start=0):
+        """
+        :param EntryValues values: Values of the entry
+        :param int start: Index of the first regexp to test
+        :return: Index of the first regexp at or after `start` which matches any of its fields, or None
+        """
+        for begin, end, fields, combined in self.chunks:
+            if end <= start:
+                continue
+            field_values = [value for field in fields or DEFAULT_FIELDS for value in values.get(field, fields)]
+            if combined is None or start > begin:
+                for index in xrange(max(begin, start), end):
+                    if any(self.regexps[index].search(value) for value in field_values):
+                        return index
+                continue
+            best = None
+            for value in field_values:
+                match = combined.search(value)
+                while match:
+                    index = int(match.lastgroup[1:])
+                    if best is None or index < best:
+                        if index == begin:
+                            return index
+                        best = index
+                    match = combined.search(value, match.start() + 1)
+            if best is not None:
+                return best
+
+
 @event('plugin.register')
 def register_plugin():
     plugin.register(FilterRegexp, 'regexp', api_ver=2)
@@ -11,17 +11,20 @@ forget (string)
 from __future__ import unicode_literals, division, absolute_import
 import contextlib
 import logging
+import threading
 from datetime import datetime, timedelta
 
-from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, Index
+from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, Index, func
 from sqlalchemy.orm import relation
 from sqlalchemy.schema import ForeignKey
 
 from flexget import db_schema, options, plugin
+from flexget.config_schema import register_config_key
 from flexget.event import event
 from flexget.manager import Session
+from flexget.utils.bloom import BloomFilter
 from flexget.utils.imdb import is_imdb_url, extract_id
-from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
+from flexget.utils.sqlalchemy_utils import table_schema, table_add_column, chunked
 from flexget.utils.tools import console
 
 log = logging.getLogger('seen')
@@ -99,6 +102,149 @@ class SeenField(Base):
         return '<SeenField(field=%s,value=%s,added=%s)>' % (self.field, self.value, self.added)
 
 
+class SeenCache(object):
+    """
+    Process wide bloom filter over all :attr:`SeenField.value`, used to skip the database for values which have
+    certainly never been seen. Positive answers still need to be checked from the database.
+
+    The filter is built lazily from the table and synced with fields added since the last sync (by id) on every use,
+    so additions made by other processes are not missed. It is persisted to a sidecar file next to the database so
+    that a cold start does not need a full table scan.
+    """
+
+    min_capacity = 100000
+
+    def __init__(self):
+        self.bloom = None
+        self.last_id = 0
+        self.last_value = None
+        self.forgotten = 0
+        self.path = None
+        self.lock = threading.RLock()
+        # values answered without querying the database
+        self.skipped = 0
+        # possible hits confirmed by the database
+        self.hits = 0
+        # possible hits which were not in the database
+        self.false_positives = 0
+        # times the filter was built from the whole table
+        self.rebuilds = 0
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+            self.last_id = 0
+            self.last_value = None
+            self.forgotten = 0
+
+    def _rebuild(self, session):
+        rows = session.query(func.count(SeenField.id)).scalar() or 0
+        log.verbose('Building seen cache from %s seen fields' % rows)
+        self.rebuilds += 1
+        self.bloom = BloomFilter(max(rows * 2, self.min_capacity))
+        self.last_id = 0
+        self.last_value = None
+        self.forgotten = 0
+        self._add_new(session)
+        self.save()
+
+    def _add_new(self, session):
+        """Adds fields added to the database since last sync to the filter."""
+        query = session.query(SeenField.id, SeenField.value).filter(SeenField.id > self.last_id)
+        for field_id, value in query.order_by(SeenField.id).yield_per(10000):
+            self.bloom.add(value)
+            self.last_id, self.last_value = field_id, value
+
+    def _is_consistent(self, session):
+        """Check that the database still contains the last field synced, ie. it has not been replaced."""
+        if not self.last_id:
+            return True
+        value = session.query(SeenField.value).filter(SeenField.id == self.last_id).scalar()
+        return value == self.last_value
+
+    def sync(self, session, path=None):
+        """Makes sure filter is loaded and contains all values from the database."""
+        with self.lock:
+            if path != self.path:
+                self.reset()
+                self.path = path
+            if self.bloom is None and self.path:
+                self.bloom, extra = BloomFilter.load(self.path)
+                if self.bloom:
+                    self.last_id, self.last_value = extra['last_id'], extra['last_value']
+                    self.forgotten = extra.get('forgotten', 0)
+                    log.debug('Loaded seen cache from %s' % self.path)
+            if self.bloom is None or self.bloom.full or self.forgotten > len(self.bloom) // 4 or \
+                    not self._is_consistent(session):
+                self._rebuild(session)
+            else:
+                self._add_new(session)
+
+    def forget(self, session, fields):
+        """
+        Forgotten values can not be removed from the filter, they are counted to know when to rebuild it.
+
+        :param session: Session the `fields` are deleted in
+        :param fields: :class:`SeenField` instances being deleted
+        """
+        ids = [field.id for field in fields]
+        with self.lock:
+            self.forgotten += len(ids)
+            if self.bloom is None or self.last_id not in ids:
+                return
+            # Last synced field is removed, and its id may be used again. Sync from the field before the removed ones,
+            # rows which are still there are added again (harmless), instead of rebuilding the whole filter.
+            self.last_id, self.last_value = (session.query(SeenField.id, SeenField.value).
+                                             filter(SeenField.id < min(ids)).order_by(SeenField.id.desc()).first() or
+                                             (0, None))
+
+    def filter(self, values):
+        """Returns those of `values` which may have been seen. :meth:`sync` must be called first."""
+        with self.lock:
+            maybe = set(value for value in values if value in self.bloom)
+            self.skipped += len(values) - len(maybe)
+            return maybe
+
+    def record(self, queried, found):
+        """Update hit and false positive counters after querying `queried` values of which `found` were seen."""
+        with self.lock:
+            self.hits += found
+            self.false_positives += queried - found
+
+    def save(self):
+        with self.lock:
+            if not self.path or self.bloom is None:
+                return
+            try:
+                self.bloom.save(self.path, last_id=self.last_id, last_value=self.last_value,
+                                forgotten=self.forgotten)
+            except (IOError, OSError) as e:
+                log.warning('Unable to save seen cache to %s: %s' % (self.path, e))
+
+    def stats(self):
+        return {'skipped': self.skipped, 'hits': self.hits, 'false_positives': self.false_positives,
+                'values': len(self.bloom) if self.bloom is not None else 0, 'forgotten': self.forgotten,
+                'rebuilds': self.rebuilds}
+
+
+seen_cache = SeenCache()
+
+
+def seen_cache_enabled(manager):
+    """Seen cache is enabled with root level `seen_cache` config, by default only when running as daemon."""
+    return manager.config.get('seen_cache', manager.is_daemon)
+
+
+def seen_cache_path(manager):
+    if manager.db_filename:
+        return manager.db_filename + '.seen-cache'
+
+
+@event('manager.shutdown')
+def save_seen_cache(manager):
+    seen_cache.save()
+
+
 @event('forget')
 def forget(value):
     """
@@ -111,20 +257,21 @@ def forget(value):
 
     try:
         count = 0
-        field_count = 0
+        fields = []
         for se in session.query(SeenEntry).filter(or_(SeenEntry.title == value, SeenEntry.task == value)).all():
-            field_count += len(se.fields)
+            fields.extend(se.fields)
             count += 1
             log.debug('forgetting %s' % se)
             session.delete(se)
 
         for sf in session.query(SeenField).filter(SeenField.value == value).all():
             se = session.query(SeenEntry).filter(SeenEntry.id == sf.seen_entry_id).first()
-            field_count += len(se.fields)
+            fields.extend(se.fields)
             count += 1
             log.debug('forgetting %s' % se)
             session.delete(se)
-        return count, field_count
+        seen_cache.forget(session, fields)
+        return count, len(fields)
     finally:
         session.commit()
         session.close()
@@ -162,8 +309,10 @@ class FilterSeen(object):
         fields = self.fields
         local = config == 'local'
 
+        # construct list of values looked for each entry
+        entry_values = []
+        all_values = set()
         for entry in task.entries:
-            # construct list of values looked
             values = []
             for field in fields:
                 if field not in entry:
@@ -171,20 +320,51 @@ class FilterSeen(object):
                 if entry[field] not in values and entry[field]:
                     values.append(unicode(entry[field]))
             if values:
-                log.trace('querying for: %s' % ', '.join(values))
-                # check if SeenField.value is any of the values
-                found = task.session.query(SeenField).join(SeenEntry).filter(SeenField.value.in_(values))
-                if local:
-                    found = found.filter(SeenEntry.task == task.name)
-                else:
-                    found = found.filter(SeenEntry.local == False)
-                found = found.first()
-                if found:
-                    log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], found.value))
-                    se = task.session.query(SeenEntry).filter(SeenEntry.id == found.seen_entry_id).one()
-                    entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
-                                 (found.field, found.value, se.task, se.added.strftime('%Y-%m-%d %H:%M')),
-                                 remember=remember_rejected)
+                entry_values.append((entry, values))
+                all_values.update(values)
+        if not entry_values:
+            return
+
+        if seen_cache_enabled(task.manager):
+            seen_cache.sync(task.session, seen_cache_path(task.manager))
+            queried = seen_cache.filter(all_values)
+            found = self.find_seen(task, queried, local)
+            seen_cache.record(len(queried), len(found))
+            log.debug('seen cache: %s' % seen_cache.stats())
+        else:
+            found = self.find_seen(task, all_values, local)
+        for entry, values in entry_values:
+            for value in values:
+                if value not in found:
+                    continue
+                seen_field, seen_entry = found[value]
+                log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], value))
+                entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
+                             (seen_field.field, seen_field.value, seen_entry.task,
+                              seen_entry.added.strftime('%Y-%m-%d %H:%M')),
+                             remember=remember_rejected)
+                break
+
+    def find_seen(self, task, values, local=False):
+        """
+        Looks up seen fields for all `values` with a few chunked queries.
+
+        :param task: Task whose session and name are used
+        :param values: Field values to look for
+        :param bool local: Only look for values seen in this task
+        :return: Dict from value to the oldest matching (SeenField, SeenEntry) pair
+        """
+        found = {}
+        for chunk in chunked(values):
+            log.trace('querying for: %s' % ', '.join(chunk))
+            query = task.session.query(SeenField, SeenEntry).join(SeenEntry).filter(SeenField.value.in_(chunk))
+            if local:
+                query = query.filter(SeenEntry.task == task.name)
+            else:
+                query = query.filter(SeenEntry.local == False)
+            for seen_field, seen_entry in query.order_by(SeenField.id.desc()):
+                found[seen_field.value] = (seen_field, seen_entry)
+        return found
 
     def on_task_learn(self, task, config):
         """Remember succeeded entries"""
@@ -228,6 +408,7 @@ class FilterSeen(object):
         se = task.session.query(SeenEntry).filter(SeenEntry.title == title).first()
         if se:
             log.debug("Forgotten '%s' (%s fields)" % (title, len(se.fields)))
+            seen_cache.forget(task.session, se.fields)
             task.session.delete(se)
             return True
 
@@ -300,7 +481,12 @@ def seen_search(options):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterSeen, 'seen', builtin=True, api_ver=2)
+    plugin.register(FilterSeen, 'seen', builtin=True, api_ver=2, locks=['seen'])
+
+
+@event('config.register')
+def register_config():
+    register_config_key('seen_cache', {'type': 'boolean'})
 
 
 @event('options.register')
@@ -47,4 +47,4 @@ class FilterSeenInfoHash(FilterSeen):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterSeenInfoHash, 'seen_info_hash', builtin=True, api_ver=2)
+    plugin.register(FilterSeenInfoHash, 'seen_info_hash', builtin=True, api_ver=2, locks=['seen'])
@@ -59,4 +59,4 @@ class FilterSeenMovies(FilterSeen):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterSeenMovies, 'seen_movies', api_ver=2)
+    plugin.register(FilterSeenMovies, 'seen_movies', api_ver=2, locks=['seen'])
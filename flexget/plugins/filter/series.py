@@ -1,5 +1,6 @@
 from __future__ import unicode_literals, division, absolute_import
 import argparse
+import hashlib
 import logging
 import re
 import time
@@ -7,7 +8,7 @@ from copy import copy
 from datetime import datetime, timedelta
 
 from sqlalchemy import (Column, Integer, String, Unicode, DateTime, Boolean,
-                        desc, select, update, delete, ForeignKey, Index, func, and_, not_)
+                        desc, select, update, delete, exists, ForeignKey, Index, func, and_, not_)
 from sqlalchemy.orm import relation, backref
 from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 from sqlalchemy.exc import OperationalError
@@ -19,10 +20,11 @@ from flexget.manager import Session
 from flexget.utils import qualities
 from flexget.utils.log import log_once
 from flexget.plugins.parsers import ParseWarning, SERIES_ID_TYPES
+from flexget.plugins.parsers.parser_common import default_ignore_prefixes, name_to_re
 from flexget.plugin import get_plugin_by_name
 from flexget.utils.sqlalchemy_utils import (table_columns, table_exists, drop_tables, table_schema, table_add_column,
-                                            create_index)
-from flexget.utils.tools import merge_dict_from_to, parse_timedelta
+                                            create_index, chunked)
+from flexget.utils.tools import merge_dict_from_to, parse_timedelta, ReList
 from flexget.utils.database import quality_property
 
 SCHEMA_VER = 11
@@ -148,9 +150,13 @@ def upgrade(ver, session):
 @event('manager.db_cleanup')
 def db_cleanup(session):
     # Clean up old undownloaded releases
-    result = session.query(Release).\
+    old_releases = session.query(Release).\
         filter(Release.downloaded == False).\
-        filter(Release.first_seen < datetime.now() - timedelta(days=120)).delete(False)
+        filter(Release.first_seen < datetime.now() - timedelta(days=120))
+    # Summaries of the affected series are recalculated the next time they are needed
+    affected = select([Episode.series_id]).where(Episode.id.in_(old_releases.with_entities(Release.episode_id)))
+    session.query(SeriesSummary).filter(SeriesSummary.series_id.in_(affected)).delete(False)
+    result = old_releases.delete(False)
     if result:
         log.verbose('Removed %d undownloaded episode releases.', result)
     # Clean up episodes without releases
@@ -161,6 +167,7 @@ def db_cleanup(session):
     result = session.query(Series).filter(~Series.episodes.any()).filter(~Series.in_tasks.any()).delete(False)
     if result:
         log.verbose('Removed %d series without episodes.', result)
+    session.query(SeriesSummary).filter(~SeriesSummary.series_id.in_(select([Series.id]))).delete(False)
 
 
 @event('manager.lock_acquired')
@@ -193,6 +200,7 @@ def clean_series(manager):
         deleted = (session.query(SeriesTask).filter(not_(SeriesTask.name.in_(manager.tasks))).
                    delete(synchronize_session=False))
         if deleted:
+            update_configured_summaries(session)
             session.commit()
     finally:
         session.close()
@@ -214,6 +222,23 @@ def normalize_series_name(name):
     return name
 
 
+def pretty_age(first_seen):
+    """
+    :return: Pretty string representing age of an episode first seen at `first_seen`. eg "23d 12h" or
+        "No releases seen"
+    """
+    if not first_seen:
+        return 'No releases seen'
+    diff = datetime.now() - first_seen
+    age_days = diff.days
+    age_hours = diff.seconds // 60 // 60
+    age = ''
+    if age_days:
+        age += '%sd ' % age_days
+    age += '%sh' % age_hours
+    return age
+
+
 class NormalizedComparator(Comparator):
     def operate(self, op, other):
         return op(self.__clause_element__(), normalize_series_name(other))
@@ -288,16 +313,7 @@ class Episode(Base):
         """
         :return: Pretty string representing age of episode. eg "23d 12h" or "No releases seen"
         """
-        if not self.first_seen:
-            return 'No releases seen'
-        diff = datetime.now() - self.first_seen
-        age_days = diff.days
-        age_hours = diff.seconds // 60 // 60
-        age = ''
-        if age_days:
-            age += '%sd ' % age_days
-        age += '%sh' % age_hours
-        return age
+        return pretty_age(self.first_seen)
 
     @property
     def is_premiere(self):
@@ -383,6 +399,42 @@ class SeriesTask(Base):
         self.name = name
 
 
+class SeriesSummary(Base):
+    """
+    Precomputed status of a series for series listings. Rows are updated by :func:`update_series_summaries` when
+    releases of the series change, missing rows are created by :func:`ensure_series_summaries`.
+    """
+
+    __tablename__ = 'series_summary'
+
+    series_id = Column(Integer, ForeignKey('series.id'), primary_key=True)
+    series = relation(Series, backref=backref('summary', uselist=False, cascade='all, delete, delete-orphan'))
+    # Latest downloaded episode
+    latest_episode_id = Column(Integer, ForeignKey('series_episodes.id'))
+    latest_identifier = Column(String)
+    latest_first_seen = Column(DateTime)
+    latest_status = Column(String)
+    # Number of episodes seen after the latest downloaded one
+    behind = Column(Integer, default=0)
+    # When the newest episode of the series was first seen
+    last_seen = Column(DateTime, index=True)
+    episode_count = Column(Integer, default=0)
+    configured = Column(Boolean, default=False, index=True)
+    # Only the first episodes of the series have been downloaded
+    premiere = Column(Boolean, default=False, index=True)
+
+    @property
+    def latest_age(self):
+        return pretty_age(self.latest_first_seen)
+
+    def __unicode__(self):
+        return '<SeriesSummary(series_id=%s,latest=%s,behind=%s)>' % \
+            (self.series_id, self.latest_identifier, self.behind)
+
+    def __repr__(self):
+        return unicode(self).encode('ascii', 'replace')
+
+
 def get_latest_episode(series):
     """Return latest known identifier in dict (season, episode, name) for series name"""
     session = Session.object_session(series)
@@ -497,6 +549,140 @@ def new_eps_after(since_ep):
         return 0
 
 
+def get_latest_status(episode):
+    """
+    :param episode: Instance of Episode
+    :return: Status string for given episode
+    """
+    status = ''
+    for release in sorted(episode.releases, key=lambda r: r.quality):
+        if not release.downloaded:
+            continue
+        status += release.quality.name
+        if release.proper_count > 0:
+            status += '-proper'
+            if release.proper_count > 1:
+                status += str(release.proper_count)
+        status += ', '
+    return status.rstrip(', ') if status else None
+
+
+def update_series_summaries(session, series):
+    """
+    Recalculate the :class:`SeriesSummary` of each of the `series`.
+
+    :param session: Database session to use
+    :param series: Iterable of Series instances
+    """
+    for db_series in series:
+        summary = db_series.summary
+        if summary is None:
+            summary = db_series.summary = SeriesSummary()
+        latest = get_latest_release(db_series)
+        summary.latest_episode_id = latest and latest.id
+        summary.latest_identifier = latest and latest.identifier
+        summary.latest_first_seen = latest and latest.first_seen
+        summary.latest_status = latest and get_latest_status(latest)
+        summary.behind = new_eps_after(latest) if latest else 0
+        summary.last_seen, summary.episode_count = \
+            session.query(func.max(Episode.first_seen), func.count(Episode.id)).\
+            filter(Episode.series_id == db_series.id).one()
+        season, number = session.query(func.max(Episode.season), func.max(Episode.number)).\
+            join(Episode.releases).filter(Episode.series_id == db_series.id).filter(Release.downloaded == True).one()
+        summary.premiere = season is not None and number is not None and season <= 1 and number <= 2
+        summary.configured = bool(db_series.in_tasks)
+
+
+def is_new_ep_after(since_ep, episode):
+    """
+    Check if `episode` counts as a new episode after `since_ep`, the same way :func:`new_eps_after` counts them.
+
+    :param since_ep: Episode instance
+    :param episode: Episode instance of the same series
+    :return: bool
+    """
+    series = since_ep.series
+    if series.identified_by == 'ep':
+        if since_ep.season is None or since_ep.number is None:
+            return episode.first_seen > since_ep.first_seen
+        return episode.identified_by == 'ep' and (episode.season, episode.number) > (since_ep.season, since_ep.number)
+    elif series.identified_by == 'seq':
+        return episode.number > since_ep.number
+    elif series.identified_by == 'id':
+        return episode.first_seen > since_ep.first_seen
+    return False
+
+
+def add_summary_episodes(session, new_episodes, created_series=()):
+    """
+    Update :class:`SeriesSummary` rows with newly added episodes without recalculating them. New releases are not
+    downloaded, so they only change the number of episodes, the latest of them and how far behind the series is.
+
+    :param session: Database session to use
+    :param new_episodes: Dict mapping Series instances to lists of their added Episodes
+    :param created_series: Series which were added along with their episodes
+    """
+    summaries = {}
+    for chunk in chunked([db_series.id for db_series in new_episodes if db_series not in created_series]):
+        for summary in session.query(SeriesSummary).filter(SeriesSummary.series_id.in_(chunk)):
+            summaries[summary.series_id] = summary
+    recalculate = []
+    for db_series, added in new_episodes.iteritems():
+        last_seen = max(episode.first_seen for episode in added)
+        if db_series in created_series:
+            summary = SeriesSummary()
+            summary.series_id = db_series.id
+            summary.last_seen = last_seen
+            summary.episode_count = len(added)
+            session.add(summary)
+            continue
+        summary = summaries.get(db_series.id)
+        latest = None
+        if summary is not None and summary.latest_episode_id:
+            latest = session.query(Episode).get(summary.latest_episode_id)
+        if summary is None or (summary.latest_episode_id and latest is None):
+            # Missing or out of date
+            recalculate.append(db_series)
+            continue
+        summary.episode_count = (summary.episode_count or 0) + len(added)
+        summary.last_seen = max(summary.last_seen, last_seen) if summary.last_seen else last_seen
+        if latest:
+            summary.behind = (summary.behind or 0) + sum(1 for episode in added if is_new_ep_after(latest, episode))
+    if recalculate:
+        update_series_summaries(session, recalculate)
+
+
+def ensure_series_summaries(session):
+    """
+    Create the :class:`SeriesSummary` rows which are missing, ie. for series added before they existed.
+    The caller should commit when rows were created, so that they are not calculated again.
+
+    :return: Number of created rows
+    """
+    missing = session.query(Series).filter(~Series.summary.has()).all()
+    if missing:
+        log.verbose('Calculating status of %s series, this may take a while.', len(missing))
+        update_series_summaries(session, missing)
+        session.flush()
+    return len(missing)
+
+
+def update_configured_summaries(session, series_ids=None):
+    """
+    Refresh the configured flag of :class:`SeriesSummary` rows after tasks of series have changed.
+
+    :param session: Database session to use
+    :param series_ids: Ids of the series to refresh, all of them if not given
+    """
+    configured = exists().where(SeriesTask.series_id == SeriesSummary.series_id)
+    if series_ids is None:
+        session.query(SeriesSummary).update({'configured': configured}, synchronize_session=False)
+        return
+    for chunk in chunked(series_ids):
+        session.query(SeriesSummary).filter(SeriesSummary.series_id.in_(chunk)).\
+            update({'configured': configured}, synchronize_session=False)
+
+
 def store_parser(session, parser, series=None):
     """
     Push series information into database. Returns added/existing release.
@@ -506,62 +692,116 @@ def store_parser(session, parser, series=None):
     :param series: Series in database to add release to. Will be looked up if not provided.
     :return: List of Releases
     """
-    if not series:
-        # if series does not exist in database, add new
-        series = session.query(Series).\
-            filter(Series.name == parser.name).\
-            filter(Series.id != None).first()
-        if not series:
-            log.debug('adding series %s into db', parser.name)
-            series = Series()
-            series.name = parser.name
-            session.add(series)
-            log.debug('-> added %s' % series)
-
-    releases = []
-    for ix, identifier in enumerate(parser.identifiers):
-        # if episode does not exist in series, add new
-        episode = session.query(Episode).filter(Episode.series_id == series.id).\
-            filter(Episode.identifier == identifier).\
-            filter(Episode.series_id != None).first()
-        if not episode:
-            log.debug('adding episode %s into series %s', identifier, parser.name)
-            episode = Episode()
-            episode.identifier = identifier
-            episode.identified_by = parser.id_type
-            # if episodic format
-            if parser.id_type == 'ep':
-                episode.season = parser.season
-                episode.number = parser.episode + ix
-            elif parser.id_type == 'sequence':
-                episode.season = 0
-                episode.number = parser.id + ix
-            series.episodes.append(episode)  # pylint:disable=E1103
-            log.debug('-> added %s' % episode)
-
-        # if release does not exists in episode, add new
-        #
-        # NOTE:
-        #
-        # filter(Release.episode_id != None) fixes weird bug where release had/has been added
-        # to database but doesn't have episode_id, this causes all kinds of havoc with the plugin.
-        # perhaps a bug in sqlalchemy?
-        release = session.query(Release).filter(Release.episode_id == episode.id).\
-            filter(Release.title == parser.data).\
-            filter(Release.quality == parser.quality).\
-            filter(Release.proper_count == parser.proper_count).\
-            filter(Release.episode_id != None).first()
-        if not release:
-            log.debug('adding release %s into episode', parser)
-            release = Release()
-            release.quality = parser.quality
-            release.proper_count = parser.proper_count
-            release.title = parser.data
-            episode.releases.append(release)  # pylint:disable=E1103
-            log.debug('-> added %s' % release)
-        releases.append(release)
+    return store_parsers(session, [parser], series=series)[0]
+
+
+def store_parsers(session, parsers, series=None):
+    """
+    Push information of many releases into database at once. Existing episodes and releases are loaded with one query
+    (per 900 items) and missing ones are added with a single flush.
+
+    :param session: Database session to use
+    :param parsers: parsers for releases that should be added to database
+    :param series: Series in database to add all releases to. Will be looked up by parser names if not provided.
+    :return: List with a list of Releases for each of the `parsers`
+    """
+    parsers = list(parsers)
+    created_series = set()
+    if series:
+        series_by_name = None
+        all_series = [series]
+    else:
+        series_by_name = {}
+        names = set(normalize_series_name(parser.name) for parser in parsers)
+        for chunk in chunked(names):
+            for db_series in session.query(Series).filter(Series._name_normalized.in_(chunk)):
+                series_by_name[db_series._name_normalized] = db_series
+        for parser in parsers:
+            if normalize_series_name(parser.name) not in series_by_name:
+                # if series does not exist in database, add new
+                log.debug('adding series %s into db', parser.name)
+                db_series = Series()
+                db_series.name = parser.name
+                session.add(db_series)
+                series_by_name[db_series._name_normalized] = db_series
+                created_series.add(db_series)
+                log.debug('-> added %s' % db_series)
+        all_series = series_by_name.values()
+
+    # Load existing episodes and their releases of the affected series, keyed by the objects they belong to
+    # (Episode compares equal by identifier, so releases use the identity of it)
+    episodes = {}
+    series_by_id = dict((db_series.id, db_series) for db_series in all_series if db_series.id is not None)
+    if series_by_id:
+        identifiers = set(identifier for parser in parsers for identifier in parser.identifiers)
+        for chunk in chunked(identifiers):
+            query = session.query(Episode).filter(Episode.series_id.in_(series_by_id.keys())).\
+                filter(Episode.identifier.in_(chunk))
+            for episode in query:
+                episodes.setdefault((series_by_id[episode.series_id], episode.identifier), episode)
+    releases = {}
+    if episodes:
+        titles = set(parser.data for parser in parsers)
+        episode_by_id = dict((episode.id, episode) for episode in episodes.itervalues())
+        for chunk in chunked(episode_by_id):
+            # NOTE:
+            #
+            # filter(Release.episode_id != None) fixes weird bug where release had/has been added
+            # to database but doesn't have episode_id, this causes all kinds of havoc with the plugin.
+            # perhaps a bug in sqlalchemy?
+            query = session.query(Release).filter(Release.episode_id.in_(chunk)).\
+                filter(Release.episode_id != None)
+            for release in query:
+                if release.title in titles:
+                    key = (id(episode_by_id[release.episode_id]), release.title, release._quality, release.proper_count)
+                    releases.setdefault(key, release)
+
+    result = []
+    new_episodes = {}
+    for parser in parsers:
+        db_series = series if series_by_name is None else series_by_name[normalize_series_name(parser.name)]
+        parser_releases = []
+        for ix, identifier in enumerate(parser.identifiers):
+            # if episode does not exist in series, add new
+            episode = episodes.get((db_series, identifier))
+            if not episode:
+                log.debug('adding episode %s into series %s', identifier, parser.name)
+                episode = Episode()
+                episode.identifier = identifier
+                episode.identified_by = parser.id_type
+                # if episodic format
+                if parser.id_type == 'ep':
+                    episode.season = parser.season
+                    episode.number = parser.episode + ix
+                elif parser.id_type == 'sequence':
+                    episode.season = 0
+                    episode.number = parser.id + ix
+                # Unlike appending to series.episodes, setting the relation does not load all episodes of the series
+                episode.series = db_series
+                session.add(episode)
+                episodes[(db_series, identifier)] = episode
+                new_episodes.setdefault(db_series, []).append(episode)
+                log.debug('-> added %s' % episode)
+
+            # if release does not exists in episode, add new
+            key = (id(episode), parser.data, parser.quality.name, parser.proper_count)
+            release = releases.get(key)
+            if not release:
+                log.debug('adding release %s into episode', parser)
+                release = Release()
+                release.quality = parser.quality
+                release.proper_count = parser.proper_count
+                release.title = parser.data
+                release.episode = episode
+                session.add(release)
+                releases[key] = release
+                log.debug('-> added %s' % release)
+            parser_releases.append(release)
+        result.append(parser_releases)
     session.flush()  # Make sure autonumber ids are populated
-    return releases
+    if new_episodes:
+        add_summary_episodes(session, new_episodes, created_series)
+    return result
 
 
 def set_series_begin(series, ep_id):
@@ -642,6 +882,8 @@ def forget_series_episode(name, identifier):
             if episode:
                 series.identified_by = ''  # reset identified_by flag so that it will be recalculated
                 session.delete(episode)
+                session.flush()
+                update_series_summaries(session, [series])
                 session.commit()
                 log.debug('Episode %s from series %s removed from database.', identifier, name)
             else:
@@ -675,6 +917,91 @@ def populate_entry_fields(entry, parser):
     entry['series_id_type'] = parser.id_type
 
 
+class SeriesMatcher(object):
+    """
+    Index over the name regexps of all configured series. Finds the series which could possibly match a title in one
+    pass, so that the (expensive) series parser only needs to be run for those.
+
+    Names are bucketed by their first word, since name regexps generated by :func:`name_to_re` only match when the
+    title (after an optional ignore prefix) starts with it. Series using custom `name_regexp` can not be bucketed and
+    are always checked against their own regexps. Candidates are always verified with the same regexps the parser
+    uses, so the index never returns a series the parser could not match.
+    """
+
+    blank_re = re.compile(r'(?:[^\w&]|_)+', re.UNICODE)
+    parenthetical_re = re.compile(r'\s*\([^()]*\)$', re.UNICODE)
+
+    def __init__(self, config):
+        # first word of name -> list of (series name, name regexp)
+        self.first_words = {}
+        self.first_word_lengths = set()
+        # list of (series name, name regexp) which must be checked for every title
+        self.unindexed = []
+        self.ignore_prefixes = ReList(default_ignore_prefixes)
+        for series_item in config:
+            series_name, series_config = series_item.items()[0]
+            if series_config.get('name_regexp'):
+                for name_re in ReList(self._as_list(series_config['name_regexp'])):
+                    self.unindexed.append((series_name, name_re))
+                continue
+            for name in [series_name] + self._as_list(series_config.get('alternate_name', [])):
+                name_re = ReList([name_to_re(name)])[0]
+                first_word = self.first_word(name)
+                if not first_word:
+                    self.unindexed.append((series_name, name_re))
+                    continue
+                self.first_words.setdefault(first_word, []).append((series_name, name_re))
+                self.first_word_lengths.add(len(first_word))
+
+    @staticmethod
+    def _as_list(value):
+        if isinstance(value, basestring):
+            return [value]
+        return list(value)
+
+    @staticmethod
+    def config_hash(config):
+        """Hash of the parts of a prepared series config which affect name matching."""
+        names = []
+        for series_item in config:
+            series_name, series_config = series_item.items()[0]
+            names.append((series_name, series_config.get('alternate_name'), series_config.get('name_regexp')))
+        return hashlib.md5(repr(names)).hexdigest()
+
+    def first_word(self, name):
+        """Returns the first word of `name` the way it appears in regexp generated by :func:`name_to_re`."""
+        name = self.parenthetical_re.sub('', name)
+        words = self.blank_re.sub(' ', name).strip().split(' ')
+        return words[0].lower()
+
+    def _possible(self, data):
+        """Yields (series name, name regexp) pairs whose first word could match the beginning of `data`."""
+        starts = set([0])
+        for prefix_re in self.ignore_prefixes:
+            match = prefix_re.match(data)
+            if match:
+                starts.add(match.end())
+        for start in starts:
+            squashed = self.blank_re.sub('', data[start:]).lower()
+            for length in self.first_word_lengths:
+                for candidate in self.first_words.get(squashed[:length], []):
+                    yield candidate
+        for candidate in self.unindexed:
+            yield candidate
+
+    def candidates(self, entry):
+        """Returns set of series names which could be parsed from `entry` title or description."""
+        found = set()
+        for field in ('title', 'description'):
+            data = entry.get(field)
+            if not isinstance(data, basestring) or not data:
+                continue
+            for series_name, name_re in self._possible(data):
+                if series_name not in found and name_re.search(data):
+                    found.add(series_name)
+        return found
+
+
 class FilterSeriesBase(object):
     """
     Class that contains helper methods for both filter.series as well as plugins that configure it,
@@ -883,6 +1210,18 @@ class FilterSeries(FilterSeriesBase):
             self.backlog = plugin.get_plugin_by_name('backlog')
         except plugin.DependencyError:
             log.warning('Unable utilize backlog plugin, episodes may slip trough timeframe')
+        # task name -> (config hash, SeriesMatcher)
+        self.matchers = {}
+
+    def get_matcher(self, task, config):
+        """Returns :class:`SeriesMatcher` for prepared `config`, only rebuilding it when series config changes."""
+        config_hash = SeriesMatcher.config_hash(config)
+        cached_hash, matcher = self.matchers.get(task.name, (None, None))
+        if cached_hash != config_hash:
+            log.debug('Building series matcher index for task %s', task.name)
+            matcher = SeriesMatcher(config)
+            self.matchers[task.name] = (config_hash, matcher)
+        return matcher
 
     def auto_exact(self, config):
         """Automatically enable exact naming option for series that look like a problem"""
@@ -907,11 +1246,17 @@ class FilterSeries(FilterSeriesBase):
     def on_task_metainfo(self, task, config):
         config = self.prepare_config(config)
         self.auto_exact(config)
+        matcher = self.get_matcher(task, config)
+        # Find candidate series for every entry in one pass, parser is only ran for those
+        candidates = [(entry, matcher.candidates(entry)) for entry in task.entries]
         for series_item in config:
             series_name, series_config = series_item.items()[0]
+            entries = [entry for entry, names in candidates if series_name in names]
+            if not entries:
+                continue
             log.trace('series_name: %s series_config: %s', series_name, series_config)
             start_time = time.clock()
-            self.parse_series(task.entries, series_name, series_config)
+            self.parse_series(entries, series_name, series_config)
             took = time.clock() - start_time
             log.trace('parsing %s took %s', series_name, took)
 
@@ -946,9 +1291,10 @@ class FilterSeries(FilterSeriesBase):
                 if not series_name in found_series:
                     continue
                 series_entries = {}
-                for entry in found_series[series_name]:
-                    # store found episodes into database and save reference for later use
-                    releases = store_parser(session, entry['series_parser'], series=db_series)
+                # store found episodes into database and save reference for later use
+                entries = found_series[series_name]
+                all_releases = store_parsers(session, [entry['series_parser'] for entry in entries], series=db_series)
+                for entry, releases in zip(entries, all_releases):
                     entry['series_releases'] = [r.id for r in releases]
                     series_entries.setdefault(releases[0].episode, []).append(entry)
 
@@ -971,6 +1317,7 @@ class FilterSeries(FilterSeriesBase):
                     log.trace('No entries found for %s this run.', series_name)
                     continue
 
+                identified_by = db_series.identified_by
                 # configuration always overrides everything
                 if series_config.get('identified_by', 'auto') != 'auto':
                     db_series.identified_by = series_config['identified_by']
@@ -978,6 +1325,9 @@ class FilterSeries(FilterSeriesBase):
                 if not db_series.identified_by or db_series.identified_by == 'auto':
                     db_series.identified_by = auto_identified_by(db_series)
                     log.debug('identified_by set to \'%s\' based on series history', db_series.identified_by)
+                if db_series.identified_by != identified_by:
+                    # Latest episode and number of episodes behind depend on it
+                    update_series_summaries(session, [db_series])
 
                 log.trace('series_name: %s series_config: %s', series_name, series_config)
 
@@ -1425,28 +1775,50 @@ class FilterSeries(FilterSeriesBase):
     def on_task_learn(self, task, config):
         """Learn succeeded episodes"""
         log.debug('on_task_learn')
-        for entry in task.accepted:
-            if 'series_releases' in entry:
-                with Session() as session:
+        release_ids = []
+        with Session() as session:
+            for entry in task.accepted:
+                if 'series_releases' in entry:
                     num = (session.query(Release).filter(Release.id.in_(entry['series_releases'])).
                            update({'downloaded': True}, synchronize_session=False))
-                log.debug('marking %s releases as downloaded for %s', num, entry)
-            else:
-                log.debug('%s is not a series', entry['title'])
+                    release_ids.extend(entry['series_releases'])
+                    log.debug('marking %s releases as downloaded for %s', num, entry)
+                else:
+                    log.debug('%s is not a series', entry['title'])
+            if release_ids:
+                series = set()
+                for chunk in chunked(release_ids):
+                    series.update(session.query(Series).join(Series.episodes, Episode.releases).
+                                  filter(Release.id.in_(chunk)))
+                update_series_summaries(session, series)
 
 
 class SeriesDBManager(FilterSeriesBase):
     """Update in the database with series info from the config"""
 
+    def needs_locks(self, task):
+        # This is a builtin, only lock the series of tasks which have changed
+        return bool(task.config_modified)
+
     @plugin.priority(0)
     def on_task_start(self, task, config):
         if not task.config_modified:
             return
+        if not task.holds_lock('series'):
+            # Another start plugin marked the task changed after the locks were taken, series config is the same
+            # (configure_series, which changes it, takes the lock)
+            log.debug('series config of %s has not changed, not updating database' % task.name)
+            return
         # Clear all series from this task
         with Session() as session:
+            old_ids = set(series_id for (series_id,) in
+                          session.query(SeriesTask.series_id).filter(SeriesTask.name == task.name))
             session.query(SeriesTask).filter(SeriesTask.name == task.name).delete()
             if not task.config.get('series'):
+                if old_ids:
+                    update_configured_summaries(session, old_ids)
                 return
+            new_series = []
             config = self.prepare_config(task.config['series'])
             for series_item in config:
                 series_name, series_config = series_item.items()[0]
@@ -1463,6 +1835,7 @@ class SeriesDBManager(FilterSeriesBase):
                     session.add(db_series)
                     log.debug('-> added %s' % db_series)
                 db_series.in_tasks.append(SeriesTask(task.name))
+                new_series.append(db_series)
                 if series_config.get('identified_by', 'auto') != 'auto':
                     db_series.identified_by = series_config['identified_by']
                 # Set the begin episode
@@ -1471,13 +1844,18 @@ class SeriesDBManager(FilterSeriesBase):
                         set_series_begin(db_series, series_config['begin'])
                     except ValueError as e:
                         raise plugin.PluginError(e)
+            session.flush()
+            # Only series added to or removed from this task change their configured status
+            changed = old_ids.symmetric_difference(db_series.id for db_series in new_series)
+            if changed:
+                update_configured_summaries(session, changed)
 
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterSeries, 'series', api_ver=2)
+    plugin.register(FilterSeries, 'series', api_ver=2, locks=['series'])
     # This is a builtin so that it can update the database for tasks that may have had series plugin removed
-    plugin.register(SeriesDBManager, 'series_db', builtin=True, api_ver=2)
+    plugin.register(SeriesDBManager, 'series_db', builtin=True, api_ver=2, locks=['series'])
 
 
 @event('options.register')
@@ -83,4 +83,4 @@ class FilterSeriesPremiere(FilterSeriesBase):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(FilterSeriesPremiere, 'series_premiere', api_ver=2)
+    plugin.register(FilterSeriesPremiere, 'series_premiere', api_ver=2, locks=['series'])
@@ -1,7 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
-import threading
 import socket
+from multiprocessing.pool import ThreadPool
 from urlparse import urlparse, SplitResult, urlsplit, urlunsplit
 import struct
 from random import randrange
@@ -11,42 +11,25 @@ from urllib2 import URLError
 
 from flexget import plugin
 from flexget.event import event
-from flexget.utils.tools import urlopener
+from flexget.utils.tools import urlopener, LRUCache
 from flexget.utils.bittorrent import bdecode
 
 log = logging.getLogger('torrent_alive')
 
 
-class TorrentAliveThread(threading.Thread):
+# Maximum number of trackers scraped at the same time
+MAX_WORKERS = 10
+# Maximum number of info hashes in a single scrape request
+HTTP_BATCH_SIZE = 50
+UDP_BATCH_SIZE = 74
+# Seeds found from trackers, keyed by (tracker, info_hash), shared by all tasks
+scrape_cache = LRUCache(max_weight=10000, cache_time='30 minutes')
 
-    def __init__(self, tracker, info_hash):
-        threading.Thread.__init__(self)
-        self.tracker = tracker
-        self.info_hash = info_hash
-        self.tracker_seeds = 0
 
-    def run(self):
-        self.tracker_seeds = get_tracker_seeds(self.tracker, self.info_hash)
-        log.debug('%s seeds found from %s' % (self.tracker_seeds, get_scrape_url(self.tracker, self.info_hash)))
-
-
-def max_seeds_from_threads(threads):
+def get_scrape_url(tracker_url, info_hash):
     """
-    Joins the threads and returns the maximum seeds found from any of them.
-
-    :param threads: A list of started `TorrentAliveThread`
-    :return: Maximum seeds found from any of the threads
+    :param info_hash: Info hash, or a list of them to scrape in one request
     """
-    seeds = 0
-    for background in threads:
-        log.debug('Coming up next: %s' % background.tracker)
-        background.join()
-        seeds = max(seeds, background.tracker_seeds)
-        log.debug('Current hightest number of seeds found: %s' % seeds)
-    return seeds
-
-
-def get_scrape_url(tracker_url, info_hash):
     if 'announce' in tracker_url:
         v = urlsplit(tracker_url)
         sr = SplitResult(v.scheme, v.netloc, v.path.replace('announce', 'scrape'),
@@ -56,18 +39,28 @@ def get_scrape_url(tracker_url, info_hash):
         log.debug('`announce` not contained in tracker url, guessing scrape address.')
         result = tracker_url + '/scrape'
 
+    info_hashes = [info_hash] if isinstance(info_hash, basestring) else info_hash
     result += '&' if '?' in result else '?'
-    result += 'info_hash=%s' % quote(info_hash.decode('hex'))
+    result += '&'.join('info_hash=%s' % quote(h.decode('hex')) for h in info_hashes)
     return result
 
 
 def get_udp_seeds(url, info_hash):
+    return get_udp_seeds_batch(url, [info_hash]).get(info_hash, 0)
+
+
+def get_udp_seeds_batch(url, info_hashes):
+    """
+    Scrapes multiple torrents with one request.
+
+    :return: Dict of seeds by info hash, torrents which could not be scraped are not included.
+    """
     parsed_url = urlparse(url)
     try:
         port = parsed_url.port
     except ValueError as ve:
         log.error('UDP Port Error, url was %s' % url)
-        return 0
+        return {}
 
     log.debug('Checking for seeds from %s' % url)
 
@@ -76,11 +69,11 @@ def get_udp_seeds(url, info_hash):
 
     if port is None:
         log.error('UDP Port Error, port was None')
-        return 0
+        return {}
 
     if port < 0 or port > 65535:
         log.error('UDP Port Error, port was %s' % port)
-        return 0
+        return {}
 
     # Create the socket
     try:
@@ -97,58 +90,82 @@ def get_udp_seeds(url, info_hash):
         # check recieved packet for response
         action, transaction_id, connection_id = struct.unpack(b">LLQ", res)
 
-        #build packet hash out of decoded info_hash
-        packet_hash = info_hash.decode('hex')
+        #build packet hash out of decoded info_hashes
+        packet_hash = b''.join(info_hash.decode('hex') for info_hash in info_hashes)
 
         # construct packet for scrape with decoded info_hash setting action byte to 2 for scape
         packet = struct.pack(b">QLL", connection_id, 2, transaction_id) + packet_hash
 
         clisocket.send(packet)
-        # set recieve size of 8 + 12 bytes
-        res = clisocket.recv(20)
+        # set recieve size of 8 + 12 bytes per torrent
+        res = clisocket.recv(8 + 12 * len(info_hashes))
 
     except IOError as e:
         log.warning('Socket Error: %s', e)
-        return 0
+        return {}
     # Check for UDP error packet
     (action,) = struct.unpack(b">L", res[:4])
     if action == 3:
         log.error('There was a UDP Packet Error 3')
-        return 0
-
-    # first 8 bytes are followed by seeders, completed and leechers for requested torrent
-    seeders, completed, leechers = struct.unpack(b">LLL", res[8:20])
-    log.debug('get_udp_seeds is returning: %s', seeders)
+        return {}
+
+    # first 8 bytes are followed by seeders, completed and leechers for each requested torrent
+    seeds = {}
+    for i, info_hash in enumerate(info_hashes):
+        data = res[8 + 12 * i:20 + 12 * i]
+        if len(data) < 12:
+            break
+        seeders, completed, leechers = struct.unpack(b">LLL", data)
+        seeds[info_hash] = seeders
+    log.debug('get_udp_seeds_batch is returning: %s', seeds)
     clisocket.close()
-    return seeders
+    return seeds
 
 
 def get_http_seeds(url, info_hash):
-    url = get_scrape_url(url, info_hash)
+    return get_http_seeds_batch(url, [info_hash]).get(info_hash, 0)
+
+
+def get_http_seeds_batch(url, info_hashes):
+    """
+    Scrapes multiple torrents with one request. Trackers which do not support this usually return only the first
+    torrent.
+
+    :return: Dict of seeds by info hash, torrents which could not be scraped are not included.
+    """
+    url = get_scrape_url(url, info_hashes)
     if not url:
         log.debug('if not url is true returning 0')
-        return 0
+        return {}
     log.debug('Checking for seeds from %s' % url)
     data = None
     try:
         data = bdecode(urlopener(url, log, retries=1, timeout=10).read()).get('files')
     except URLError as e:
         log.debug('Error scraping: %s' % e)
-        return 0
+        return {}
     except SyntaxError as e:
         log.warning('Error decoding tracker response: %s' % e)
-        return 0
+        return {}
     except BadStatusLine as e:
         log.warning('Error BadStatusLine: %s' % e)
-        return 0
+        return {}
     except IOError as e:
         log.warning('Server error: %s' % e)
-        return 0
+        return {}
     if not data:
         log.debug('No data received from tracker scrape.')
-        return 0
-    log.debug('get_http_seeds is returning: %s' % data.values()[0]['complete'])
-    return data.values()[0]['complete']
+        return {}
+    if len(info_hashes) == 1 and len(data) == 1:
+        # Some trackers do not return the hash we asked for as the key
+        return {info_hashes[0]: data.values()[0]['complete']}
+    seeds = {}
+    for raw_hash, stats in data.iteritems():
+        info_hash = raw_hash.encode('hex').upper()
+        if info_hash in info_hashes:
+            seeds[info_hash] = stats['complete']
+    log.debug('get_http_seeds_batch is returning: %s' % seeds)
+    return seeds
 
 
 def get_tracker_seeds(url, info_hash):
@@ -161,6 +178,82 @@ def get_tracker_seeds(url, info_hash):
         return 0
 
 
+def scrape_tracker(tracker, info_hashes):
+    """
+    Scrapes `info_hashes` from `tracker`, in as few requests as possible. Results are stored in `scrape_cache`.
+
+    :return: Dict of seeds by info hash, torrents which could not be scraped are not included.
+    """
+    if tracker.startswith('udp'):
+        scrape, batch_size = get_udp_seeds_batch, UDP_BATCH_SIZE
+    elif tracker.startswith('http'):
+        scrape, batch_size = get_http_seeds_batch, HTTP_BATCH_SIZE
+    else:
+        log.warning('Unable to scrape tracker %s' % tracker)
+        return {}
+    seeds = {}
+    for i in xrange(0, len(info_hashes), batch_size):
+        batch = info_hashes[i:i + batch_size]
+        try:
+            seeds.update(scrape(tracker, batch))
+        except URLError as e:
+            log.debug('Error scraping %s: %s' % (tracker, e))
+            continue
+        missing = [info_hash for info_hash in batch if info_hash not in seeds]
+        if len(batch) > 1 and missing and len(missing) < len(batch):
+            # Tracker does not seem to support scraping multiple torrents at once
+            log.debug('%s did not return all requested torrents, scraping them one at a time' % tracker)
+            for info_hash in missing:
+                try:
+                    seeds.update(scrape(tracker, [info_hash]))
+                except URLError as e:
+                    log.debug('Error scraping %s from %s: %s' % (info_hash, tracker, e))
+    for info_hash, count in seeds.iteritems():
+        scrape_cache[(tracker, info_hash)] = count
+    log.debug('%s seeds found from %s' % (seeds, tracker))
+    return seeds
+
+
+def scrape_torrents(torrents):
+    """
+    Finds seeds for torrents from all of their trackers. Trackers are scraped in parallel, results from
+    `scrape_cache` are used when available.
+
+    :param torrents: Dict of tracker lists by info hash
+    :return: Dict of maximum seeds found from any tracker by info hash
+    """
+    seeds = dict((info_hash, 0) for info_hash in torrents)
+    # Hashes to scrape from each tracker
+    to_scrape = {}
+    for info_hash, trackers in torrents.iteritems():
+        for tracker in trackers:
+            cached = scrape_cache.get((tracker, info_hash))
+            if cached is not None:
+                log.debug('Using cached seeds for %s from %s' % (info_hash, tracker))
+                seeds[info_hash] = max(seeds[info_hash], cached)
+            else:
+                to_scrape.setdefault(tracker, []).append(info_hash)
+
+    def scrape(tracker):
+        try:
+            return scrape_tracker(tracker, to_scrape[tracker])
+        except Exception as e:
+            log.warning('Error scraping %s: %s' % (tracker, e))
+            return {}
+
+    if to_scrape:
+        pool = ThreadPool(min(MAX_WORKERS, len(to_scrape)))
+        try:
+            results = pool.map(scrape, list(to_scrape))
+        finally:
+            pool.close()
+            pool.join()
+        for result in results:
+            for info_hash, count in result.iteritems():
+                seeds[info_hash] = max(seeds[info_hash], count)
+    return seeds
+
+
 class TorrentAlive(object):
     schema = {
         'oneOf': [
@@ -204,52 +297,41 @@ class TorrentAlive(object):
         config = self.prepare_config(config)
         min_seeds = config['min_seeds']
 
+        entries = []
         for entry in task.accepted:
             # If torrent_seeds is filled, we will have already filtered in filter phase
             if entry.get('torrent_seeds'):
                 log.debug('Not checking trackers for seeds, as torrent_seeds is already filled.')
                 continue
-            log.debug('Checking for seeds for %s:' % entry['title'])
             torrent = entry.get('torrent')
             if torrent:
-                seeds = 0
-                info_hash = torrent.info_hash
-                announce_list = torrent.content.get('announce-list')
+                announce_list = torrent.get('announce-list')
                 if announce_list:
                     # Multitracker torrent
-                    threadlist = []
-                    for tier in announce_list:
-                        for tracker in tier:
-                            background = TorrentAliveThread(tracker, info_hash)
-                            try:
-                                background.start()
-                                threadlist.append(background)
-                            except threading.ThreadError:
-                                # If we can't start a new thread, wait for current ones to complete and continue
-                                log.debug('Reached max threads, finishing current threads.')
-                                seeds = max(seeds, max_seeds_from_threads(threadlist))
-                                background.start()
-                                threadlist = [background]
-                            log.debug('Started thread to scrape %s with info hash %s' % (tracker, info_hash))
-
-                    seeds = max(seeds, max_seeds_from_threads(threadlist))
-                    log.debug('Highest number of seeds found: %s' % seeds)
+                    trackers = [tracker for tier in announce_list for tracker in tier]
                 else:
                     # Single tracker
-                    tracker = torrent.content['announce']
-                    try:
-                        seeds = get_tracker_seeds(tracker, info_hash)
-                    except URLError as e:
-                        log.debug('Error scraping %s: %s' % (tracker, e))
-
-                # Reject if needed
-                if seeds < min_seeds:
-                    entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
-                                 remember_time=config['reject_for'])
-                    # Maybe there is better match that has enough seeds
-                    task.rerun()
-                else:
-                    log.debug('Found %i seeds from trackers' % seeds)
+                    trackers = [torrent.get('announce')]
+                entries.append((entry, torrent.info_hash, trackers))
+        if not entries:
+            return
+
+        torrents = {}
+        for entry, info_hash, trackers in entries:
+            torrents.setdefault(info_hash, set()).update(trackers)
+        log.debug('Checking for seeds for %s torrents' % len(torrents))
+        seeds_by_hash = scrape_torrents(torrents)
+
+        for entry, info_hash, trackers in entries:
+            seeds = seeds_by_hash[info_hash]
+            # Reject if needed
+            if seeds < min_seeds:
+                entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
+                             remember_time=config['reject_for'])
+                # Maybe there is better match that has enough seeds
+                task.rerun()
+            else:
+                log.debug('Found %i seeds from trackers for %s' % (seeds, entry['title']))
 
 
 @event('plugin.register')
@@ -1,12 +1,14 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
 
-from sqlalchemy import desc
+from sqlalchemy import and_, exists
+from sqlalchemy.orm import joinedload
 
 from flexget import plugin
 from flexget.event import event
 from flexget.entry import Entry
 from flexget.manager import Session
+from flexget.utils.sqlalchemy_utils import chunked
 
 log = logging.getLogger('emit_series')
 
@@ -65,6 +67,33 @@ class EmitSeries(object):
             entry.on_complete(self.on_search_complete, task=task, identified_by=series.identified_by)
         return entry
 
+    def load_episodes(self, session, series_ids):
+        """
+        Load episodes of many series with one query (per 900 series).
+
+        :return: Dict from series id to list of (Episode, has releases, has downloaded releases) tuples
+        """
+        has_releases = exists().where(Release.episode_id == Episode.id)
+        has_downloaded = exists().where(and_(Release.episode_id == Episode.id, Release.downloaded == True))
+        episodes = {}
+        for chunk in chunked(series_ids):
+            query = session.query(Episode, has_releases, has_downloaded).filter(Episode.series_id.in_(chunk))
+            for episode, released, downloaded in query:
+                episodes.setdefault(episode.series_id, []).append((episode, released, downloaded))
+        return episodes
+
+    def latest_release(self, series, episodes, downloaded=True, season=None):
+        """
+        Same as :func:`get_latest_release` for ep and sequence series, from episodes loaded with :meth:`load_episodes`.
+        """
+        candidates = [episode for episode, released, is_downloaded in episodes
+                      if (is_downloaded if downloaded else released) and episode.identified_by == series.identified_by
+                      and (season is None or episode.season == season)]
+        if not candidates:
+            return
+        # Missing numbers sort before all others like in the database
+        return max(candidates, key=lambda episode: (episode.season, episode.number))
+
     def on_task_input(self, task, config):
         if not config:
             return
@@ -73,7 +102,12 @@ class EmitSeries(object):
         if not task.is_rerun:
             self.try_next_season = {}
         entries = []
-        for seriestask in task.session.query(SeriesTask).filter(SeriesTask.name == task.name).all():
+        seriestasks = (task.session.query(SeriesTask).options(joinedload(SeriesTask.series)).
+                       filter(SeriesTask.name == task.name).all())
+        # Load episode history of all emitted series at once
+        all_episodes = self.load_episodes(task.session, [st.series.id for st in seriestasks if st.series and
+                                                         st.series.identified_by in ['ep', 'sequence']])
+        for seriestask in seriestasks:
             series = seriestask.series
             if not series:
                 # TODO: How can this happen?
@@ -86,9 +120,10 @@ class EmitSeries(object):
                             (series.name, series.identified_by or 'auto'))
                 continue
 
+            episodes = all_episodes.get(series.id, [])
             low_season = 0 if series.identified_by == 'ep' else -1
 
-            latest_season = get_latest_release(series)
+            latest_season = self.latest_release(series, episodes)
             if latest_season:
                 latest_season = latest_season.season
             else:
@@ -100,33 +135,29 @@ class EmitSeries(object):
                 for season in xrange(latest_season, low_season, -1):
                     log.debug('Adding episodes for season %d' % season)
                     check_downloaded = not config.get('backfill')
-                    latest = get_latest_release(series, season=season, downloaded=check_downloaded)
+                    latest = self.latest_release(series, episodes, season=season, downloaded=check_downloaded)
                     if series.begin and (not latest or latest < series.begin):
                         entries.append(self.search_entry(series, series.begin.season, series.begin.number, task))
                     elif latest:
                         start_at_ep = 1
-                        episodes_this_season = (task.session.query(Episode).
-                                                filter(Episode.series_id == series.id).
-                                                filter(Episode.season == season))
+                        episodes_this_season = [info for info in episodes if info[0].season == season]
                         if series.identified_by == 'sequence':
                             # Don't look for missing too far back with sequence shows
                             start_at_ep = max(latest.number - 10, 1)
-                            episodes_this_season = episodes_this_season.filter(Episode.number >= start_at_ep)
-                        latest_ep_this_season = episodes_this_season.order_by(desc(Episode.number)).first()
-                        downloaded_this_season = (episodes_this_season.join(Episode.releases).
-                                                filter(Release.downloaded == True).all())
+                            episodes_this_season = [info for info in episodes_this_season
+                                                    if info[0].number >= start_at_ep]
+                        latest_ep_this_season, has_releases, _ = max(episodes_this_season,
+                                                                     key=lambda info: info[0].number)
+                        downloaded_this_season = set(ep.number for ep, _, downloaded in episodes_this_season
+                                                     if downloaded)
                         # Calculate the episodes we still need to get from this season
                         if series.begin and series.begin.season == season:
                             start_at_ep = max(start_at_ep, series.begin.number)
-                        eps_to_get = range(start_at_ep, latest_ep_this_season.number + 1)
-                        for ep in downloaded_this_season:
-                            try:
-                                eps_to_get.remove(ep.number)
-                            except ValueError:
-                                pass
+                        eps_to_get = [ep for ep in xrange(start_at_ep, latest_ep_this_season.number + 1)
+                                      if ep not in downloaded_this_season]
                         entries.extend(self.search_entry(series, season, x, task, rerun=False) for x in eps_to_get)
                         # If we have already downloaded the latest known episode, try the next episode
-                        if latest_ep_this_season.releases:
+                        if has_releases:
                             entries.append(self.search_entry(series, season, latest_ep_this_season.number + 1, task))
                     else:
                         if config.get('from_start') or config.get('backfill'):
@@ -167,4 +198,4 @@ class EmitSeries(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(EmitSeries, 'emit_series', api_ver=2)
+    plugin.register(EmitSeries, 'emit_series', api_ver=2, locks=['series'])
@@ -2,7 +2,6 @@ from __future__ import unicode_literals, division, absolute_import
 from datetime import datetime
 import logging
 import re
-import sys
 
 from path import path
 
@@ -11,6 +10,7 @@ from flexget.config_schema import one_or_more
 from flexget.event import event
 from flexget.entry import Entry
 from flexget.utils.cached_input import cached
+from flexget.utils.fsindex import scan
 
 log = logging.getLogger('find')
 
@@ -69,32 +69,20 @@ class InputFind(object):
         for folder in config['path']:
             folder = path(folder).expanduser()
             log.debug('scanning %s' % folder)
-            if config['recursive']:
-                files = folder.walk(errors='warn')
-            else:
-                files = folder.listdir()
-            for item in files:
-                e = Entry()
-                try:
-                    # TODO: config for listing files/dirs/both
-                    if item.isdir():
-                        continue
-                except UnicodeError as e:
-                    log.warning('Filename `%s` in `%s` is not decodable by declared filesystem encoding `%s`. '
-                                'Either your environment does not declare the correct encoding, or this filename '
-                                'is incorrectly encoded.' %
-                                (item.name, item.dirname(), sys.getfilesystemencoding()))
+            for info in scan(task.session, folder, recursive=config['recursive']):
+                # TODO: config for listing files/dirs/both
+                if info.isdir:
                     continue
-
-
+                item = info.path
+                e = Entry()
                 e['title'] = item.namebase
                 # If mask fails continue
                 if not match(item.name):
                     continue
                 try:
-                    e['timestamp'] = datetime.fromtimestamp(item.getmtime())
-                except ValueError as e:
-                    log.debug('Error setting timestamp for %s: %s' % (item, e))
+                    e['timestamp'] = datetime.fromtimestamp(info.mtime)
+                except (TypeError, ValueError) as err:
+                    log.debug('Error setting timestamp for %s: %s' % (item, err))
                 e['location'] = item
                 # Windows paths need an extra / prepended to them for url
                 if not item.startswith('/'):
@@ -105,4 +93,4 @@ class InputFind(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(InputFind, 'find', api_ver=2)
+    plugin.register(InputFind, 'find', api_ver=2, locks=['fsindex'])
@@ -24,39 +24,48 @@ class PluginInputs(object):
     }
 
     def on_task_input(self, task, config):
-        entries = []
-        entry_titles = set()
-        entry_urls = set()
+        inputs = []
         for item in config:
             for input_name, input_config in item.iteritems():
                 input = plugin.get_plugin_by_name(input_name)
                 if input.api_ver == 1:
                     raise plugin.PluginError('Plugin %s does not support API v2' % input_name)
+                inputs.append((input_name, input, input_config))
+
+        def run_input(item):
+            input_name, input, input_config = item
+            method = input.phase_handlers['input']
+            try:
+                result = method(task, input_config)
+                return list(result) if result else result
+            except plugin.PluginError as e:
+                log.warning('Error during input plugin %s: %s' % (input_name, e))
 
-                method = input.phase_handlers['input']
-                try:
-                    result = method(task, input_config)
-                except plugin.PluginError as e:
-                    log.warning('Error during input plugin %s: %s' % (input_name, e))
+        # Inputs may be ran in parallel, results are still merged in configured order
+        results = task.run_parallel(run_input, inputs)
+
+        entries = []
+        entry_titles = set()
+        entry_urls = set()
+        for (input_name, input, input_config), result in zip(inputs, results):
+            if not result:
+                msg = 'Input %s did not return anything' % input_name
+                if getattr(task, 'no_entries_ok', False):
+                    log.verbose(msg)
+                else:
+                    log.warning(msg)
+                continue
+            for entry in result:
+                if entry['title'] in entry_titles:
+                    log.debug('Title `%s` already in entry list, skipping.' % entry['title'])
                     continue
-                if not result:
-                    msg = 'Input %s did not return anything' % input_name
-                    if getattr(task, 'no_entries_ok', False):
-                        log.verbose(msg)
-                    else:
-                        log.warning(msg)
+                urls = ([entry['url']] if entry.get('url') else []) + entry.get('urls', [])
+                if any(url in entry_urls for url in urls):
+                    log.debug('URL for `%s` already in entry list, skipping.' % entry['title'])
                     continue
-                for entry in result:
-                    if entry['title'] in entry_titles:
-                        log.debug('Title `%s` already in entry list, skipping.' % entry['title'])
-                        continue
-                    urls = ([entry['url']] if entry.get('url') else []) + entry.get('urls', [])
-                    if any(url in entry_urls for url in urls):
-                        log.debug('URL for `%s` already in entry list, skipping.' % entry['title'])
-                        continue
-                    entries.append(entry)
-                    entry_titles.add(entry['title'])
-                    entry_urls.update(urls)
+                entries.append(entry)
+                entry_titles.add(entry['title'])
+                entry_urls.update(urls)
         return entries
 
 
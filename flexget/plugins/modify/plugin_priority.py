@@ -54,4 +54,4 @@ class PluginPriority(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(PluginPriority, 'plugin_priority', api_ver=2)
+    plugin.register(PluginPriority, 'plugin_priority', api_ver=2, locks=['*'])
@@ -83,7 +83,7 @@ class TorrentFilename(object):
         """Build a filename for this torrent"""
 
         title = entry['title']
-        files = torrent.get_filelist()
+        files = torrent.files
         if len(files) == 1:
             # single file, if filename is longer than title use it
             fn = files[0]['name']
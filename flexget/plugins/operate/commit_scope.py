@@ -0,0 +1,42 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+
+from flexget import plugin
+from flexget.event import event
+
+log = logging.getLogger('commit_scope')
+
+
+class CommitScope(object):
+    """
+    Changes how often database changes made by the plugins of the task are committed. By default they are committed
+    after each plugin has ran. With `phase` or `task` they are committed once after each phase or once at the end
+    of the task, which is considerably faster for tasks with many plugins. Changes of a plugin which fails are
+    still rolled back without affecting the others.
+
+    Example::
+
+      commit_scope: phase
+
+    Grouping is not used if the `database` config section has `pool_size` set.
+
+    Once grouped changes have been written, the database is locked from other writers until they are committed.
+    Other tasks wait at most 10 seconds for it, so with `max_concurrent_tasks` above 1 `task` is turned into
+    `phase`, and tasks with slow phases (eg. downloading) are better left committing after each plugin.
+    """
+
+    schema = {'type': 'string', 'enum': ['plugin', 'phase', 'task']}
+
+    @plugin.priority(255)
+    def on_task_start(self, task, config):
+        if config == 'task' and task.manager.config.get('max_concurrent_tasks', 1) > 1:
+            log.verbose('Tasks are ran concurrently, committing database changes once per phase instead of once per '
+                        'task so that other tasks are not locked out of the database.')
+            config = 'phase'
+        task.commit_scope = config
+        log.debug('committing database changes once per %s' % config)
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(CommitScope, 'commit_scope', api_ver=2)
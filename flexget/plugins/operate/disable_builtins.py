@@ -57,4 +57,4 @@ class PluginDisableBuiltins(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(PluginDisableBuiltins, 'disable_builtins', api_ver=2)
+    plugin.register(PluginDisableBuiltins, 'disable_builtins', api_ver=2, locks=['*'])
@@ -0,0 +1,37 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+
+from flexget import plugin
+from flexget.event import event
+
+log = logging.getLogger('parallel_inputs')
+
+
+class ParallelInputs(object):
+    """
+    Runs input plugins of the task (and inputs configured with the `inputs` plugin) in parallel threads.
+    Entries are still added in the configured order.
+
+    Example::
+
+      parallel_inputs: yes
+
+    Number of threads can also be given, `yes` uses 4 threads::
+
+      parallel_inputs: 8
+    """
+
+    schema = {'oneOf': [{'type': 'boolean'}, {'type': 'integer', 'minimum': 1}]}
+
+    def on_task_start(self, task, config):
+        if config is True:
+            config = 4
+        elif config is False:
+            config = 1
+        task.input_workers = config
+        log.debug('running inputs with %s threads' % config)
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(ParallelInputs, 'parallel_inputs', api_ver=2)
@@ -73,4 +73,4 @@ class QueueMovies(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(QueueMovies, 'queue_movies', api_ver=2)
+    plugin.register(QueueMovies, 'queue_movies', api_ver=2, locks=['movie_queue'])
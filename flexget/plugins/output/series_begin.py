@@ -39,4 +39,4 @@ class SetSeriesBegin(object):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(SetSeriesBegin, 'set_series_begin', api_ver=2)
+    plugin.register(SetSeriesBegin, 'set_series_begin', api_ver=2, locks=['series'])
@@ -108,4 +108,4 @@ class ConfigureSeries(FilterSeriesBase):
 
 @event('plugin.register')
 def register_plugin():
-    plugin.register(ConfigureSeries, 'configure_series', api_ver=2)
+    plugin.register(ConfigureSeries, 'configure_series', api_ver=2, locks=['series'])
@@ -1,5 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
+import threading
+from urlparse import urlparse
 
 from flexget import plugin
 from flexget.event import event
@@ -19,10 +21,17 @@ class UrlRewritingError(Exception):
 class PluginUrlRewriting(object):
     """
     Provides URL rewriting framework
+
+    Rewriters may declare the hostnames of urls they can rewrite in a `url_hosts` attribute, their `url_rewritable`
+    method is then only called for urls with those hostnames. Rewriters without it are checked for every url.
     """
 
     def __init__(self):
         self.disabled_rewriters = []
+        # (all rewriters, rewriters by host, rewriters for any host), replaced as a whole when rebuilt
+        self._index = ([], {}, [])
+        self._index_lock = threading.Lock()
+        self._plugin_count = None
 
     def on_task_urlrewrite(self, task, config):
         log.debug('Checking %s entries' % len(task.accepted))
@@ -34,10 +43,51 @@ class PluginUrlRewriting(object):
                 log.warn(e.value)
                 entry.fail()
 
+    def _build_index(self):
+        """Index urlrewriters by their declared hostnames, in the order they are ran."""
+        with self._index_lock:
+            plugin_count = len(plugin.plugins)
+            if plugin_count == self._plugin_count:
+                # Built by another thread meanwhile
+                return
+            rewriters = list(enumerate(plugin.get_plugins(group='urlrewriter')))
+            # Rewriters checked for urls of any host
+            any_host = []
+            hosts = {}
+            for position, urlrewriter in rewriters:
+                url_hosts = getattr(urlrewriter.instance, 'url_hosts', None)
+                if url_hosts is None:
+                    any_host.append((position, urlrewriter))
+                else:
+                    for host in url_hosts:
+                        hosts.setdefault(host.lower(), []).append((position, urlrewriter))
+            host_rewriters = dict((host, sorted(host_list + any_host)) for host, host_list in hosts.iteritems())
+            self._index = (rewriters, host_rewriters, any_host)
+            # Set last, other threads rebuild until the index is complete
+            self._plugin_count = plugin_count
+
+    def rewriters(self, url):
+        """
+        :param url: Url to be rewritten
+        :return: List of (position, PluginInfo) tuples of urlrewriters which may be able to rewrite `url`, in the
+            order they are ran.
+        """
+        if self._plugin_count != len(plugin.plugins):
+            self._build_index()
+        rewriters, host_rewriters, any_host = self._index
+        try:
+            hostname = urlparse(url).hostname
+        except ValueError:
+            hostname = None
+        if not hostname:
+            # Leave it up to the rewriters to decide what to do with weird urls
+            return rewriters
+        return host_rewriters.get(hostname, any_host)
+
     # API method
     def url_rewritable(self, task, entry):
         """Return True if entry is urlrewritable by registered rewriter."""
-        for urlrewriter in plugin.get_plugins(group='urlrewriter'):
+        for position, urlrewriter in self.rewriters(entry['url']):
             if urlrewriter.name in self.disabled_rewriters:
                 log.trace('Skipping rewriter %s since it\'s disabled' % urlrewriter.name)
                 continue
@@ -51,33 +101,51 @@ class PluginUrlRewriting(object):
     def url_rewrite(self, task, entry):
         """Rewrites given entry url. Raises UrlRewritingError if failed."""
         tries = 0
-        while self.url_rewritable(task, entry) and entry.accepted:
+        while entry.accepted:
+            if tries >= 20:
+                if self.url_rewritable(task, entry):
+                    raise UrlRewritingError('URL rewriting was left in infinite loop while rewriting url for %s, '
+                                            'some rewriter is returning always True' % entry)
+                return
+            # Run all the rewriters which can rewrite the url, stop when there are none
+            if not self._rewrite_pass(task, entry):
+                return
             tries += 1
-            if tries > 20:
-                raise UrlRewritingError('URL rewriting was left in infinite loop while rewriting url for %s, '
-                                        'some rewriter is returning always True' % entry)
-            for urlrewriter in plugin.get_plugins(group='urlrewriter'):
-                name = urlrewriter.name
-                if name in self.disabled_rewriters:
-                    log.trace('Skipping rewriter %s since it\'s disabled' % name)
-                    continue
-                try:
-                    if urlrewriter.instance.url_rewritable(task, entry):
-                        old_url = entry['url']
-                        log.debug('Url rewriting %s' % entry['url'])
-                        urlrewriter.instance.url_rewrite(task, entry)
-                        if entry['url'] != old_url:
-                            log.info('Entry \'%s\' URL rewritten to %s (with %s)' % (entry['title'], entry['url'], name))
-                except UrlRewritingError as r:
-                    # increase failcount
-                    #count = self.shared_cache.storedefault(entry['url'], 1)
-                    #count += 1
-                    raise UrlRewritingError('URL rewriting %s failed: %s' % (name, r.value))
-                except plugin.PluginError as e:
-                    raise UrlRewritingError('URL rewriting %s failed: %s' % (name, e.value))
-                except Exception as e:
-                    log.exception(e)
-                    raise UrlRewritingError('%s: Internal error with url %s' % (name, entry['url']))
+
+    def _rewrite_pass(self, task, entry):
+        """Runs each rewriter once, in order. Returns True if any of them rewrote the entry."""
+        rewritten = False
+        last_position = -1
+        while True:
+            # Url may have been changed by the previous rewriter, so candidates are looked up again
+            for position, urlrewriter in self.rewriters(entry['url']):
+                if position > last_position:
+                    break
+            else:
+                return rewritten
+            last_position = position
+            name = urlrewriter.name
+            if name in self.disabled_rewriters:
+                log.trace('Skipping rewriter %s since it\'s disabled' % name)
+                continue
+            try:
+                if urlrewriter.instance.url_rewritable(task, entry):
+                    rewritten = True
+                    old_url = entry['url']
+                    log.debug('Url rewriting %s' % entry['url'])
+                    urlrewriter.instance.url_rewrite(task, entry)
+                    if entry['url'] != old_url:
+                        log.info('Entry \'%s\' URL rewritten to %s (with %s)' % (entry['title'], entry['url'], name))
+            except UrlRewritingError as r:
+                # increase failcount
+                #count = self.shared_cache.storedefault(entry['url'], 1)
+                #count += 1
+                raise UrlRewritingError('URL rewriting %s failed: %s' % (name, r.value))
+            except plugin.PluginError as e:
+                raise UrlRewritingError('URL rewriting %s failed: %s' % (name, e.value))
+            except Exception as e:
+                log.exception(e)
+                raise UrlRewritingError('%s: Internal error with url %s' % (name, entry['url']))
 
 
 class DisableUrlRewriter(object):
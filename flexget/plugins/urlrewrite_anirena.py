@@ -10,6 +10,8 @@ log = logging.getLogger('anirena')
 class UrlRewriteAniRena(object):
     """AniRena urlrewriter."""
 
+    url_hosts = ['www.anirena.com']
+
     def url_rewritable(self, task, entry):
         return entry['url'].startswith('http://www.anirena.com/viewtracker.php?action=details&id=')
 
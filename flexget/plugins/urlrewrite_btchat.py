@@ -10,6 +10,8 @@ log = logging.getLogger("btchat")
 class UrlRewriteBtChat(object):
     """BtChat urlrewriter."""
 
+    url_hosts = ['www.bt-chat.com']
+
     def url_rewritable(self, task, entry):
         return entry['url'].startswith('http://www.bt-chat.com/download.php')
 
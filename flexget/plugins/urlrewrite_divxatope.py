@@ -14,6 +14,8 @@ log = logging.getLogger('divxatope')
 class UrlRewriteDivxATope(object):
     """divxatope urlrewriter."""
 
+    url_hosts = ['www.divxatope.com', 'divxatope.com']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
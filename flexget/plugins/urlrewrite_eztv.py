@@ -21,6 +21,8 @@ EZTV_MIRRORS = [
 class UrlRewriteEztv(object):
     """Eztv url rewriter."""
 
+    url_hosts = ['eztv.it']
+
     def url_rewritable(self, task, entry):
         return urlparse(entry['url']).netloc == 'eztv.it'
 
@@ -21,6 +21,8 @@ requests.set_domain_delay('imdb.com', '2 seconds')
 class UrlRewriteGoogleCse(object):
     """Google custom query urlrewriter."""
 
+    url_hosts = ['www.google.com']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         if entry['url'].startswith('http://www.google.com/cse?'):
@@ -56,6 +58,8 @@ class UrlRewriteGoogleCse(object):
 
 class UrlRewriteGoogle(object):
 
+    url_hosts = ['www.google.com']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         if entry['url'].startswith('https://www.google.com/search?q='):
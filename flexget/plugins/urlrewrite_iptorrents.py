@@ -83,6 +83,8 @@ class UrlRewriteIPTorrents(object):
         'additionalProperties': False
     }
 
+    url_hosts = ['iptorrents.com']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
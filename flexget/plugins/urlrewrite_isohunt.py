@@ -42,6 +42,8 @@ class UrlRewriteIsoHunt(object):
                  'unclassified', 'all']
     }
 
+    url_hosts = ['isohunt.com']
+
     def url_rewritable(self, task, entry):
         url = entry['url']
         # search is not supported
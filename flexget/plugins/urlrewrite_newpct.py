@@ -18,6 +18,8 @@ requests.set_domain_delay('imdb.com', '2 seconds')
 class UrlRewriteNewPCT(object):
     """NewPCT urlrewriter."""
 
+    url_hosts = ['www.newpct.com', 'newpct.com', 'www.newpct1.com', 'newpct1.com']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
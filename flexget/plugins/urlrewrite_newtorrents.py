@@ -25,6 +25,8 @@ class NewTorrents:
     def __init__(self):
         self.resolved = []
 
+    url_hosts = ['www.newtorrents.info']
+
     # UrlRewriter plugin API
     def url_rewritable(self, task, entry):
         # Return true only for urls that can and should be resolved
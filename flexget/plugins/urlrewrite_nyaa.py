@@ -70,6 +70,8 @@ class UrlRewriteNyaa(object):
 
         return entries
 
+    url_hosts = ['www.nyaa.eu']
+
     def url_rewritable(self, task, entry):
         return entry['url'].startswith('http://www.nyaa.eu/?page=torrentinfo&tid=')
 
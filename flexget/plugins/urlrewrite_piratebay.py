@@ -62,6 +62,8 @@ class UrlRewritePirateBay(object):
         ]
     }
 
+    url_hosts = list('%sthepiratebay.%s' % (sub, tld) for sub in ['', 'torrents.'] for tld in TLDS.split('|'))
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
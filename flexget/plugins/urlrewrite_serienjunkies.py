@@ -37,6 +37,8 @@ class UrlRewriteSerienjunkies(object):
         'additionalProperties': False
     }
 
+    url_hosts = ['www.serienjunkies.org', 'serienjunkies.org']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
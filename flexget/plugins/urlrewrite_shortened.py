@@ -12,6 +12,8 @@ log = logging.getLogger('shortened')
 class UrlRewriteShortened(object):
     """Shortened url rewriter."""
 
+    url_hosts = ['bit.ly', 't.co']
+
     def url_rewritable(self, task, entry):
         return urlparse(entry['url']).netloc in ['bit.ly', 't.co']
 
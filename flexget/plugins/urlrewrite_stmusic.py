@@ -10,6 +10,8 @@ log = logging.getLogger("stmusic")
 class UrlRewriteSTMusic(object):
     """STMusic urlrewriter."""
 
+    url_hosts = ['www.stmusic.org']
+
     def url_rewritable(self, task, entry):
         return entry['url'].startswith('http://www.stmusic.org/details.php?id=')
 
@@ -262,6 +262,8 @@ class UrlRewriteTorrent411(object):
     }
 
 
+    url_hosts = ['t411.me', 'www.t411.me']
+
 #   urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
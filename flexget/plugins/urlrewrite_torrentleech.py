@@ -66,6 +66,8 @@ class UrlRewriteTorrentleech(object):
         'additionalProperties': False
     }
 
+    url_hosts = ['torrentleech.org']
+
     # urlrewriter API
     def url_rewritable(self, task, entry):
         url = entry['url']
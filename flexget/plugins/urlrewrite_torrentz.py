@@ -47,6 +47,8 @@ class UrlRewriteTorrentz(object):
             config['extra_terms'] = ' '+config['extra_terms']
         return config
 
+    url_hosts = ['torrentz.eu', 'torrentz.me']
+
     def url_rewritable(self, task, entry):
         return REGEXP.match(entry['url'])
 
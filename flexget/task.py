@@ -5,7 +5,9 @@ import hashlib
 import itertools
 import logging
 import threading
+from contextlib import contextmanager
 from functools import wraps
+from multiprocessing.pool import ThreadPool
 
 from sqlalchemy import Column, Integer, String, Unicode
 
@@ -17,8 +19,9 @@ from flexget.plugin import plugins as all_plugins
 from flexget.plugin import (
     DependencyError, get_plugins, phase_methods, plugin_schemas, PluginError, PluginWarning, task_phases)
 from flexget.utils import requests
-from flexget.utils.log import capture_output
+from flexget.utils.log import capture_thread_output
 from flexget.utils.simple_persistence import SimpleTaskPersistence
+from flexget.utils.sqlalchemy_utils import CommitGroup, commit_count
 
 log = logging.getLogger('task')
 Base = db_schema.versioned_base('feed', 0)
@@ -62,7 +65,7 @@ def use_task_logging(func):
 
         try:
             if self.output:
-                with capture_output(self.output):
+                with capture_thread_output(self.output):
                     return func(self, *args, **kw)
             else:
                 return func(self, *args, **kw)
@@ -150,6 +153,63 @@ class TaskAbort(Exception):
         return 'TaskAbort(reason=%s, silent=%s)' % (self.reason, self.silent)
 
 
+class TaskLocks(object):
+    """
+    Named locks shared by concurrently running tasks, see the `locks` argument of :class:`flexget.plugin.PluginInfo`.
+
+    A task acquires all locks it needs at once and never blocks waiting for locks while holding plugin locks, so
+    acquiring them can not deadlock. The special lock ``*`` is exclusive, it conflicts with all locks held by other
+    tasks. Plugins which modify global state (eg. other plugins) should use it.
+    """
+
+    exclusive = '*'
+
+    def __init__(self):
+        self._owners = {}
+        self._condition = threading.Condition()
+
+    def _available(self, names, owner):
+        for name, holder in self._owners.iteritems():
+            if holder is owner:
+                continue
+            if name in names or name == self.exclusive or self.exclusive in names:
+                return False
+        return True
+
+    def acquire(self, names, owner, blocking=True):
+        """
+        Acquire all `names` for `owner`.
+
+        :param bool blocking: If False, return False immediately if some of the locks are held by other owners.
+        :return: True if locks were acquired
+        """
+        with self._condition:
+            while not self._available(names, owner):
+                if not blocking:
+                    return False
+                self._condition.wait()
+            for name in names:
+                self._owners[name] = owner
+            return True
+
+    def release(self, names, owner):
+        with self._condition:
+            for name in names:
+                if self._owners.get(name) is owner:
+                    del self._owners[name]
+            self._condition.notify_all()
+
+    def held(self):
+        """Returns names of currently held locks."""
+        with self._condition:
+            return set(self._owners)
+
+
+task_locks = TaskLocks()
+# Kept apart from plugin locks, the exclusive lock must not wait for other tasks to complete
+task_name_locks = TaskLocks()
+
+
 class Task(object):
 
     """
@@ -179,6 +239,10 @@ class Task(object):
     """
 
     max_reruns = 5
+    # Number of threads input plugins are ran with, see :meth:`run_parallel`
+    input_workers = 1
+    # Database work is committed after each `plugin`, `phase` or the whole `task`, see :meth:`_plugin_session`
+    commit_scope = 'plugin'
     # Used to determine task order, when priority is the same
     _counter = itertools.count()
 
@@ -214,6 +278,8 @@ class Task(object):
         self.priority = priority
         self._count = next(self._counter)
         self.finished_event = threading.Event()
+        # session and current_plugin are per thread, input plugins may be ran in parallel
+        self._local = threading.local()
 
         # simple persistence
         self.simple_persistence = SimpleTaskPersistence(self)
@@ -240,9 +306,15 @@ class Task(object):
 
         self.disabled_phases = []
 
+        self._commit_group = None
+        # Number of database commits done by each phase
+        self.commit_counts = {}
+
         # current state
         self.current_phase = None
         self.current_plugin = None
+        # plugin locks currently held by this task
+        self._locks = set()
 
     @property
     def undecided(self):
@@ -341,6 +413,23 @@ class Task(object):
                 return entry
         return None
 
+    @property
+    def session(self):
+        """Database session for the currently running plugin."""
+        return getattr(self._local, 'session', None)
+
+    @session.setter
+    def session(self, value):
+        self._local.session = value
+
+    @property
+    def current_plugin(self):
+        return getattr(self._local, 'current_plugin', None)
+
+    @current_plugin.setter
+    def current_plugin(self, value):
+        self._local.current_plugin = value
+
     def plugins(self, phase=None):
         """Get currently enabled plugins.
 
@@ -355,6 +444,52 @@ class Task(object):
             plugins = all_plugins.itervalues()
         return (p for p in plugins if p.name in self.config or p.builtin)
 
+    def _required_locks(self, phase=None):
+        """Returns locks of enabled plugins which have a handler in `phase` or any phase before it, or in any phase."""
+        phases = task_phases[:task_phases.index(phase) + 1] if phase else task_phases
+        locks = set()
+        for plugin in self.plugins():
+            if plugin.locks and any(p in plugin.phase_handlers for p in phases):
+                needs_locks = getattr(plugin.instance, 'needs_locks', None)
+                if needs_locks is None or needs_locks(self):
+                    locks.update(plugin.locks)
+        return locks
+
+    def holds_lock(self, name):
+        """Returns True if the task currently holds plugin lock `name`."""
+        return name in self._locks
+
+    def _acquire_locks(self, phase):
+        """
+        Makes sure the task holds the locks of all plugins which have run, or will run in `phase`.
+        Locks of all phases are acquired together before the first phase which needs one, and held until the task
+        execution is completed. Other tasks never see the state between phases, eg. entries filtered but not learned.
+        """
+        if phase not in task_phases:
+            return
+        if self._required_locks(phase) <= self._locks:
+            return
+        required = self._required_locks()
+        # Other tasks may need to write to the database before they release the locks
+        self._end_commit_group()
+        if not self._locks:
+            log.trace('acquiring locks %s' % ', '.join(sorted(required)))
+            task_locks.acquire(required, self)
+        elif not task_locks.acquire(required - self._locks, self, blocking=False):
+            # Config was changed after locks were acquired (eg. by a plugin in a phase needing locks).
+            # Never block while holding locks, release ours and wait for all of them at once
+            log.warning('locks %s are in use, releasing %s until they can be acquired' %
+                        (', '.join(sorted(required - self._locks)), ', '.join(sorted(self._locks))))
+            task_locks.release(self._locks, self)
+            self._locks = set()
+            task_locks.acquire(required, self)
+        self._locks.update(required)
+
+    def _release_locks(self):
+        if self._locks:
+            task_locks.release(self._locks, self)
+            self._locks = set()
+
     def __run_task_phase(self, phase):
         """Executes task phase, ie. call all enabled plugins on the task.
 
@@ -381,10 +516,32 @@ class Task(object):
                     else:
                         log.warning('Task doesn\'t have any %s plugins, you should add (at least) one!' % phase)
 
+        self._acquire_locks(phase)
+        commits = commit_count()
+        try:
+            if phase == 'input' and self.input_workers > 1 and len(list(self.plugins('input'))) > 1:
+                # Sessions of other threads would have to wait for the group
+                self._end_commit_group()
+                self.__run_input_parallel()
+                return
+            if self.commit_scope != 'plugin':
+                self._begin_commit_group()
+            try:
+                self.__run_phase_plugins(phase)
+            finally:
+                if self.commit_scope == 'phase':
+                    self._end_commit_group()
+        finally:
+            self.commit_counts[phase] = self.commit_counts.get(phase, 0) + commit_count() - commits
+
+    def __run_phase_plugins(self, phase):
         for plugin in self.plugins(phase):
             # Abort this phase if one of the plugins disables it
             if phase in self.disabled_phases:
                 return
+            # Config may have been changed by previous plugins (eg. templates), so their locks are checked again
+            if not plugin.locks <= self._locks:
+                self._acquire_locks(phase)
             # store execute info, except during entry events
             self.current_phase = phase
             self.current_plugin = plugin.name
@@ -398,7 +555,7 @@ class Task(object):
                 args = (self, copy.copy(self.config.get(plugin.name)))
 
             # Hack to make task.session only active for a single plugin
-            with Session() as session:
+            with self._plugin_session() as session:
                 self.session = session
                 try:
                     fire_event('task.execute.before_plugin', self, plugin.name)
@@ -412,6 +569,105 @@ class Task(object):
                     fire_event('task.execute.after_plugin', self, plugin.name)
                 self.session = None
 
+    @contextmanager
+    def _plugin_session(self):
+        """
+        Session for a plugin, committed when the plugin has ran. With :attr:`commit_scope` `phase` or `task`, commits
+        are grouped in a single transaction instead, and only the changes of a failing plugin are rolled back.
+        """
+        if self._commit_group is None:
+            with Session() as session:
+                yield session
+            return
+        with self._commit_group.savepoint():
+            with Session(bind=self._commit_group.connection) as session:
+                yield session
+
+    def _begin_commit_group(self):
+        if self._commit_group is not None:
+            return
+        if not CommitGroup.supported(self.manager.engine):
+            log.debug('database connection pool does not support grouped commits, committing after each plugin')
+            self.commit_scope = 'plugin'
+            return
+        self._commit_group = CommitGroup(self.manager.engine)
+
+    def _end_commit_group(self, phase=None):
+        """
+        :param phase: Count the commit for this phase, when it is not done within a phase
+        """
+        if self._commit_group is None:
+            return
+        group, self._commit_group = self._commit_group, None
+        commits = commit_count()
+        group.commit()
+        if phase:
+            self.commit_counts[phase] = self.commit_counts.get(phase, 0) + commit_count() - commits
+
+    def __run_input_parallel(self):
+        """Runs all input plugins with :meth:`run_parallel`, entries are added in the order of plugins."""
+        plugins = list(self.plugins('input'))
+        self.current_phase = 'input'
+
+        def run(plugin):
+            # Plugins not yet started are skipped if one of the others disables the phase
+            if 'input' in self.disabled_phases:
+                return
+            self.current_plugin = plugin.name
+            args = (self,) if plugin.api_ver == 1 else (self, copy.copy(self.config.get(plugin.name)))
+            fire_event('task.execute.before_plugin', self, plugin.name)
+            try:
+                response = self.__run_plugin(plugin, 'input', args)
+                # Consume possible generators while the plugin session is still open
+                return list(response) if response else response
+            finally:
+                fire_event('task.execute.after_plugin', self, plugin.name)
+
+        for response in self.run_parallel(run, plugins):
+            if response:
+                for e in response:
+                    e.task = self
+                self.all_entries.extend(response)
+
+    def run_parallel(self, func, items):
+        """
+        Calls `func` for each of the `items` in a pool of :attr:`input_workers` threads. :attr:`session` is a new
+        database session for each threaded call. Without more than one worker the calls are made in order, using the
+        current :attr:`session`.
+
+        :return: List of results in the same order as `items`. If calls raised exceptions, the first one (in order of
+            `items`) is re-raised after all calls have completed.
+        """
+        from flexget import logger
+        output = logger.get_output()
+        # Eg. simple persistence is stored by the plugin which runs the calls
+        current_plugin = self.current_plugin
+
+        def threaded_call(item):
+            logger.set_task(self.name)
+            logger.set_output(output)
+            old_session, old_plugin = self.session, self.current_plugin
+            self.current_plugin = current_plugin
+            with Session() as session:
+                self.session = session
+                try:
+                    return func(item)
+                finally:
+                    self.session, self.current_plugin = old_session, old_plugin
+
+        items = list(items)
+        workers = min(self.input_workers, len(items))
+        if workers < 2:
+            return [func(item) for item in items]
+        log.debug('running %s calls with %s threads' % (len(items), workers))
+        pool = ThreadPool(workers)
+        try:
+            async_results = [pool.apply_async(threaded_call, (item,)) for item in items]
+        finally:
+            pool.close()
+            pool.join()
+        return [result.get() for result in async_results]
+
     def __run_plugin(self, plugin, phase, args=None, kwargs=None):
         """
         Execute given plugins phase method, with supplied args and kwargs.
@@ -555,7 +811,11 @@ class Task(object):
         else:
             for entry in self.all_entries:
                 entry.complete()
+            self._end_commit_group(phase='task')
             fire_event('task.execute.completed', self)
+        finally:
+            self._end_commit_group(phase='task')
+            self._release_locks()
 
     @use_task_logging
     def execute(self):
@@ -571,6 +831,9 @@ class Task(object):
           of running input phase.
         """
 
+        # The same task is never ran concurrently
+        name_lock = set([self.name])
+        task_name_locks.acquire(name_lock, self)
         try:
             if self.options.cron:
                 self.manager.db_cleanup()
@@ -587,6 +850,7 @@ class Task(object):
                 else:
                     break
         finally:
+            task_name_locks.release(name_lock, self)
             self.finished_event.set()
 
     @staticmethod
@@ -600,6 +864,7 @@ class Task(object):
         new = type(self)(self.manager, self.name, self.config, self.options)
         # Update all the variables of new instance to match our own
         new.__dict__.update(self.__dict__)
+        new._local = threading.local()
         # Some mutable objects need to be copies
         new.options = copy.copy(self.options)
         new.config = copy.deepcopy(self.config)
@@ -5,6 +5,8 @@ import Queue
 import threading
 import time
 
+from flexget import config_schema
+from flexget.event import event
 from flexget.task import TaskAbort
 
 log = logging.getLogger('task_queue')
@@ -12,21 +14,35 @@ log = logging.getLogger('task_queue')
 
 class TaskQueue(object):
     """
-    Task processing thread.
-    Only executes one task at a time, if more are requested they are queued up and run in turn.
+    Task processing threads.
+    Tasks are run in priority order by a pool of worker threads. By default only one task is executed at a time, if
+    more are requested they are queued up and run in turn. Tasks running concurrently are kept from conflicting by
+    the locks declared by their plugins, see :class:`flexget.task.TaskLocks`.
     """
     def __init__(self):
         self.run_queue = Queue.PriorityQueue()
         self._shutdown_now = False
         self._shutdown_when_finished = False
+        # Number of tasks being executed, tasks are not started while the lock is held
+        self._running = 0
+        self._running_lock = threading.Lock()
 
         # We don't override `threading.Thread` because debugging this seems unsafe with pydevd.
         # Overriding __len__(self) seems to cause a debugger deadlock.
-        self._thread = threading.Thread(target=self.run, name='task_queue')
-        self._thread.daemon = True
+        self._threads = []
 
-    def start(self):
-        self._thread.start()
+    def start(self, max_workers=1):
+        """
+        :param int max_workers: Maximum number of tasks to run concurrently
+        """
+        for i in xrange(max(max_workers, 1)):
+            name = 'task_queue' if not i else 'task_queue_%d' % i
+            thread = threading.Thread(target=self.run, name=name)
+            thread.daemon = True
+            self._threads.append(thread)
+            thread.start()
+        if len(self._threads) > 1:
+            log.debug('started %s task queue workers' % len(self._threads))
 
     def run(self):
         try:
@@ -38,11 +54,15 @@ class TaskQueue(object):
                     if self._shutdown_when_finished:
                         self._shutdown_now = True
                     continue
+                with self._running_lock:
+                    self._running += 1
                 try:
                     task.execute()
                 except TaskAbort as e:
                     log.debug('task %s aborted: %r' % (task.name, e))
                 finally:
+                    with self._running_lock:
+                        self._running -= 1
                     self.run_queue.task_done()
             remaining_jobs = self.run_queue.qsize()
             if remaining_jobs:
@@ -60,6 +80,21 @@ class TaskQueue(object):
     def __len__(self):
         return self.run_queue.qsize()
 
+    def run_if_idle(self, func):
+        """
+        Calls `func` if no task is being executed, no task is started until it returns.
+
+        :return: True if `func` was called
+        """
+        with self._running_lock:
+            if self._running:
+                return False
+            func()
+            return True
+
+    def is_alive(self):
+        return any(thread.is_alive() for thread in self._threads)
+
     def shutdown(self, finish_queue=True):
         """
         Request shutdown.
@@ -77,15 +112,20 @@ class TaskQueue(object):
 
     def wait(self):
         """
-        Waits for the thread to exit.
+        Waits for the threads to exit.
         Allows abortion of task queue with ctrl-c
         """
         try:
-            while self._thread.is_alive():
+            while self.is_alive():
                 time.sleep(0.5)
         except KeyboardInterrupt:
-            log.error('Got ctrl-c, shutting down after running task (if any) completes')
+            log.error('Got ctrl-c, shutting down after running tasks (if any) complete')
             self.shutdown(finish_queue=False)
             # We still wait to finish cleanly, pressing ctrl-c again will abort
-            while self._thread.is_alive():
+            while self.is_alive():
                 time.sleep(0.5)
+
+
+@event('config.register')
+def register_config():
+    config_schema.register_config_key('max_concurrent_tasks', {'type': 'integer', 'minimum': 1})
@@ -1,8 +1,8 @@
 from flask import request, jsonify, Blueprint, Response, flash
 
 import flexget
-from flexget.config_schema import resolve_ref, process_config, get_schema
-from flexget.manager import manager
+from flexget.config_schema import resolve_ref, get_schema
+from flexget.manager import ConfigError, manager
 from flexget.options import get_parser
 from flexget.plugin import plugin_schemas
 from flexget.utils.tools import BufferQueue
@@ -139,6 +139,18 @@ def cs_root():
     return jsonify(hyper_schema)
 
 
+def update_config(config):
+    """
+    Validate and install new `config`. Only the parts which differ from the current config are validated.
+
+    :returns: Error response if the config is not valid, None otherwise
+    """
+    try:
+        manager.update_config(config)
+    except ConfigError as e:
+        return jsonify({'$errors': [{'path': error.json_pointer, 'message': error.message} for error in e.errors]}), 400
+
+
 # TODO: none of these should allow setting invalid config
 @api.route('/config/', methods=['GET', 'PUT'])
 def config_root():
@@ -153,11 +165,11 @@ def schema_config_section(section):
 @api.route('/config/<section>/', methods=['GET', 'PUT', 'DELETE'])
 def config_section(section):
     if request.method == 'PUT':
-        schema = resolve_ref('/schema/config/%s' % section)
-        errors = process_config(request.json, schema, set_defaults=False)
-        if errors:
-            return jsonify({'$errors': errors}), 400
-        manager.config[section] = request.json
+        config = dict(manager.config)
+        config[section] = request.json
+        error_response = update_config(config)
+        if error_response:
+            return error_response
     if section not in manager.config:
         return jsonify(error='Not found'), 404
     if request.method == 'DELETE':
@@ -180,7 +192,12 @@ def config_tasks(taskname):
             pass  # TODO: Rename the task, return 204 with new location header
         if taskname not in manager.config['tasks']:
             status_code = 201
-        manager.config['tasks'][taskname] = request.json
+        config = dict(manager.config)
+        config['tasks'] = dict(config['tasks'])
+        config['tasks'][taskname] = request.json
+        error_response = update_config(config)
+        if error_response:
+            return error_response
     elif request.method == 'DELETE':
         del manager.config['tasks'][taskname]
         return Response(status=204)
@@ -10,7 +10,8 @@ from flexget.ui.webui import register_plugin, db_session, app
 from flexget.ui.utils import pretty_date
 
 try:
-    from flexget.plugins.filter.series import Series, Episode, Release, forget_series, forget_series_episode
+    from flexget.plugins.filter.series import (Series, Episode, Release, forget_series, forget_series_episode,
+                                               update_series_summaries)
 except ImportError:
     raise DependencyError(issued_by='ui.series', missing='series')
 
@@ -62,14 +63,18 @@ def episodes(name):
 
 @series_module.route('/mark/downloaded/<int:rel_id>')
 def mark_downloaded(rel_id):
-    db_session.query(Release).get(rel_id).downloaded = True
+    release = db_session.query(Release).get(rel_id)
+    release.downloaded = True
+    update_series_summaries(db_session, [release.episode.series])
     db_session.commit()
     return redirect('/series')
 
 
 @series_module.route('/mark/not_downloaded/<int:rel_id>')
 def mark_not_downloaded(rel_id):
-    db_session.query(Release).get(rel_id).downloaded = False
+    release = db_session.query(Release).get(rel_id)
+    release.downloaded = False
+    update_series_summaries(db_session, [release.episode.series])
     db_session.commit()
     return redirect('/series')
 
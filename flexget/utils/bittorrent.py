@@ -1,9 +1,9 @@
 """Torrenting utils, mostly for handling bencoding and torrent files."""
-# Torrent decoding is a short fragment from effbot.org. Site copyright says:
-# Test scripts and other short code fragments can be considered as being in the public domain.
 from __future__ import unicode_literals, division, absolute_import
-import re
+from collections import Sequence
+import hashlib
 import logging
+import re
 
 log = logging.getLogger('torrent')
 
@@ -86,57 +86,155 @@ def is_torrent_file(metafilepath):
     return bool(magic_marker)
 
 
-def tokenize(text, match=re.compile("([idel])|(\d+):|(-?\d+)").match):
-    i = 0
-    while i < len(text):
-        m = match(text, i)
-        s = m.group(m.lastindex)
-        i = m.end()
-        if m.lastindex == 2:
-            yield b"s"
-            yield text[i:i + int(s)]
-            i += int(s)
+def _decode_text(data):
+    # Strings in torrent file are defined as utf-8 encoded
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        # The pieces field is a byte string, and should be left as such.
+        return data
+
+
+def _string_end(data, pos):
+    """Returns tuple (start, end) of the contents of string at `pos`."""
+    colon = data.find(b':', pos)
+    if colon == -1:
+        raise ValueError('invalid string at position %d' % pos)
+    start = colon + 1
+    end = start + int(data[pos:colon])
+    if end > len(data) or end < start:
+        raise ValueError('string at position %d runs past end of data' % pos)
+    return start, end
+
+
+def _int_end(data, pos):
+    """Returns tuple (value, end) of integer at `pos`."""
+    end = data.find(b'e', pos)
+    if end == -1:
+        raise ValueError('invalid integer at position %d' % pos)
+    return int(data[pos + 1:end]), end + 1
+
+
+def _skip(data, pos):
+    """Returns the position after the value at `pos`, without decoding anything."""
+    depth = 0
+    while True:
+        token = data[pos]
+        if token == b'e':
+            if not depth:
+                raise ValueError('unexpected end of container at position %d' % pos)
+            depth -= 1
+            pos += 1
+        elif token == b'l' or token == b'd':
+            depth += 1
+            pos += 1
+            continue
+        elif token == b'i':
+            pos = _int_end(data, pos)[1]
         else:
-            yield s
-
-
-def decode_item(next, token):
-    if token == b"i":
-        # integer: "i" value "e"
-        data = int(next())
-        if next() != b"e":
-            raise ValueError
-    elif token == b"s":
-        # string: "s" value (virtual tokens)
-        data = next()
-        # Strings in torrent file are defined as utf-8 encoded
-        try:
-            data = data.decode('utf-8')
-        except UnicodeDecodeError as e:
-            # The pieces field is a byte string, and should be left as such.
-            pass
-    elif token == b"l" or token == b"d":
-        # container: "l" (or "d") values "e"
-        data = []
-        tok = next()
-        while tok != b"e":
-            data.append(decode_item(next, tok))
-            tok = next()
-        if token == b"d":
-            data = dict(zip(data[0::2], data[1::2]))
-    else:
-        raise ValueError
+            pos = _string_end(data, pos)[1]
+        if not depth:
+            return pos
+
+
+def _decode(data, pos):
+    """Decodes the value at `pos`. Returns tuple (value, position after value)."""
+    token = data[pos]
+    if token.isdigit():
+        start, end = _string_end(data, pos)
+        return _decode_text(data[start:end]), end
+    # Containers being built, as (is_dict, items) tuples
+    stack = []
+    while True:
+        token = data[pos]
+        if token == b'e':
+            if not stack:
+                raise ValueError('unexpected end of container at position %d' % pos)
+            is_dict, items = stack.pop()
+            value = dict(zip(items[0::2], items[1::2])) if is_dict else items
+            pos += 1
+        elif token == b'l' or token == b'd':
+            stack.append((token == b'd', []))
+            pos += 1
+            continue
+        elif token == b'i':
+            value, pos = _int_end(data, pos)
+        else:
+            start, pos = _string_end(data, pos)
+            value = _decode_text(data[start:pos])
+        if not stack:
+            return value, pos
+        stack[-1][1].append(value)
+
+
+def _dict_spans(data, pos, nested=None):
+    """
+    Scans the dictionary at `pos` without decoding its values.
+
+    :param nested: Key whose value, if it is a dictionary, is scanned too. Its span gets the spans of the nested
+        dictionary as third item.
+    :return: Tuple (dict of key: (start, end) span of the value, position after the dictionary)
+    """
+    if data[pos] != b'd':
+        raise ValueError('expected dictionary at position %d' % pos)
+    pos += 1
+    spans = {}
+    while data[pos] != b'e':
+        key, pos = _decode(data, pos)
+        if key == nested and data[pos] == b'd':
+            nested_spans, end = _dict_spans(data, pos)
+            spans[key] = (pos, end, nested_spans)
+        else:
+            end = _skip(data, pos)
+            spans[key] = (pos, end)
+        pos = end
+    return spans, pos + 1
+
+
+def _file_spans(data, pos):
+    """
+    Scans the files list of info dictionary at `pos`.
+
+    :return: List of (start, end, length) tuples for each file, only the lengths are decoded.
+    """
+    if data[pos] != b'l':
+        raise ValueError('expected list at position %d' % pos)
+    pos += 1
+    files = []
+    while data[pos] != b'e':
+        if data[pos] != b'd':
+            raise ValueError('expected dictionary at position %d' % pos)
+        start = pos
+        length = None
+        pos += 1
+        while data[pos] != b'e':
+            key_start, pos = _string_end(data, pos)
+            if data[key_start:pos] == b'length':
+                length, pos = _decode(data, pos)
+            else:
+                pos = _skip(data, pos)
+        pos += 1
+        files.append((start, pos, length))
+    return files
+
+
+def _as_bytes(data):
+    """Strings and mmaps are decoded in place, other buffers are copied once."""
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    if isinstance(data, (buffer, bytearray)):
+        return bytes(data)
     return data
 
 
 def bdecode(text):
+    text = _as_bytes(text)
     try:
-        src = tokenize(text)
-        data = decode_item(src.next, src.next()) # pylint:disable=E1101
-        for token in src: # look for more tokens
-            raise SyntaxError("trailing junk")
-    except (AttributeError, ValueError, StopIteration) as e:
-        raise SyntaxError("syntax error: %s" % e)
+        data, end = _decode(text, 0)
+    except (ValueError, IndexError, TypeError) as e:
+        raise SyntaxError('syntax error: %s' % e)
+    if end != len(text):
+        raise SyntaxError('trailing junk')
     return data
 
 
@@ -183,8 +281,54 @@ def bencode(data):
     return encode_func[type(data)](data)
 
 
+class FileList(Sequence):
+    """
+    Read only sequence of fileinfo dictionaries (name, size, path) of a torrent. Entries are only decoded when accessed.
+    """
+
+    def __init__(self, items, decode, encoding, torrent_name):
+        """
+        :param items: Sequence of file items, passed to `decode`.
+        :param decode: Function returning tuple (path list, length) for an item of `items`.
+        """
+        self._items = items
+        self._decode = decode
+        self.encoding = encoding
+        self.torrent_name = torrent_name
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        path, length = self._decode(self._items[index])
+        info = {'path': b'/'.join(path[:-1]), 'name': path[-1], 'size': length}
+        for field in ('name', 'path'):
+            # These should already be decoded if they were utf-8, if not we can try some other stuff
+            if not isinstance(info[field], unicode):
+                try:
+                    info[field] = info[field].decode(self.encoding)
+                except UnicodeError:
+                    # Broken beyond anything reasonable
+                    fallback = info[field].decode('utf-8', 'replace').replace(u'\ufffd', '_')
+                    log.warning('%s=%r field in torrent %r is wrongly encoded, falling back to `%s`' %
+                                (field, info[field], self.torrent_name, fallback))
+                    info[field] = fallback
+        return info
+
+    def __repr__(self):
+        return 'FileList(%r)' % list(self)
+
+
 class Torrent(object):
-    """Represents a torrent"""
+    """
+    Represents a torrent.
+
+    The torrent data is only scanned for structure on load. Values are decoded from the raw data when they are
+    needed, so reading info_hash, size, files or trackers never decodes the piece hashes. Accessing :attr:`content`
+    decodes the whole torrent, after which all values come from (the possibly modified) content.
+    """
     # string type used for keys, if this ever changes, stuff like "x in y"
     # gets broken unless you coerce to this type
     KEY_TYPE = str
@@ -196,69 +340,124 @@ class Torrent(object):
             return cls(handle.read())
 
     def __init__(self, content):
-        """Accepts torrent file as string"""
-        # Make sure there is no trailing whitespace. see #1592
-        content = content.strip()
-        # decoded torrent structure
-        self.content = bdecode(content)
+        """Accepts torrent file as string, bytearray or buffer"""
+        content = _as_bytes(content)
+        # Ignore surrounding whitespace without copying the data. see #1592
+        start, end = 0, len(content)
+        while start < end and content[start:start + 1].isspace():
+            start += 1
+        while end > start and content[end - 1:end].isspace():
+            end -= 1
+        self._raw = content
+        self._start = start
+        self._end = end
+        self._content = None
+        self._file_spans = None
+        try:
+            # Scan both the top level and info dictionaries in a single pass over the data
+            self._spans, pos = _dict_spans(content, start, nested='info')
+        except (ValueError, IndexError, TypeError) as e:
+            raise SyntaxError('syntax error: %s' % e)
+        if pos != end:
+            raise SyntaxError('trailing junk')
+        if 'info' not in self._spans or len(self._spans['info']) != 3:
+            raise SyntaxError('torrent has no info dictionary')
+        self._info_spans = self._spans['info'][2]
         self.modified = False
 
+    def __setstate__(self, state):
+        if 'content' in state:
+            # Pickled before content was decoded lazily
+            state['_content'] = state.pop('content')
+            state['_raw'] = None
+        self.__dict__.update(state)
+
+    @property
+    def content(self):
+        """Decoded torrent structure"""
+        if self._content is None:
+            self._content = _decode(self._raw, self._start)[0]
+            # Raw data may not match content anymore once it has been handed out
+            self._raw = None
+        return self._content
+
+    @content.setter
+    def content(self, content):
+        self._content = content
+        self._raw = None
+
+    def _value(self, spans, key, default):
+        if key not in spans:
+            return default
+        return _decode(self._raw, spans[key][0])[0]
+
+    def get(self, key, default=None):
+        """Returns value of a top level key of the torrent, decoding only that value."""
+        if self._raw is None:
+            return self.content.get(key, default)
+        return self._value(self._spans, key, default)
+
+    def get_info(self, key, default=None):
+        """Returns value of a key in the info dictionary of the torrent, decoding only that value."""
+        if self._raw is None:
+            return self.content['info'].get(key, default)
+        return self._value(self._info_spans, key, default)
+
+    def _scan_files(self):
+        """Returns (start, end, length) of the items in files list of the info dictionary."""
+        if self._file_spans is None:
+            self._file_spans = _file_spans(self._raw, self._info_spans['files'][0])
+        return self._file_spans
+
     def __repr__(self):
         return "%s(%s, %s)" % (self.__class__.__name__,
-            ", ".join("%s=%r" % (key, self.content["info"].get(key))
+            ", ".join("%s=%r" % (key, self.get_info(key))
                for key in ("name", "length", "private",)),
-            ", ".join("%s=%r" % (key, self.content.get(key))
+            ", ".join("%s=%r" % (key, self.get(key))
                for key in ("announce", "comment",)))
 
-    def get_filelist(self):
-        """Return array containing fileinfo dictionaries (name, length, path)"""
-        files = []
-        if 'length' in self.content['info']:
+    def _file_items(self):
+        """Returns tuple (file items, function decoding an item into (path list, length)) of multi file torrent."""
+        if self._raw is None:
+            return self.content['info']['files'], lambda item: (item['path'], item['length'])
+        raw = self._raw
+
+        def decode(span):
+            item = _decode(raw, span[0])[0]
+            return item['path'], item['length']
+        return self._scan_files(), decode
+
+    @property
+    def files(self):
+        """Lazy :class:`FileList` of the files in torrent"""
+        name = self.get_info('name')
+        length = self.get_info('length')
+        if length is not None:
             # single file torrent
-            t = {'name': self.content['info']['name'],
-                 'size': self.content['info']['length'],
-                 'path': ''}
-            files.append(t)
+            items, decode = [None], lambda item: ([name], length)
         else:
-            # multifile torrent
-            for item in self.content['info']['files']:
-                t = {'path': b'/'.join(item['path'][:-1]),
-                     'name': item['path'][-1],
-                     'size': item['length']}
-                files.append(t)
-
-        # Decode strings
-        for item in files:
-            for field in ('name', 'path'):
-                # These should already be decoded if they were utf-8, if not we can try some other stuff
-                if not isinstance(item[field], unicode):
-                    try:
-                        item[field] = item[field].decode(self.content.get('encoding', 'cp1252'))
-                    except UnicodeError:
-                        # Broken beyond anything reasonable
-                        fallback = item[field].decode('utf-8', 'replace').replace(u'\ufffd', '_')
-                        log.warning('%s=%r field in torrent %r is wrongly encoded, falling back to `%s`' %
-                                    (field, item[field], self.content['info']['name'], fallback))
-                        item[field] = fallback
-
-        return files
+            items, decode = self._file_items()
+        return FileList(items, decode, self.get('encoding', 'cp1252'), name)
+
+    def get_filelist(self):
+        """Return array containing fileinfo dictionaries (name, length, path)"""
+        return list(self.files)
 
     @property
     def size(self):
         """Return total size of the torrent"""
-        size = 0
+        length = self.get_info('length')
         # single file torrent
-        if 'length' in self.content['info']:
-            size = int(self.content['info']['length'])
-        else:
-            # multifile torrent
-            for item in self.content['info']['files']:
-                size += int(item['length'])
-        return size
+        if length is not None:
+            return int(length)
+        # multifile torrent
+        if self._raw is None:
+            return sum(int(item['length']) for item in self.content['info']['files'])
+        return sum(int(length) for start, end, length in self._scan_files())
 
     @property
     def private(self):
-        return self.content['info'].get('private', False)
+        return self.get_info('private', False)
 
     @property
     def trackers(self):
@@ -269,24 +468,29 @@ class Torrent(object):
         # the spec says, if announce-list present use ONLY that
         # funny iteration because of nesting, ie:
         # [ [ tracker1, tracker2 ], [backup1] ]
-        for tl in self.content.get('announce-list', []):
+        for tl in self.get('announce-list', []):
             for t in tl:
                 trackers.append(t)
-        if not self.content.get('announce') in trackers:
-            trackers.append(self.content.get('announce'))
+        announce = self.get('announce')
+        if not announce in trackers:
+            trackers.append(announce)
         return trackers
 
     @property
     def info_hash(self):
         """Return Torrent info hash"""
-        import hashlib
-        hash = hashlib.sha1()
-        info_data = encode_dictionary(self.content['info'])
-        hash.update(info_data)
-        return hash.hexdigest().upper()
+        if self._raw is not None:
+            # Hash the info dictionary exactly as it is in the file
+            start, end = self._spans['info'][:2]
+            info_data = buffer(self._raw, start, end - start)
+        else:
+            info_data = encode_dictionary(self.content['info'])
+        return hashlib.sha1(info_data).hexdigest().upper()
 
     @property
     def comment(self):
+        if self._raw is not None and 'comment' in self._spans:
+            return self.get('comment')
         return self.content['comment']
 
     @comment.setter
@@ -316,4 +520,6 @@ class Torrent(object):
         return '<Torrent instance. Files: %s>' % self.get_filelist()
 
     def encode(self):
+        if self._raw is not None:
+            return bytes(self._raw[self._start:self._end])
         return bencode(self.content)
@@ -0,0 +1,95 @@
+"""
+Simple bloom filter, a compact probabilistic set which can tell for sure when a value has never been added.
+"""
+from __future__ import unicode_literals, division, absolute_import
+import hashlib
+import logging
+import math
+import os
+import pickle
+import struct
+
+log = logging.getLogger('util.bloom')
+
+
+class BloomFilter(object):
+    """
+    Membership tests may return false positives (with probability of about `error_rate` when no more than
+    `capacity` values have been added), but never false negatives. Values can not be removed.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.num_bits = int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        h1, h2 = struct.unpack(b'<QQ', hashlib.md5(value).digest())
+        for i in xrange(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value):
+        for position in self._positions(value):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        """Number of values added, duplicates included."""
+        return self.count
+
+    @property
+    def full(self):
+        return self.count > self.capacity
+
+    def save(self, path, **extra):
+        """
+        Write filter to `path` atomically.
+
+        :param extra: Additional values stored along with the filter, returned by :meth:`load`
+        """
+        data = {'capacity': self.capacity, 'error_rate': self.error_rate, 'count': self.count,
+                'bits': bytes(self.bits), 'extra': extra}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        if os.path.exists(path):
+            # os.rename does not replace existing files on windows
+            os.remove(path)
+        os.rename(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read filter saved with :meth:`save`.
+
+        :return: Tuple (filter, extra), or (None, None) if file does not exist or could not be read
+        """
+        if not os.path.exists(path):
+            return None, None
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            bloom = cls(data['capacity'], data['error_rate'])
+            if len(data['bits']) != len(bloom.bits):
+                raise ValueError('size mismatch')
+            bloom.bits = bytearray(data['bits'])
+            bloom.count = data['count']
+        except Exception as e:
+            log.warning('Unable to load bloom filter from %s: %s' % (path, e))
+            return None, None
+        return bloom, data['extra']
@@ -2,41 +2,130 @@ from __future__ import unicode_literals, division, absolute_import
 import copy
 import logging
 import hashlib
-from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, DateTime, PickleType, Unicode, ForeignKey
-from sqlalchemy.orm import relation
+import pickle
+import sys
+from datetime import date, datetime, timedelta
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Unicode
 from flexget import db_schema
-from flexget.utils.database import safe_pickle_synonym
-from flexget.utils.tools import parse_timedelta, TimedDict
-from flexget.entry import Entry
+from flexget.utils.database import only_builtins
+from flexget.utils.sqlalchemy_utils import drop_tables
+from flexget import config_schema
+from flexget.utils.tools import parse_timedelta, LRUCache
+from flexget.entry import Entry, LazyField
 from flexget.event import event
 from flexget.plugin import PluginError
 
 log = logging.getLogger('input_cache')
-Base = db_schema.versioned_base('input_cache', 0)
+Base = db_schema.versioned_base('input_cache', 1)
 
 
-class InputCache(Base):
+@db_schema.upgrade('input_cache')
+def upgrade(ver, session):
+    if ver == 0:
+        # Entries are now stored as snapshots, old caches are simply discarded
+        drop_tables(['input_cache_entry'], session)
+        raise db_schema.UpgradeImpossible
+    return ver
 
-    __tablename__ = 'input_cache'
 
-    id = Column(Integer, primary_key=True)
-    name = Column(Unicode)
-    hash = Column(String)
-    added = Column(DateTime, default=datetime.now)
+class EntrySnapshot(object):
+    """
+    Compact and immutable copy of a list of entries, new entries can be materialized from it cheaply.
+
+    Immutable field values are shared with all materialized entries, other values are stored pickled and unpickled
+    only for the entries materialized from the snapshot, which is a lot faster than deep copying them.
+    """
 
-    entries = relation('InputCacheEntry', backref='cache', cascade='all, delete, delete-orphan')
+    immutable_types = (unicode, str, int, long, float, bool, type(None), datetime, date, timedelta)
 
+    def __init__(self, entries=None):
+        self._entries = tuple(self._freeze(entry) for entry in entries or [])
+        self.size = self._sizeof()
 
-class InputCacheEntry(Base):
+    def _sizeof(self):
+        """Approximate memory used by the snapshot in bytes."""
+        size = 0
+        for shared, mutable, lazy, copied in self._entries:
+            size += sum(sys.getsizeof(value) for field, value in shared)
+            size += len(mutable or b'') + sum(sys.getsizeof(value) for value in copied.itervalues())
+        return size
 
-    __tablename__ = 'input_cache_entry'
+    def _freeze(self, entry):
+        shared, mutable, lazy, copied = [], {}, [], {}
+        for field, value in dict.iteritems(entry):
+            if isinstance(value, LazyField):
+                lazy.append((field, tuple(value.funcs)))
+            elif type(value) in self.immutable_types:
+                shared.append((field, value))
+            else:
+                mutable[field] = value
+        try:
+            mutable = pickle.dumps(mutable, pickle.HIGHEST_PROTOCOL) if mutable else None
+        except Exception:
+            # Fall back to copying the fields which can not be pickled
+            for field, value in mutable.items():
+                try:
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                except Exception:
+                    copied[field] = copy.deepcopy(mutable.pop(field))
+            mutable = pickle.dumps(mutable, pickle.HIGHEST_PROTOCOL) if mutable else None
+        return tuple(shared), mutable, tuple(lazy), copied
 
-    id = Column(Integer, primary_key=True)
-    _entry = Column('entry', PickleType)
-    entry = safe_pickle_synonym('_entry')
+    def entries(self):
+        """:return: List of new :class:`Entry` instances with the snapshotted fields."""
+        result = []
+        for shared, mutable, lazy, copied in self._entries:
+            entry = Entry()
+            # Fields have already been validated by Entry.__setitem__ when the snapshot was taken
+            dict.update(entry, shared)
+            if mutable is not None:
+                dict.update(entry, pickle.loads(mutable))
+            if copied:
+                dict.update(entry, copy.deepcopy(copied))
+            for field, funcs in lazy:
+                lazy_field = LazyField(entry, field, funcs[0])
+                lazy_field.funcs = list(funcs)
+                dict.__setitem__(entry, field, lazy_field)
+            result.append(entry)
+        return result
 
-    cache_id = Column(Integer, ForeignKey('input_cache.id'), nullable=False)
+    def __len__(self):
+        return len(self._entries)
+
+    def dumps(self):
+        """
+        Serializes snapshot to be stored into database. Only builtin python types are stored, so the snapshot
+        can be loaded after code changes, lazy fields are left out.
+        """
+        data = []
+        for shared, mutable, lazy, copied in self._entries:
+            fields = dict(shared)
+            if mutable is not None:
+                fields.update(pickle.loads(mutable))
+            fields.update(copied)
+            # Stored already frozen, so that loading needs just one unpickle
+            data.append(self._freeze(only_builtins(fields))[:2])
+        return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def loads(cls, data):
+        """Loads a snapshot serialized with :meth:`dumps`."""
+        snapshot = cls()
+        snapshot._entries = tuple((shared, mutable, (), {}) for shared, mutable in pickle.loads(data))
+        snapshot.size = snapshot._sizeof()
+        return snapshot
+
+
+class InputCache(Base):
+
+    __tablename__ = 'input_cache'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(Unicode)
+    hash = Column(String)
+    added = Column(DateTime, default=datetime.now)
+    # Entries serialized with EntrySnapshot.dumps
+    snapshot = Column(LargeBinary)
 
 
 @event('manager.db_cleanup')
@@ -59,6 +148,11 @@ def config_hash(config):
         return hashlib.md5(str(config)).hexdigest()
 
 
+DEFAULT_MAX_ENTRIES = 50000
+# In megabytes
+DEFAULT_MAX_SIZE = 200
+
+
 class cached(object):
     """
     Implements transparent caching decorator @cached for inputs.
@@ -70,9 +164,13 @@ class cached(object):
       If the key is not given or present in the configuration :name: is expected to be a cache name (ie. url)
 
     .. note:: Configuration assumptions may make this unusable in some (future) inputs
+
+    The memory cache is shared by all inputs, it is bounded by the number of entries and approximate memory used, see
+    the `input_cache` root configuration. Results are kept in memory for `persist` time, or 5 minutes.
     """
 
-    cache = TimedDict(cache_time='5 minutes')
+    cache = LRUCache(max_weight=DEFAULT_MAX_ENTRIES, max_size=DEFAULT_MAX_SIZE * 1024 * 1024,
+                     cache_time='5 minutes', weigh=len, sizeof=lambda snapshot: snapshot.size)
 
     def __init__(self, name, persist=None):
         # Cast name to unicode to prevent sqlalchemy warnings when filtering
@@ -105,13 +203,14 @@ class cached(object):
             cache_name = self.name + '_' + hash
             log.debug('cache name: %s (has: %s)' % (cache_name, ', '.join(self.cache.keys())))
 
-            if not task.options.nocache and cache_name in self.cache:
+            try:
+                snapshot = None if task.options.nocache else self.cache[cache_name]
+            except KeyError:
+                snapshot = None
+            if snapshot is not None:
                 # return from the cache
                 log.trace('cache hit')
-                entries = []
-                for entry in self.cache[cache_name]:
-                    fresh = copy.deepcopy(entry)
-                    entries.append(fresh)
+                entries = snapshot.entries()
                 if entries:
                     log.verbose('Restored %s entries from cache' % len(entries))
                 return entries
@@ -122,12 +221,12 @@ class cached(object):
                         filter(InputCache.hash == hash).\
                         filter(InputCache.added > datetime.now() - self.persist).\
                         first()
-                    if db_cache:
-                        entries = [Entry(e.entry) for e in db_cache.entries]
-                        log.verbose('Restored %s entries from db cache' % len(entries))
+                    if db_cache and db_cache.snapshot:
+                        snapshot = EntrySnapshot.loads(db_cache.snapshot)
+                        log.verbose('Restored %s entries from db cache' % len(snapshot))
                         # Store to in memory cache
-                        self.cache[cache_name] = copy.deepcopy(entries)
-                        return entries
+                        self.cache.set(cache_name, snapshot, cache_time=self.persist)
+                        return snapshot.entries()
 
                 # Nothing was restored from db or memory cache, run the function
                 log.trace('cache miss')
@@ -139,14 +238,15 @@ class cached(object):
                     if self.persist and not task.options.nocache:
                         db_cache = task.session.query(InputCache).filter(InputCache.name == self.name).\
                             filter(InputCache.hash == hash).first()
-                        if db_cache and db_cache.entries:
-                            log.error('There was an error during %s input (%s), using cache instead.' %
-                                    (self.name, e))
-                            entries = [Entry(e.entry) for e in db_cache.entries]
-                            log.verbose('Restored %s entries from db cache' % len(entries))
-                            # Store to in memory cache
-                            self.cache[cache_name] = copy.deepcopy(entries)
-                            return entries
+                        if db_cache and db_cache.snapshot:
+                            snapshot = EntrySnapshot.loads(db_cache.snapshot)
+                            if len(snapshot):
+                                log.error('There was an error during %s input (%s), using cache instead.' %
+                                        (self.name, e))
+                                log.verbose('Restored %s entries from db cache' % len(snapshot))
+                                # Store to in memory cache
+                                self.cache.set(cache_name, snapshot, cache_time=self.persist)
+                                return snapshot.entries()
                     # If there was nothing in the db cache, re-raise the error.
                     raise
                 if api_ver == 1:
@@ -157,20 +257,43 @@ class cached(object):
                 # store results to cache
                 log.debug('storing to cache %s %s entries' % (cache_name, len(response)))
                 try:
-                    self.cache[cache_name] = copy.deepcopy(response)
+                    snapshot = EntrySnapshot(response)
                 except TypeError:
                     # might be caused because of backlog restoring some idiotic stuff, so not neccessarily a bug
                     log.critical('Unable to save task content into cache, if problem persists longer than a day please report this as a bug')
-                if self.persist:
+                    snapshot = None
+                else:
+                    self.cache.set(cache_name, snapshot, cache_time=self.persist)
+                if self.persist and snapshot is not None:
                     # Store to database
                     log.debug('Storing cache %s to database.' % cache_name)
                     db_cache = task.session.query(InputCache).filter(InputCache.name == self.name).\
                         filter(InputCache.hash == hash).first()
                     if not db_cache:
                         db_cache = InputCache(name=self.name, hash=hash)
-                    db_cache.entries = [InputCacheEntry(entry=e) for e in response]
+                    db_cache.snapshot = snapshot.dumps()
                     db_cache.added = datetime.now()
                     task.session.merge(db_cache)
                 return response
 
         return wrapped_func
+
+
+@event('manager.config_updated')
+def resize_cache(manager):
+    config = manager.config.get('input_cache', {})
+    cached.cache.resize(max_weight=config.get('max_entries', DEFAULT_MAX_ENTRIES),
+                        max_size=config.get('max_size', DEFAULT_MAX_SIZE) * 1024 * 1024)
+
+
+@event('config.register')
+def register_config():
+    schema = {
+        'type': 'object',
+        'properties': {
+            'max_entries': {'type': 'integer', 'minimum': 0},
+            'max_size': {'type': 'integer', 'minimum': 0, 'description': 'maximum memory used in megabytes'}
+        },
+        'additionalProperties': False
+    }
+    config_schema.register_config_key('input_cache', schema)
@@ -74,51 +74,52 @@ def text_date_synonym(name):
     return synonym(name, descriptor=property(getter, setter))
 
 
-def safe_pickle_synonym(name):
-    """Used to store Entry instances into a PickleType column in the database.
+def only_builtins(item):
+    """Casts all subclasses of builtin types to their builtin python type. Works recursively on iterables.
 
-    In order to ensure everything can be loaded after code changes, makes sure no custom python classes are pickled.
+    Raises ValueError if passed an object that doesn't subclass a builtin type.
     """
 
-    def only_builtins(item):
-        """Casts all subclasses of builtin types to their builtin python type. Works recursively on iterables.
-
-        Raises ValueError if passed an object that doesn't subclass a builtin type.
-        """
+    supported_types = [str, unicode, int, float, long, bool, datetime]
+    # dict, list, tuple and set are also supported, but handled separately
 
-        supported_types = [str, unicode, int, float, long, bool, datetime]
-        # dict, list, tuple and set are also supported, but handled separately
-
-        if type(item) in supported_types:
-            return item
-        elif isinstance(item, dict):
-            result = {}
-            for key, value in item.iteritems():
-                try:
-                    result[key] = only_builtins(value)
-                except TypeError:
-                    continue
+    if type(item) in supported_types:
+        return item
+    elif isinstance(item, dict):
+        result = {}
+        for key, value in item.iteritems():
+            try:
+                result[key] = only_builtins(value)
+            except TypeError:
+                continue
+        return result
+    elif isinstance(item, (list, tuple, set)):
+        result = []
+        for value in item:
+            try:
+                result.append(only_builtins(value))
+            except ValueError:
+                continue
+        if isinstance(item, list):
             return result
-        elif isinstance(item, (list, tuple, set)):
-            result = []
-            for value in item:
-                try:
-                    result.append(only_builtins(value))
-                except ValueError:
-                    continue
-            if isinstance(item, list):
-                return result
-            elif isinstance(item, tuple):
-                return tuple(result)
-            else:
-                return set(result)
+        elif isinstance(item, tuple):
+            return tuple(result)
         else:
-            for s_type in supported_types:
-                if isinstance(item, s_type):
-                    return s_type(item)
+            return set(result)
+    else:
+        for s_type in supported_types:
+            if isinstance(item, s_type):
+                return s_type(item)
+
+    # If item isn't a subclass of a builtin python type, raise ValueError.
+    raise TypeError('%r is not a subclass of a builtin python type.' % type(item))
+
+
+def safe_pickle_synonym(name):
+    """Used to store Entry instances into a PickleType column in the database.
 
-        # If item isn't a subclass of a builtin python type, raise ValueError.
-        raise TypeError('%r is not a subclass of a builtin python type.' % type(item))
+    In order to ensure everything can be loaded after code changes, makes sure no custom python classes are pickled.
+    """
 
     def getter(self):
         return getattr(self, name)
@@ -0,0 +1,194 @@
+"""
+Persistent index of directory listings, shared by plugins which scan local paths (exists, find, ...).
+
+Directories are listed again only when their modification time has changed, so scanning a large tree which has not
+changed only needs to stat the directories in it. Size and modification time of files are stored when their
+directory is listed, they are not refreshed if a file is modified in place.
+"""
+
+from __future__ import unicode_literals, division, absolute_import
+from collections import namedtuple
+from datetime import datetime, timedelta
+import logging
+import os
+import stat
+import sys
+import time
+
+from path import path
+from sqlalchemy import Column, Integer, Unicode, Float, DateTime, PickleType, ForeignKey, Index
+from sqlalchemy.orm import relation
+
+from flexget import db_schema
+from flexget.event import event
+from flexget.utils.sqlalchemy_utils import table_schema
+
+log = logging.getLogger('fsindex')
+Base = db_schema.versioned_base('fsindex', 1)
+
+
+@db_schema.upgrade('fsindex')
+def upgrade(ver, session):
+    if ver == 0:
+        # Concurrent scans may have stored the same directory twice, listings are made again on the next scan
+        dirs_table = table_schema('fsindex_dirs', session)
+        session.execute(dirs_table.delete())
+        log.info('Creating unique index on fsindex_dirs table.')
+        Index('ix_fsindex_dirs_root_path', dirs_table.c.root_id, dirs_table.c.path, unique=True).\
+            create(bind=session.connection())
+        ver = 1
+    return ver
+
+
+# Directories modified less than this many seconds before they were listed are listed again on the next scan, as
+# changes within the resolution of the modification time could go unnoticed
+MTIME_RESOLUTION = 2
+
+#: Item found from a scanned path. `size` and `mtime` are None if the item could not be stat'ed.
+FileInfo = namedtuple('FileInfo', ['path', 'isdir', 'size', 'mtime'])
+
+
+class IndexedRoot(Base):
+    __tablename__ = 'fsindex_roots'
+
+    id = Column(Integer, primary_key=True)
+    path = Column(Unicode, index=True, unique=True)
+    last_scan = Column(DateTime)
+    dirs = relation('IndexedDir', backref='root', cascade='all, delete, delete-orphan')
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return '<IndexedRoot(path=%s,last_scan=%s)>' % (self.path, self.last_scan)
+
+
+class IndexedDir(Base):
+    __tablename__ = 'fsindex_dirs'
+
+    id = Column(Integer, primary_key=True)
+    root_id = Column(Integer, ForeignKey('fsindex_roots.id'), nullable=False, index=True)
+    # Relative to the root, empty for the root itself
+    path = Column(Unicode)
+    mtime = Column(Float)
+    # List of (name, isdir, size, mtime) tuples
+    files = Column(PickleType)
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return '<IndexedDir(path=%s,mtime=%s)>' % (self.path, self.mtime)
+
+Index('ix_fsindex_dirs_root_path', IndexedDir.root_id, IndexedDir.path, unique=True)
+
+
+def list_dir(dirname):
+    """
+    List and stat contents of a directory.
+
+    :return: List of (name, isdir, size, mtime) tuples
+    """
+    files = []
+    for name in os.listdir(dirname):
+        if not isinstance(name, unicode):
+            log.warning('Filename `%r` in `%s` is not decodable by declared filesystem encoding `%s`. '
+                        'Either your environment does not declare the correct encoding, or this filename '
+                        'is incorrectly encoded.' % (name, dirname, sys.getfilesystemencoding()))
+            continue
+        try:
+            st = os.stat(os.path.join(dirname, name))
+        except OSError:
+            # eg. a broken symlink
+            files.append((name, False, None, None))
+            continue
+        isdir = stat.S_ISDIR(st.st_mode)
+        files.append((name, isdir, None if isdir else st.st_size, st.st_mtime))
+    return files
+
+
+def scan(session, folder, recursive=True):
+    """
+    Lists contents of `folder`, using the index for directories which have not changed since they were last listed.
+    Items are returned in the same order as :meth:`path.walk` (or :meth:`path.listdir` when not recursive) would.
+
+    :param session: Database session used to load and update the index
+    :param folder: Path to scan
+    :param bool recursive: Scan subdirectories too
+    :return: List of :class:`FileInfo`
+    """
+    folder = path(folder).expanduser()
+    root_path = unicode(folder.abspath())
+    root = session.query(IndexedRoot).filter(IndexedRoot.path == root_path).first()
+    if not root:
+        root = IndexedRoot(root_path)
+        session.add(root)
+    root.last_scan = datetime.now()
+    indexed = dict((indexed_dir.path, indexed_dir) for indexed_dir in root.dirs)
+    seen = set()
+    listed = [0]
+    result = []
+
+    def visit(relpath):
+        dirname = os.path.join(root_path, relpath) if relpath else root_path
+        try:
+            mtime = os.stat(dirname).st_mtime
+        except OSError as e:
+            log.warning('Unable to access %s: %s' % (dirname, e))
+            return
+        indexed_dir = indexed.get(relpath)
+        if indexed_dir is None or indexed_dir.mtime is None or indexed_dir.mtime != mtime:
+            try:
+                files = list_dir(dirname)
+            except OSError as e:
+                log.warning('Unable to list %s: %s' % (dirname, e))
+                return
+            listed[0] += 1
+            if indexed_dir is None:
+                indexed_dir = IndexedDir(relpath)
+                root.dirs.append(indexed_dir)
+            indexed_dir.files = files
+            # Changes made right after listing might not change the modification time
+            indexed_dir.mtime = mtime if time.time() - mtime > MTIME_RESOLUTION else None
+        seen.add(relpath)
+        # Joining path objects one by one is slow for large listings
+        prefix = unicode(os.path.join(folder, relpath, ''))
+        for name, isdir, size, file_mtime in indexed_dir.files:
+            result.append(FileInfo(path(prefix + name), isdir, size, file_mtime))
+            if isdir and recursive:
+                visit(os.path.join(relpath, name) if relpath else name)
+
+    visit('')
+    if recursive:
+        # Forget directories which no longer exist
+        for relpath, indexed_dir in indexed.iteritems():
+            if relpath not in seen:
+                root.dirs.remove(indexed_dir)
+    log.debug('scanned %s: %s items, %s of %s directories listed' % (folder, len(result), listed[0], len(seen)))
+    return result
+
+
+def forget(session, folder=None):
+    """
+    Remove `folder`, or all paths if not given, from the index.
+
+    :return: Number of removed paths
+    """
+    query = session.query(IndexedRoot)
+    if folder is not None:
+        query = query.filter(IndexedRoot.path == unicode(path(folder).expanduser().abspath()))
+    roots = query.all()
+    for root in roots:
+        session.delete(root)
+    return len(roots)
+
+
+@event('manager.db_cleanup')
+def db_cleanup(session):
+    # Forget paths not scanned in a while
+    removed = 0
+    for root in session.query(IndexedRoot).filter(IndexedRoot.last_scan < datetime.now() - timedelta(days=30)):
+        session.delete(root)
+        removed += 1
+    if removed:
+        log.verbose('Removed %s unused paths from filesystem index.' % removed)
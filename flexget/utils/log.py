@@ -89,6 +89,21 @@ def log_once(message, logger=logging.getLogger('log_once'), once_level=logging.I
     return True
 
 
+@contextmanager
+def capture_thread_output(stream):
+    """
+    Context manager which sends log and std output of the current thread also to given `stream` while in scope.
+    Output of other threads is not affected.
+    """
+    f_logger.install_output_handler()
+    old_stream = f_logger.get_output()
+    f_logger.set_output(stream)
+    try:
+        yield
+    finally:
+        f_logger.set_output(old_stream)
+
+
 @contextmanager
 def capture_output(stream):
     """Context manager which captures all log and std output to given `stream` while in scope."""
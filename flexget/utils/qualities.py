@@ -3,6 +3,8 @@ import re
 import copy
 import logging
 
+from flexget.utils.tools import LRUCache
+
 log = logging.getLogger('utils.qualities')
 
 
@@ -29,6 +31,7 @@ class QualityComponent(object):
         # compile regexp
         if regexp is None:
             regexp = re.escape(name)
+        self.pattern = regexp
         self.regexp = re.compile('(?<![^\W_])(' + regexp + ')(?![^\W_])', re.IGNORECASE)
 
     def matches(self, text):
@@ -185,6 +188,17 @@ for items in (_resolutions, _sources, _codecs, _audios):
     for item in items:
         _registry[item.name] = item
 
+_components_by_type = dict((items[0].type, items) for items in (_resolutions, _sources, _codecs, _audios))
+
+# One regexp per component type, matching if any of its components match. Text which doesn't match it can skip
+# testing the components one by one.
+_type_regexps = dict((type, re.compile('(?<![^\W_])(?:' + '|'.join(item.pattern for item in items) + ')(?![^\W_])',
+                                       re.IGNORECASE))
+                     for type, items in _components_by_type.iteritems())
+
+# Parsed (resolution, source, codec, audio, clean_text) tuples by text
+_parse_cache = LRUCache(max_weight=10000, cache_time=None)
+
 
 def all_components():
     return _registry.itervalues()
@@ -213,6 +227,14 @@ class Quality(object):
         :param text: The string to parse
         """
         self.text = text
+        try:
+            parsed = _parse_cache[text]
+        except KeyError:
+            parsed = _parse_cache[text] = self._parse(text)
+        self.resolution, self.source, self.codec, self.audio, self.clean_text = parsed
+
+    def _parse(self, text):
+        """Returns tuple (resolution, source, codec, audio, clean_text) parsed from `text`."""
         self.clean_text = text
         self.resolution = self._find_best(_resolutions, _UNKNOWNS['resolution'], False)
         self.source = self._find_best(_sources, _UNKNOWNS['source'])
@@ -224,11 +246,15 @@ class Quality(object):
                 default = _registry[default]
                 if not getattr(self, default.type):
                     setattr(self, default.type, default)
+        return self.resolution, self.source, self.codec, self.audio, self.clean_text
 
     def _find_best(self, qlist, default=None, strip_all=True):
         """Finds the highest matching quality component from `qlist`"""
         result = None
         search_in = self.clean_text
+        if not _type_regexps[qlist[0].type].search(search_in):
+            # None of the components match
+            return default
         for item in qlist:
             match = item.matches(search_in)
             if match[0]:
@@ -347,10 +373,19 @@ class RequirementComponent(object):
         self.max = None
         self.acceptable = []
         self.none_of = []
+        # Values of allowed components, by value of loose. Evaluated for all components when first needed.
+        self._allowed = None
 
     def allows(self, comp, loose=False):
         if comp.type != self.type:
             raise TypeError('Cannot compare %r against %s' % (comp, self.type))
+        if self._allowed is None:
+            components = [_UNKNOWNS[self.type]] + _components_by_type[self.type]
+            self._allowed = dict((is_loose, frozenset(c.value for c in components if self._allows(c, is_loose)))
+                                 for is_loose in (False, True))
+        return comp.value in self._allowed[bool(loose)]
+
+    def _allows(self, comp, loose=False):
         if comp in self.none_of:
             return False
         if loose:
@@ -368,6 +403,7 @@ class RequirementComponent(object):
         return False
 
     def add_requirement(self, text):
+        self._allowed = None
         if '-' in text:
             min, max = text.split('-')
             min, max = _registry[min], _registry[max]
@@ -457,10 +493,8 @@ class Requirements(object):
             qual = Quality(qual)
             if not qual:
                 raise TypeError('`%s` does not appear to be a valid quality string.' % qual.text)
-        for r_component, q_component in zip(self.components, qual.components):
-            if not r_component.allows(q_component, loose=loose):
-                return False
-        return True
+        return (self.resolution.allows(qual.resolution, loose) and self.source.allows(qual.source, loose) and
+                self.codec.allows(qual.codec, loose) and self.audio.allows(qual.audio, loose))
 
     def __str__(self):
         return self.text or 'any'
@@ -2,9 +2,11 @@ from __future__ import unicode_literals, division, absolute_import
 import urllib2
 import time
 import logging
-from datetime import timedelta, datetime
+import threading
+from datetime import timedelta
 from urlparse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 # Allow some request objects to be imported from here instead of requests
 from requests import RequestException, HTTPError
 from flexget import __version__ as version
@@ -19,6 +21,132 @@ logging.getLogger('requests.packages.urllib3').setLevel(logging.WARNING)
 WAIT_TIME = timedelta(seconds=60)
 # Remembers sites that have timed out
 unresponsive_hosts = TimedDict(WAIT_TIME)
+# Maximum number of kept alive connections per host
+POOL_SIZE = 10
+
+
+class HostLimiter(object):
+    """
+    Limits requests to a single host with a token bucket, `burst` requests at once, then one per `delay`. Keeps
+    counters of requests made and time spent waiting.
+    """
+
+    def __init__(self, host, delay=None, burst=1):
+        self.host = host
+        self._lock = threading.Lock()
+        self.configure(delay, burst)
+        self._tokens = self.burst
+        self._updated = time.time()
+        self.requests = 0
+        self.waits = 0
+        self.queued = 0.0
+
+    def configure(self, delay=None, burst=1):
+        self.delay = parse_timedelta(delay).total_seconds() if delay else 0.0
+        self.burst = burst
+
+    def _refill(self):
+        now = time.time()
+        if self.delay:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.delay)
+        else:
+            self._tokens = self.burst
+        self._updated = now
+
+    def reserve(self):
+        """
+        Takes a token now or in the future, without waiting for it.
+
+        :return: Seconds to wait before the reserved request may be made
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return max(0, -self._tokens * self.delay)
+
+    def acquire(self, waited=0):
+        """
+        Waits until a request is allowed, the wait does not block other callers.
+
+        :param waited: Seconds already waited for other limits of the request, included in the counters
+        :return: Seconds waited
+        """
+        wait = self.reserve()
+        if wait:
+            log.debug('Waiting %.2f seconds until next request to %s' % (wait, self.host))
+            time.sleep(wait)
+        with self._lock:
+            self.requests += 1
+            if wait or waited:
+                self.waits += 1
+            self.queued += wait + waited
+        return wait
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'waits': self.waits, 'queued': self.queued, 'delay': self.delay}
+
+
+class HostLimits(object):
+    """
+    Registry of :class:`HostLimiter` for every host requests are made to. Limits configured for a domain also apply
+    to its subdomains. The global :data:`host_limits` is shared by all sessions and keeps the counters of all
+    requests, each :class:`Session` also has its own for the delays registered with it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limiters = {}
+        self._domains = {}
+
+    def _domain_limits(self, host):
+        parts = host.split('.')
+        for i in xrange(len(parts)):
+            limits = self._domains.get('.'.join(parts[i:]))
+            if limits:
+                return limits
+        return {}
+
+    def limited(self, host):
+        """:return: True if limits have been configured for `host`"""
+        return bool(self._domains) and bool(self._domain_limits(host or ''))
+
+    def get(self, host):
+        host = host or ''
+        try:
+            return self._limiters[host]
+        except KeyError:
+            with self._lock:
+                if host not in self._limiters:
+                    self._limiters[host] = HostLimiter(host, **self._domain_limits(host))
+                return self._limiters[host]
+
+    def limit(self, domain, delay=None, burst=1):
+        """Configures limits for `domain` and its subdomains, replacing earlier limits of it."""
+        domain = domain.lower()
+        with self._lock:
+            self._domains[domain] = {'delay': delay, 'burst': burst}
+            for host, limiter in self._limiters.iteritems():
+                if host == domain or host.endswith('.' + domain):
+                    limiter.configure(**self._domain_limits(host))
+
+    def stats(self):
+        """:return: Dict of counters for each host requests have been made to."""
+        return dict((host, limiter.stats()) for host, limiter in self._limiters.items())
+
+
+host_limits = HostLimits()
+
+# Adapters are shared by all sessions so that kept alive connections are reused, keyed by max_retries
+_adapters = {}
+_adapters_lock = threading.Lock()
+
+
+def _shared_adapter(max_retries):
+    with _adapters_lock:
+        if max_retries not in _adapters:
+            _adapters[max_retries] = HTTPAdapter(max_retries=max_retries, pool_maxsize=POOL_SIZE)
+        return _adapters[max_retries]
 
 
 def is_unresponsive(url):
@@ -82,9 +210,10 @@ class Session(requests.Session):
         requests.Session.__init__(self)
         self.timeout = timeout
         self.stream = True
-        self.adapters['http://'].max_retries = max_retries
-        # Stores min intervals between requests for certain sites
-        self.domain_delay = {}
+        self.mount('http://', _shared_adapter(max_retries))
+        self.mount('https://', _shared_adapter(0))
+        # Delays registered with this session
+        self.domain_limits = HostLimits()
         self.headers.update({'User-Agent': 'FlexGet/%s (www.flexget.com)' % version})
 
     def add_cookiejar(self, cookiejar):
@@ -98,12 +227,16 @@ class Session(requests.Session):
 
     def set_domain_delay(self, domain, delay):
         """
-        Registers a minimum interval between requests to `domain`
+        Registers a minimum interval between requests of this session to `domain` and its subdomains, replacing
+        the interval registered earlier.
 
         :param domain: The domain to set the interval on
         :param delay: The amount of time between requests, can be a timedelta or string like '3 seconds'
         """
-        self.domain_delay[domain] = {'delay': parse_timedelta(delay)}
+        self.domain_limits.limit(domain, parse_timedelta(delay))
+
+    def close(self):
+        """Adapters are shared with other sessions, so they are not closed."""
 
     def request(self, method, url, *args, **kwargs):
         """
@@ -115,20 +248,6 @@ class Session(requests.Session):
         if is_unresponsive(url):
             raise requests.Timeout('Requests to this site have timed out recently. Waiting before trying again.')
 
-        # Check if we need to add a delay before request to this site
-        for domain, domain_dict in self.domain_delay.iteritems():
-            if domain in url:
-                next_req = domain_dict.get('next_req')
-                if next_req and datetime.now() < next_req:
-                    wait_time = next_req - datetime.now()
-                    seconds = wait_time.seconds + (wait_time.microseconds / 1000000.0)
-                    log.debug('Waiting %.2f seconds until next request to %s' % (seconds, domain))
-                    # Sleep until it is time for the next request
-                    time.sleep(seconds)
-                # Record the next allowable request time for this domain
-                domain_dict['next_req'] = datetime.now() + domain_dict['delay']
-                break
-
         kwargs.setdefault('timeout', self.timeout)
         raise_status = kwargs.pop('raise_status', True)
 
@@ -136,6 +255,12 @@ class Session(requests.Session):
         if not any(url.startswith(adapter) for adapter in self.adapters):
             return _wrap_urlopen(url, timeout=kwargs['timeout'])
 
+        # Wait if needed before request to this site
+        host = urlparse(url).hostname
+        waited = 0
+        if self.domain_limits.limited(host):
+            waited = self.domain_limits.get(host).acquire()
+        host_limits.get(host).acquire(waited)
         try:
             result = requests.Session.request(self, method, url, *args, **kwargs)
         except (requests.Timeout, requests.ConnectionError):
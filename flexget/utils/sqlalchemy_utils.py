@@ -2,16 +2,24 @@
 Miscellaneous SQLAlchemy helpers.
 """
 from __future__ import unicode_literals, division, absolute_import
+import itertools
 import logging
+import threading
+from contextlib import contextmanager
 
 import sqlalchemy
 from sqlalchemy import ColumnDefault, Sequence, Index
 from sqlalchemy.types import TypeEngine
 from sqlalchemy.schema import Table, MetaData
 from sqlalchemy.exc import NoSuchTableError, OperationalError
+from sqlalchemy.pool import QueuePool, SingletonThreadPool, StaticPool
 
 log = logging.getLogger('sql_utils')
 
+# Raw database connections in a commit group, by id
+_grouped_connections = {}
+_local = threading.local()
+
 
 def table_exists(name, session):
     """
@@ -93,7 +101,7 @@ def drop_tables(names, session):
     metadata.reflect(bind=session.bind)
     for table in metadata.sorted_tables:
         if table.name in names:
-            table.drop()
+            table.drop(bind=session.bind)
 
 
 def get_index_by_name(table, name):
@@ -126,6 +134,212 @@ def create_index(table_name, session, *column_names):
         log.debug('Error creating index.', exc_info=True)
 
 
+def chunked(seq, size=900):
+    """
+    Divides `seq` into lists of at most `size` items, so they can be used with IN queries. (sqlite has a limit of
+    999 bound parameters per query)
+
+    :param seq: Sequence of values
+    :param int size: Maximum size of a chunk
+    """
+    seq = list(seq)
+    for i in xrange(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+# Settings used by `performance: yes` in the `database` config section
+PERFORMANCE_SETTINGS = {'wal': True, 'synchronous': 'normal', 'mmap_size': 64, 'cache_size': 16, 'pool_size': 5}
+
+
+def database_settings(config):
+    """:returns: Database settings from `database` config section `config`, with `performance` preset applied"""
+    settings = dict(config or {})
+    if settings.pop('performance', False):
+        for key, value in PERFORMANCE_SETTINGS.iteritems():
+            settings.setdefault(key, value)
+    return settings
+
+
+def sqlite_pragmas(settings):
+    """:returns: List of PRAGMA statements to run on new connections for database `settings`"""
+    pragmas = []
+    if 'wal' in settings:
+        pragmas.append('PRAGMA journal_mode=%s' % ('WAL' if settings['wal'] else 'DELETE'))
+    if 'synchronous' in settings:
+        pragmas.append('PRAGMA synchronous=%s' % settings['synchronous'].upper())
+    if 'mmap_size' in settings:
+        pragmas.append('PRAGMA mmap_size=%d' % (settings['mmap_size'] * 1024 * 1024))
+    if 'cache_size' in settings:
+        # Negative size is in KiB instead of pages
+        pragmas.append('PRAGMA cache_size=-%d' % (settings['cache_size'] * 1024))
+    return pragmas
+
+
+def sqlite_in_memory(uri):
+    """:returns: True if sqlite `uri` is for an in-memory database"""
+    return uri in ('sqlite://', 'sqlite:///:memory:')
+
+
+def create_sqlite_engine(uri, settings=None, echo=False):
+    """
+    Create engine for sqlite database `uri`.
+
+    :param dict settings: Database settings, see :func:`database_settings`
+    :param bool echo: Log all SQL statements
+    """
+    settings = settings or {}
+    kwargs = {'echo': echo, 'connect_args': {'check_same_thread': False, 'timeout': 10}}
+    in_memory = sqlite_in_memory(uri)
+    if in_memory:
+        # In-memory database only exists in a single connection, share it with all threads
+        kwargs['poolclass'] = StaticPool
+    elif settings.get('pool_size'):
+        # Connections are not tied to threads, a pooled connection is used by one thread at a time
+        kwargs.update(poolclass=QueuePool, pool_size=settings['pool_size'], max_overflow=settings['pool_size'])
+    else:
+        kwargs['poolclass'] = SingletonThreadPool
+    engine = sqlalchemy.create_engine(uri, **kwargs)
+    _defer_grouped_commits(engine.dialect)
+    pragmas = [] if in_memory else sqlite_pragmas(settings)
+    if pragmas:
+        @sqlalchemy.event.listens_for(engine, 'connect')
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+    return engine
+
+
+def commit_count():
+    """:returns: Number of database commits done by the current thread"""
+    return getattr(_local, 'commits', 0)
+
+
+def _count_commit():
+    _local.commits = commit_count() + 1
+
+
+def _defer_grouped_commits(dialect):
+    """
+    Makes commits of connections in a :class:`CommitGroup` only mark the work as done, the group decides its fate.
+    Rollbacks undo the work done since the last commit, like they would without the group.
+    """
+    do_commit, do_rollback = dialect.do_commit, dialect.do_rollback
+
+    def grouped_commit(dbapi_connection):
+        group = _grouped_connections.get(id(getattr(dbapi_connection, 'connection', dbapi_connection)))
+        if group is not None:
+            group.session_commit()
+            return
+        do_commit(dbapi_connection)
+        _count_commit()
+
+    def grouped_rollback(dbapi_connection):
+        group = _grouped_connections.get(id(getattr(dbapi_connection, 'connection', dbapi_connection)))
+        if group is not None:
+            group.session_rollback()
+            return
+        do_rollback(dbapi_connection)
+
+    dialect.do_commit = grouped_commit
+    dialect.do_rollback = grouped_rollback
+
+
+class CommitGroup(object):
+    """
+    Groups the work of all sessions using the database connection of the current thread into one transaction.
+    Commits of the sessions are deferred until the group is committed, work can be split in savepoints so failing
+    parts are rolled back without affecting the rest. A savepoint marks the last commit of the sessions, rollbacks of
+    the sessions return to it.
+
+    Only works when threads do not use multiple connections at once (the default sqlite pools), otherwise sessions
+    would be waiting for the locks held by the group, see :meth:`supported`.
+    """
+    _savepoint_ids = itertools.count()
+
+    def __init__(self, engine):
+        self.connection = engine.connect()
+        self.dbapi_connection = self.connection.connection.connection
+        self.deferred = 0
+        self._isolation_level = self.dbapi_connection.isolation_level
+        # Take over transaction handling from pysqlite, it commits on its own before SAVEPOINT statements
+        self.dbapi_connection.isolation_level = None
+        self.dbapi_connection.execute('BEGIN')
+        self._changes = self.dbapi_connection.total_changes
+        # Savepoints marking the last commit, innermost last
+        self._commit_marks = []
+        self._mark_commit()
+        _grouped_connections[id(self.dbapi_connection)] = self
+
+    @staticmethod
+    def supported(engine):
+        return (engine.dialect.do_commit.__name__ == 'grouped_commit' and
+                isinstance(engine.pool, (SingletonThreadPool, StaticPool)))
+
+    def _mark_commit(self):
+        name = 'flexget_commit_%d' % next(self._savepoint_ids)
+        self.dbapi_connection.execute('SAVEPOINT %s' % name)
+        self._commit_marks.append(name)
+
+    def session_commit(self):
+        """Deferred commit of a session, following rollbacks of sessions will not undo the work done so far."""
+        self.deferred += 1
+        self.dbapi_connection.execute('RELEASE SAVEPOINT %s' % self._commit_marks.pop())
+        self._mark_commit()
+
+    def session_rollback(self):
+        """Rollback of a session, undoes the work done since the last commit."""
+        self.dbapi_connection.execute('ROLLBACK TO SAVEPOINT %s' % self._commit_marks[-1])
+
+    @contextmanager
+    def savepoint(self):
+        """Work done within the context is rolled back if an exception is raised."""
+        name = 'flexget_%d' % next(self._savepoint_ids)
+        self.dbapi_connection.execute('SAVEPOINT %s' % name)
+        self._mark_commit()
+        deferred = self.deferred
+        try:
+            yield
+        except:
+            self.dbapi_connection.execute('ROLLBACK TO SAVEPOINT %s' % name)
+            self.dbapi_connection.execute('RELEASE SAVEPOINT %s' % name)
+            self._commit_marks.pop()
+            raise
+        else:
+            # Also releases the commit mark within it
+            self.dbapi_connection.execute('RELEASE SAVEPOINT %s' % name)
+            self._commit_marks.pop()
+            if self.deferred != deferred:
+                # Work committed within the savepoint must not be undone by later rollbacks
+                self.dbapi_connection.execute('RELEASE SAVEPOINT %s' % self._commit_marks.pop())
+                self._mark_commit()
+
+    def commit(self):
+        """Commit the work of the group and end it."""
+        try:
+            self.dbapi_connection.execute('COMMIT')
+            if self.dbapi_connection.total_changes != self._changes:
+                # Committing without changes does not write anything
+                _count_commit()
+        finally:
+            self._end()
+        log.trace('commit group committed, %s session commits were deferred' % self.deferred)
+
+    def rollback(self):
+        try:
+            self.dbapi_connection.execute('ROLLBACK')
+        finally:
+            self._end()
+
+    def _end(self):
+        del _grouped_connections[id(self.dbapi_connection)]
+        self.dbapi_connection.isolation_level = self._isolation_level
+        self.connection.close()
+
+
 class ContextSession(sqlalchemy.orm.Session):
     """:class:`sqlalchemy.orm.Session` which can be used as context manager"""
     def __enter__(self):
@@ -3,7 +3,7 @@ import logging
 import os
 import re
 import sys
-from copy import copy
+from collections import Mapping
 from datetime import datetime, date, time
 import locale
 from email.utils import parsedate
@@ -15,11 +15,14 @@ from jinja2 import (Environment, StrictUndefined, ChoiceLoader,
 
 from flexget.event import event
 from flexget.utils.pathscrub import pathscrub
+from flexget.utils.tools import LRUCache
 
 log = logging.getLogger('utils.template')
 
 # The environment will be created after the manager has started
 environment = None
+# Templates compiled from strings, keyed by the template source
+template_cache = LRUCache(max_weight=1000, cache_time=None)
 
 
 class RenderError(Exception):
@@ -27,6 +30,35 @@ class RenderError(Exception):
     pass
 
 
+class EntryContext(Mapping):
+    """
+    Template context with some additional variables layered on top of an entry. Entry is not copied, and the
+    variables are looked up with :meth:`Entry.__getitem__`, so lazy fields still work.
+    """
+
+    def __init__(self, entry, variables):
+        self.entry = entry
+        self.variables = variables
+
+    def __getitem__(self, key):
+        if key in self.variables:
+            return self.variables[key]
+        return self.entry[key]
+
+    def __contains__(self, key):
+        return key in self.variables or key in self.entry
+
+    def __iter__(self):
+        for key in self.variables:
+            yield key
+        for key in self.entry:
+            if key not in self.variables:
+                yield key
+
+    def __len__(self):
+        return len(set(self.variables) | set(self.entry))
+
+
 def filter_pathbase(val):
     """Base name of a path."""
     return os.path.basename(val or '')
@@ -129,6 +161,7 @@ filter_d = filter_default
 def make_environment(manager):
     """Create our environment and add our custom filters"""
     global environment
+    template_cache.clear()
     environment = Environment(undefined=StrictUndefined,
         loader=ChoiceLoader([PackageLoader('flexget'),
                              FileSystemLoader(os.path.join(manager.config_base, 'templates'))]),
@@ -163,6 +196,19 @@ def get_template(templatename, pluginname=None):
         raise ValueError('Template not found: %s (%s)' % (templatename, pluginname))
 
 
+def compile_template(template_string):
+    """
+    :return: Compiled Template from `template_string`. Compiled templates are cached, so calling this repeatedly with
+        the same template is cheap.
+    """
+    try:
+        return template_cache[template_string]
+    except KeyError:
+        template = environment.from_string(template_string)
+        template_cache[template_string] = template
+        return template
+
+
 def render(template, context):
     """
     Renders a Template with `context` as its context.
@@ -172,7 +218,7 @@ def render(template, context):
     :return: The rendered template text.
     """
     if isinstance(template, basestring):
-        template = environment.from_string(template)
+        template = compile_template(template)
     try:
         result = template.render(context)
     except Exception as e:
@@ -187,21 +233,21 @@ def render_from_entry(template_string, entry):
     # If a plain string was passed, turn it into a Template
     if isinstance(template_string, basestring):
         try:
-            template = environment.from_string(template_string)
+            template = compile_template(template_string)
         except TemplateSyntaxError as e:
             raise RenderError('Error in template syntax: ' + e.message)
     else:
         # We can also support an actual Template being passed in
         template = template_string
-    # Make a copy of the Entry so we can add some more fields
-    variables = copy(entry)
-    variables['now'] = datetime.now()
+    # Layer some more fields on top of the Entry, without copying it
+    variables = {'now': datetime.now()}
     # Add task name to variables, usually it's there because metainfo_task plugin, but not always
-    if 'task' not in variables and hasattr(entry, 'task'):
+    if 'task' not in entry and getattr(entry, 'task', None):
         variables['task'] = entry.task.name
     # We use the lower level render function, so that our Entry is not cast into a dict (and lazy loading lost)
     try:
-        result = u''.join(template.root_render_func(template.new_context(variables, shared=True)))
+        context = template.new_context(EntryContext(entry, variables), shared=True)
+        result = u''.join(template.root_render_func(context))
     except:
         exc_info = sys.exc_info()
         try:
@@ -234,7 +280,7 @@ def render_from_task(template, task):
     :return: The rendered template text.
     """
     if isinstance(template, basestring):
-        template = environment.from_string(template)
+        template = compile_template(template)
     try:
         result = template.render({'task': task})
     except Exception as e:
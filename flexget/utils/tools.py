@@ -10,7 +10,8 @@ import re
 import sys
 import locale
 import Queue
-from collections import MutableMapping
+import threading
+from collections import MutableMapping, OrderedDict
 from urlparse import urlparse
 from htmlentitydefs import name2codepoint
 from datetime import timedelta, datetime
@@ -404,6 +405,130 @@ class TimedDict(MutableMapping):
         return '%s(%r)' % (self.__class__.__name__, dict(zip(self._store, (v[1] for v in self._store.values()))))
 
 
+class LRUCache(MutableMapping):
+    """
+    Acts like :class:`TimedDict`, but is also bounded by total weight and size of stored values. When either limit is
+    exceeded, least recently used keys are evicted. Each key may have its own cache time.
+
+    :param int max_weight: Maximum sum of `weigh(value)` for stored values, None for no limit
+    :param int max_size: Maximum sum of `sizeof(value)` (approximate bytes) for stored values, None for no limit
+    :param cache_time: Default time keys remain in the cache, None to keep them until evicted
+    :param weigh: Function returning the weight of a value, by default every value weighs 1
+    :param sizeof: Function returning the approximate size of a value in bytes, by default `sys.getsizeof`
+    """
+
+    def __init__(self, max_weight=None, max_size=None, cache_time='5 minutes', weigh=None, sizeof=None):
+        self.max_weight = max_weight
+        self.max_size = max_size
+        self.cache_time = None if cache_time is None else parse_timedelta(cache_time)
+        self.weigh = weigh or (lambda value: 1)
+        self.sizeof = sizeof or sys.getsizeof
+        # key: (add_time, cache_time, weight, size, value), in least recently used first order
+        self._store = OrderedDict()
+        self._lock = threading.RLock()
+        self.weight = 0
+        self.size = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def _expired(self, item):
+        add_time, cache_time = item[:2]
+        if cache_time is None:
+            cache_time = self.cache_time
+        return cache_time is not None and add_time < datetime.now() - cache_time
+
+    def _remove(self, key):
+        item = self._store.pop(key)
+        self.weight -= item[2]
+        self.size -= item[3]
+        return item
+
+    def __getitem__(self, key):
+        with self._lock:
+            try:
+                item = self._store[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            # Prune data and raise KeyError when expired
+            if self._expired(item):
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                raise KeyError(key, 'cache time expired')
+            # Move to the most recently used end
+            del self._store[key]
+            self._store[key] = item
+            self.hits += 1
+            return item[4]
+
+    def __contains__(self, key):
+        """Does not count as use of the key."""
+        with self._lock:
+            return key in self._store and not self._expired(self._store[key])
+
+    def set(self, key, value, cache_time=None):
+        """
+        Store `value` under `key`.
+
+        :param cache_time: Time this key remains in the cache, by default :attr:`cache_time`
+        """
+        weight, size = self.weigh(value), self.sizeof(value)
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+            if ((self.max_weight is not None and weight > self.max_weight) or
+                    (self.max_size is not None and size > self.max_size)):
+                # Would evict everything else and still not fit
+                self.evictions += 1
+                return
+            self._store[key] = (datetime.now(), cache_time and parse_timedelta(cache_time), weight, size, value)
+            self.weight += weight
+            self.size += size
+            self._evict()
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def _evict(self):
+        while self._store and ((self.max_weight is not None and self.weight > self.max_weight) or
+                               (self.max_size is not None and self.size > self.max_size)):
+            self._remove(next(iter(self._store)))
+            self.evictions += 1
+
+    def resize(self, max_weight=None, max_size=None):
+        """Change the limits, evicting keys if needed."""
+        with self._lock:
+            self.max_weight = max_weight
+            self.max_size = max_size
+            self._evict()
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __iter__(self):
+        # Uses our contains to skip expired items
+        return (key for key in list(self._store) if key in self)
+
+    def __len__(self):
+        return len(list(self.__iter__()))
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.weight = self.size = 0
+
+    def stats(self):
+        """:return: Dict with usage statistics of the cache."""
+        with self._lock:
+            return {'keys': len(self._store), 'weight': self.weight, 'max_weight': self.max_weight,
+                    'size': self.size, 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'expirations': self.expirations}
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, dict((k, v[4]) for k, v in self._store.iteritems()))
+
+
 class Tee(object):
     """Used so that output to sys.stdout can be grabbed and still displayed."""
     def __init__(self, *files):
@@ -107,7 +107,8 @@ def set_init_version(ver):
 
 @task
 @cmdopts([
-    ('online', None, 'Run online tests')
+    ('online', None, 'Run online tests'),
+    ('benchmark', None, 'Run benchmark tests')
 ])
 def test(options):
     """Run FlexGet unit tests"""
@@ -122,8 +123,13 @@ def test(options):
     #args.append('-v')
     args.append('--processes=4')
     args.append('-x')
+    excluded = []
     if not options.test.get('online'):
-        args.append('--attr=!online')
+        excluded.append('!online')
+    if not options.test.get('benchmark'):
+        excluded.append('!benchmark')
+    if excluded:
+        args.append('--attr=%s' % ','.join(excluded))
     args.append('--where=tests')
 
     # Store current path since --where changes it, restore when leaving
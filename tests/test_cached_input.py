@@ -3,7 +3,8 @@ from datetime import timedelta
 import os
 
 from tests import FlexGetBase, with_filecopy
-from flexget.utils.cached_input import cached
+from flexget.utils.cached_input import cached, EntrySnapshot
+from flexget.utils.tools import LRUCache
 from flexget import plugin
 from flexget.entry import Entry
 
@@ -58,3 +59,82 @@ class TestInputCache(FlexGetBase):
         assert self.task.entries, 'should have created entries at the start'
         self.execute_task('test_db')
         assert self.task.entries, 'should have created entries from the cache'
+
+
+class TestEntrySnapshot(object):
+
+    def lazy_title(self, entry, field):
+        return 'lazy value'
+
+    def make_entry(self):
+        entry = Entry(title='Test', url='http://test.com', tags=['a', 'b'], info={'size': 10})
+        entry.register_lazy_fields(['lazy'], self.lazy_title)
+        return entry
+
+    def test_materialized_entries_are_independent(self):
+        snapshot = EntrySnapshot([self.make_entry()])
+        first, second = snapshot.entries(), snapshot.entries()
+        first[0]['tags'].append('c')
+        first[0]['info']['size'] = 20
+        first[0]['title'] = 'Changed'
+        assert second[0]['tags'] == ['a', 'b'], 'mutable fields should not be shared'
+        assert snapshot.entries()[0]['info'] == {'size': 10}, 'snapshot should not change'
+        assert snapshot.entries()[0]['title'] == 'Test'
+        assert first[0] is not second[0]
+
+    def test_lazy_fields(self):
+        entry = EntrySnapshot([self.make_entry()]).entries()[0]
+        assert entry.is_lazy('lazy'), 'lazy field should stay lazy'
+        assert entry['lazy'] == 'lazy value'
+
+    def test_dumps(self):
+        snapshot = EntrySnapshot.loads(EntrySnapshot([self.make_entry()]).dumps())
+        assert len(snapshot) == 1
+        entry = snapshot.entries()[0]
+        assert isinstance(entry, Entry)
+        assert entry['url'] == 'http://test.com'
+        assert entry['original_url'] == 'http://test.com'
+        assert entry['tags'] == ['a', 'b']
+        assert 'lazy' not in entry, 'lazy fields should not be stored'
+
+
+class TestLRUCache(object):
+
+    def test_max_weight(self):
+        cache = LRUCache(max_weight=3, weigh=len)
+        cache['a'] = [1]
+        cache['b'] = [1, 2]
+        assert cache['a'] == [1]
+        cache['c'] = [1]
+        assert 'b' not in cache, 'least recently used key should have been evicted'
+        assert 'a' in cache and 'c' in cache
+        assert cache.stats()['evictions'] == 1
+        assert cache.weight == 2
+
+    def test_max_size(self):
+        cache = LRUCache(max_size=10, sizeof=lambda value: value)
+        cache['a'] = 6
+        cache['b'] = 6
+        assert 'a' not in cache
+        cache['c'] = 11
+        assert 'c' not in cache, 'value larger than the limit should not be stored'
+        assert 'b' in cache
+
+    def test_cache_time(self):
+        cache = LRUCache(cache_time='5 minutes')
+        cache.set('a', 1, cache_time=timedelta())
+        cache['b'] = 2
+        assert 'a' not in cache, 'key should expire with its own cache time'
+        assert cache['b'] == 2
+
+    def test_stats(self):
+        cache = LRUCache()
+        cache['a'] = 1
+        cache['a']
+        try:
+            cache['b']
+        except KeyError:
+            pass
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
@@ -0,0 +1,108 @@
+from __future__ import unicode_literals, division, absolute_import
+
+from flexget import plugin
+from flexget.event import event
+from flexget.manager import Session
+from flexget.task import TaskConfigHash
+from tests import FlexGetBase
+
+
+class CommitTestWrite(object):
+    def on_task_filter(self, task, config):
+        task.session.add(TaskConfigHash(task='written', hash=config))
+
+
+class CommitTestFail(object):
+    @plugin.priority(0)
+    def on_task_filter(self, task, config):
+        task.session.add(TaskConfigHash(task='failed', hash=config))
+        task.session.flush()
+        # Commits of other sessions are part of the plugin's changes as well
+        with Session() as session:
+            session.add(TaskConfigHash(task='failed_other', hash=config))
+        raise plugin.PluginError('failing on purpose')
+
+
+class CommitTestRollback(object):
+    def on_task_filter(self, task, config):
+        with Session() as session:
+            session.add(TaskConfigHash(task='committed', hash=config))
+        session = Session()
+        try:
+            session.add(TaskConfigHash(task='rolled_back', hash=config))
+            session.flush()
+            session.rollback()
+        finally:
+            session.close()
+
+
+@event('plugin.register')
+def register():
+    plugin.register(CommitTestWrite, 'commit_test_write', debug=True, api_ver=2)
+    plugin.register(CommitTestFail, 'commit_test_fail', debug=True, api_ver=2)
+    plugin.register(CommitTestRollback, 'commit_test_rollback', debug=True, api_ver=2)
+
+
+class TestCommitScope(FlexGetBase):
+
+    __yaml__ = """
+        templates:
+          global:
+            mock:
+              - {title: 'entry 1', url: 'http://localhost/1'}
+            accept_all: yes
+            seen: local
+        tasks:
+          per_plugin:
+            commit_test_write: per_plugin
+          per_phase:
+            commit_scope: phase
+            commit_test_write: per_phase
+          per_task:
+            commit_scope: task
+            commit_test_write: per_task
+          failing:
+            commit_scope: task
+            commit_test_write: failing
+            commit_test_fail: failing
+          rollback:
+            commit_scope: task
+            commit_test_rollback: rollback
+    """
+
+    def written(self, name):
+        with Session() as session:
+            return [h.task for h in session.query(TaskConfigHash).filter(TaskConfigHash.hash == name).all()]
+
+    def test_changes_are_committed(self):
+        for name in ('per_plugin', 'per_phase', 'per_task'):
+            self.execute_task(name)
+            assert self.written(name) == ['written'], 'changes of %s were not committed' % name
+            self.execute_task(name)
+            assert not self.task.entries, '%s seen entries were not committed' % name
+
+    def test_fewer_commits(self):
+        self.execute_task('per_plugin')
+        per_plugin = sum(self.task.commit_counts.values())
+        self.execute_task('per_phase')
+        per_phase = sum(self.task.commit_counts.values())
+        self.execute_task('per_task')
+        assert per_phase < per_plugin
+        # Scope is changed in start phase
+        commits = dict((phase, count) for phase, count in self.task.commit_counts.iteritems() if phase != 'start')
+        assert sum(commits.values()) == 1 and commits['task'] == 1, 'task should be committed once'
+
+    def test_failing_plugin_is_rolled_back(self):
+        self.execute_task('failing', abort_ok=True)
+        assert self.task.aborted
+        assert self.written('failing') == ['written'], 'only changes of the failed plugin should be rolled back'
+
+    def test_session_rollback(self):
+        self.execute_task('rollback')
+        assert self.written('rollback') == ['committed'], 'rollback of a session should undo its work in the group'
+
+    def test_task_scope_with_concurrent_tasks(self):
+        self.manager.config['max_concurrent_tasks'] = 2
+        self.execute_task('per_task')
+        assert self.task.commit_scope == 'phase', 'concurrent tasks should not hold the database for a whole task'
+        assert self.written('per_task') == ['written']
@@ -1,7 +1,39 @@
 from __future__ import unicode_literals, division, absolute_import
+from nose.tools import raises
+
+from flexget.entry import Entry
+from flexget.plugins.filter.if_condition import FilterIf, compile_condition
 from tests import FlexGetBase
 
 
+class TestCompiledCondition(object):
+
+    def test_compiled_once(self):
+        assert compile_condition('year > 2000') is compile_condition('year > 2000')
+
+    @raises(ValueError)
+    def test_forbidden(self):
+        compile_condition('title.__class__')
+
+    def test_lazy_field(self):
+        calls = []
+
+        def lazy_year(entry, field):
+            calls.append(field)
+            entry['year'] = 2010
+            return 2010
+
+        entry = Entry(title='test', url='http://example.com')
+        entry.register_lazy_fields(['year'], lazy_year)
+        filter_if = FilterIf()
+        assert filter_if.check_condition('title == "test"', entry)
+        assert not calls, 'unused lazy fields should not be evaluated'
+        assert filter_if.check_condition('year == 2010 and title == "test"', entry)
+        assert calls == ['year']
+        assert entry['year'] == 2010, 'evaluated field should be stored in the entry'
+        assert not filter_if.check_condition('missing_field == 1', entry)
+
+
 class TestCondition(FlexGetBase):
 
     __yaml__ = """
@@ -68,6 +100,23 @@ class TestCondition(FlexGetBase):
         assert entry
         assert len(self.task.accepted) == 1
 
+    def test_compiled_once_per_task(self):
+        from flexget.plugins.filter import if_condition
+        created = []
+
+        class CountedTask(if_condition.Task):
+            def __init__(self, *args, **kwargs):
+                created.append(args[1])
+                super(CountedTask, self).__init__(*args, **kwargs)
+
+        if_condition.Task = CountedTask
+        try:
+            self.execute_task('test_sub_plugin')
+        finally:
+            if_condition.Task = CountedTask.__bases__[0]
+        assert self.task.find_entry('accepted', title='test', some_field='some value')
+        assert created == ['test_sub_plugin'], 'conditions should be compiled once, not in every phase'
+
 
 class TestQualityCondition(FlexGetBase):
 
@@ -1,6 +1,8 @@
 from __future__ import unicode_literals, division, absolute_import
+import copy
 
 import jsonschema
+import mock
 
 from flexget import config_schema
 from tests import FlexGetBase
@@ -149,3 +151,38 @@ class TestSchemaValidator(FlexGetBase):
         config = {"p": "foo"}
         config_schema.process_config(config, schema)
         assert config["p"] == "foo"
+
+
+class TestIncrementalValidator(FlexGetBase):
+
+    def setup(self):
+        super(TestIncrementalValidator, self).setup()
+        self.validator = config_schema.IncrementalValidator()
+        self.config = {'tasks': {'a': {'rss': {'url': 'http://localhost/rss'}}, 'b': {'mock': [{'title': 'b'}]}}}
+
+    def validated_parts(self, config):
+        """Validates `config`, returns number of parts validated"""
+        with mock.patch.object(config_schema, 'process_config', wraps=config_schema.process_config) as process:
+            errors = self.validator.validate(config)
+        assert not errors, errors
+        structure_schemas = self.validator.structure_schemas.values()
+        return len([c for c in process.call_args_list if c[0][1] not in structure_schemas])
+
+    def test_only_changed_parts_are_validated(self):
+        assert self.validated_parts(copy.deepcopy(self.config)) == 2
+        assert self.validated_parts(copy.deepcopy(self.config)) == 0, 'unchanged config should not be validated'
+        self.config['tasks']['b']['mock'].append({'title': 'c'})
+        assert self.validated_parts(copy.deepcopy(self.config)) == 1, 'only changed task should be validated'
+
+    def test_defaults_are_restored(self):
+        self.validator.validate(copy.deepcopy(self.config))
+        config = copy.deepcopy(self.config)
+        assert self.validated_parts(config) == 0
+        assert config['tasks']['a']['rss']['all_entries'] is True, 'defaults should be set to unchanged parts'
+
+    def test_error_paths(self):
+        self.validator.validate(copy.deepcopy(self.config))
+        self.config['tasks']['b']['mock'] = 'invalid'
+        self.config['unknown_key'] = True
+        errors = self.validator.validate(self.config)
+        assert set(e.json_pointer for e in errors) == set(['/', '/tasks/b/mock'])
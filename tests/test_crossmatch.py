@@ -1,6 +1,23 @@
 from __future__ import unicode_literals, division, absolute_import
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.event import event
+from flexget.plugins.filter.crossmatch import MatchIndex
 from tests import FlexGetBase
 
+
+class CrossmatchSource(object):
+    titles = []
+
+    def on_task_input(self, task, config):
+        return [Entry(title=title, url='http://localhost/%s' % title) for title in self.titles]
+
+
+@event('plugin.register')
+def register():
+    plugin.register(CrossmatchSource, 'crossmatch_source', debug=True, api_ver=2)
+
+
 class TestCrossmatch(FlexGetBase):
     __yaml__ = """
         tasks:
@@ -14,9 +31,58 @@ class TestCrossmatch(FlexGetBase):
                 - title: entry 2
               action: reject
               fields: [title]
+          test_multiple_fields:
+            mock:
+            - {title: entry 1, url: 'http://example.com/1'}
+            - {title: entry 2, tags: [a, b]}
+            - {title: entry 3, tags: [a]}
+            - {title: entry 4}
+            crossmatch:
+              from:
+              - mock:
+                - {title: other 1, url: 'http://example.com/1'}
+                - {title: other 2, tags: [a, b]}
+              action: accept
+              fields: [url, tags]
+          test_not_cached:
+            mock:
+            - title: entry 1
+            - title: entry 2
+            crossmatch:
+              from:
+              - crossmatch_source: yes
+              action: reject
+              fields: [title]
     """
 
     def test_reject_title(self):
         self.execute_task('test_title')
         assert self.task.find_entry('rejected', title='entry 2')
         assert len(self.task.rejected) == 1
+
+    def test_multiple_fields(self):
+        self.execute_task('test_multiple_fields')
+        assert self.task.find_entry('accepted', title='entry 1'), 'should match on url'
+        assert self.task.find_entry('accepted', title='entry 2'), 'should match on list field'
+        assert not self.task.find_entry('accepted', title='entry 3')
+        assert not self.task.find_entry('accepted', title='entry 4'), 'missing fields should not match'
+
+    def test_uncached_input_ran_again(self):
+        CrossmatchSource.titles = ['entry 2']
+        self.execute_task('test_not_cached')
+        assert self.task.find_entry('rejected', title='entry 2')
+        CrossmatchSource.titles = ['entry 1']
+        self.execute_task('test_not_cached')
+        assert self.task.find_entry('rejected', title='entry 1'), 'input results should not be reused'
+        assert not self.task.find_entry('rejected', title='entry 2')
+
+
+class TestMatchIndex(object):
+
+    def test_candidates(self):
+        entries = [Entry(title='a', tags=['x']), Entry(title='b', year=2000), Entry(title='c', year=2000.0)]
+        index = MatchIndex(entries, ['title', 'year', 'tags'])
+        assert index.candidates(Entry(title='c', year=2000)) == entries[1:], 'equal numbers should be found'
+        assert index.candidates(Entry(title='b')) == entries[1:2]
+        assert index.candidates(Entry(title='b', tags='x')) == entries[:2], 'unindexed values are always candidates'
+        assert index.candidates(Entry(title='d', tags=['y'])) == entries, 'unhashable values can equal anything'
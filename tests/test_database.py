@@ -0,0 +1,118 @@
+from __future__ import unicode_literals, division, absolute_import
+import os
+import copy
+import shutil
+import tempfile
+import threading
+
+from sqlalchemy.pool import QueuePool, SingletonThreadPool
+
+from flexget.utils.sqlalchemy_utils import create_sqlite_engine, database_settings, sqlite_pragmas
+from tests import FlexGetBase
+
+
+class TestSqliteEngine(object):
+
+    def setup(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.uri = 'sqlite:///%s' % os.path.join(self.tmp_dir, 'test.sqlite')
+
+    def teardown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_performance_settings(self):
+        settings = database_settings({'performance': True, 'synchronous': 'full'})
+        assert settings['wal'] is True
+        assert settings['synchronous'] == 'full', 'explicit settings should override performance preset'
+        assert 'PRAGMA cache_size=-16384' in sqlite_pragmas(settings)
+
+    def test_pragmas_applied(self):
+        engine = create_sqlite_engine(self.uri, database_settings({'performance': True}))
+        try:
+            assert isinstance(engine.pool, QueuePool)
+            assert engine.execute('PRAGMA journal_mode').scalar() == 'wal'
+            # 1 = NORMAL
+            assert engine.execute('PRAGMA synchronous').scalar() == 1
+        finally:
+            engine.dispose()
+
+    def test_defaults(self):
+        engine = create_sqlite_engine(self.uri)
+        try:
+            assert isinstance(engine.pool, SingletonThreadPool)
+            assert engine.execute('PRAGMA journal_mode').scalar() == 'delete'
+        finally:
+            engine.dispose()
+
+
+class BlockingTask(object):
+    """Stands in for a task in the task queue, runs until released."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def execute(self):
+        self.started.set()
+        self.release.wait()
+
+
+class TestDatabaseReload(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock: []
+    """
+
+    def setup(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.database_uri = 'sqlite:///%s' % os.path.join(self.tmp_dir, 'test.sqlite')
+        super(TestDatabaseReload, self).setup()
+
+    def teardown(self):
+        self.manager.task_queue.shutdown(finish_queue=False)
+        super(TestDatabaseReload, self).teardown()
+        shutil.rmtree(self.tmp_dir)
+
+    def update_database_config(self, database):
+        config = copy.deepcopy(self.manager.config)
+        config['database'] = database
+        self.manager.update_config(config)
+
+    def test_engine_replaced_when_idle(self):
+        engine = self.manager.engine
+        self.update_database_config({'wal': True})
+        assert self.manager.engine is not engine, 'engine should be replaced when settings change'
+        assert self.manager.engine.execute('PRAGMA journal_mode').scalar() == 'wal'
+
+    def test_engine_kept_while_running(self):
+        engine = self.manager.engine
+        task = BlockingTask()
+        self.manager.task_queue.start()
+        self.manager.task_queue.put(task)
+        assert task.started.wait(5)
+        try:
+            self.update_database_config({'wal': True})
+            assert self.manager.engine is engine, 'engine should not be replaced while tasks are running'
+        finally:
+            task.release.set()
+        self.manager.task_queue.run_queue.join()
+        self.update_database_config({'wal': True})
+        assert self.manager.engine is not engine, 'settings should be applied on reload when no task is running'
+
+
+class TestInMemoryDatabaseReload(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock: []
+    """
+
+    def test_engine_kept(self):
+        engine = self.manager.engine
+        config = copy.deepcopy(self.manager.config)
+        config['database'] = {'pool_size': 2}
+        self.manager.update_config(config)
+        assert self.manager.engine is engine, 'in-memory database should never be replaced'
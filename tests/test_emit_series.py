@@ -18,6 +18,8 @@ class TestEmitSeries(FlexGetBase):
               - Test Series 6
               - Test Series 7
               - Test Series 8
+              - Multiple Series
+              - Numbered Series
           test_emit_series_backfill:
             emit_series:
               backfill: yes
@@ -83,6 +85,14 @@ class TestEmitSeries(FlexGetBase):
             regexp:
               reject:
               - .
+          test_emit_series_multiple:
+            emit_series: yes
+            series:
+            - Multiple Series:
+                identified_by: ep
+            - Numbered Series:
+                identified_by: sequence
+            rerun: 0
     """
 
     def inject_series(self, release_name):
@@ -104,6 +114,17 @@ class TestEmitSeries(FlexGetBase):
         assert self.task.find_entry(title='Test Series 1 S02E06')
         assert self.task.find_entry(title='Test Series 1 S02E07')
 
+    def test_emit_series_multiple(self):
+        self.inject_series('Multiple Series S01E02')
+        self.inject_series('Multiple Series S01E04')
+        self.inject_series('Numbered Series 12')
+        self.execute_task('test_emit_series_multiple')
+        for title in ['Multiple Series S01E01', 'Multiple Series S01E03', 'Multiple Series S01E05', 'Numbered Series 2',
+                      'Numbered Series 11', 'Numbered Series 13']:
+            assert self.task.find_entry(title=title), '%s should have been emitted' % title
+        assert not self.task.find_entry(title='Multiple Series S01E02')
+        assert not self.task.find_entry(title='Numbered Series 1'), 'should not look too far back for sequences'
+
     def test_emit_series_rejected(self):
         self.inject_series('Test Series 2 S01E03 720p')
         self.execute_task('test_emit_series_rejected')
@@ -0,0 +1,145 @@
+from __future__ import unicode_literals, division, absolute_import
+import os
+import shutil
+import tempfile
+import time
+
+from nose.plugins.attrib import attr
+from nose.tools import raises
+from path import path
+from sqlalchemy.exc import IntegrityError
+
+from flexget.manager import Session
+from flexget.utils.fsindex import IndexedDir, IndexedRoot, forget, scan
+from tests import FlexGetBase
+
+
+def make_tree(root, dirs, files):
+    for dirname in dirs:
+        os.makedirs(os.path.join(root, dirname))
+    for filename in files:
+        open(os.path.join(root, filename), 'w').close()
+    # Directories modified just now would be listed again on every scan
+    age_tree(root)
+
+
+def age_tree(root, age=60):
+    mtime = time.time() - age
+    for dirname, _, _ in os.walk(root):
+        os.utime(dirname, (mtime, mtime))
+
+
+class TestFsIndex(FlexGetBase):
+
+    __yaml__ = """
+        tasks: {}
+    """
+
+    def setup(self):
+        super(TestFsIndex, self).setup()
+        self.tmp_dir = tempfile.mkdtemp()
+        make_tree(self.tmp_dir, ['a', 'a/b', 'c'], ['1.txt', 'a/2.txt', 'a/b/3.txt'])
+        self.session = Session()
+
+    def teardown(self):
+        self.session.close()
+        shutil.rmtree(self.tmp_dir)
+        super(TestFsIndex, self).teardown()
+
+    def listed(self):
+        return dict((indexed_dir.path, indexed_dir.files) for indexed_dir in self.session.query(IndexedDir))
+
+    def test_same_as_walk(self):
+        items = scan(self.session, self.tmp_dir)
+        assert [item.path for item in items] == list(path(self.tmp_dir).walk())
+        assert [item.path for item in items if item.isdir] == list(path(self.tmp_dir).walkdirs())
+        assert all(item.size == 0 for item in items if not item.isdir)
+        items = scan(self.session, self.tmp_dir, recursive=False)
+        assert sorted(item.path for item in items) == sorted(path(self.tmp_dir).listdir())
+
+    def test_only_changed_dirs_listed(self):
+        scan(self.session, self.tmp_dir)
+        # Mark the stored listings, only the changed directory should be replaced
+        for indexed_dir in self.session.query(IndexedDir):
+            indexed_dir.files = indexed_dir.files + [('marker', False, 0, 0)]
+        open(os.path.join(self.tmp_dir, 'a', 'b', '4.txt'), 'w').close()
+        age_tree(os.path.join(self.tmp_dir, 'a', 'b'), age=30)
+        names = [item.path.name for item in scan(self.session, self.tmp_dir)]
+        assert '4.txt' in names, 'changed directory should be listed again'
+        listed = self.listed()
+        assert ('marker', False, 0, 0) in listed[''], 'unchanged directory should not be listed again'
+        assert ('marker', False, 0, 0) not in listed['a/b']
+        assert ('marker', False, 0, 0) in listed['a']
+
+    def test_recently_modified_relisted(self):
+        os.utime(self.tmp_dir, None)
+        scan(self.session, self.tmp_dir)
+        open(os.path.join(self.tmp_dir, '5.txt'), 'w').close()
+        assert '5.txt' in [item.path.name for item in scan(self.session, self.tmp_dir)]
+
+    def test_removed_dirs_forgotten(self):
+        scan(self.session, self.tmp_dir)
+        shutil.rmtree(os.path.join(self.tmp_dir, 'a'))
+        age_tree(self.tmp_dir)
+        items = scan(self.session, self.tmp_dir)
+        assert [item.path for item in items] == list(path(self.tmp_dir).walk())
+        assert sorted(self.listed()) == ['', 'c']
+
+    @raises(IntegrityError)
+    def test_unique_dirs(self):
+        scan(self.session, self.tmp_dir)
+        root = self.session.query(IndexedRoot).one()
+        root.dirs.append(IndexedDir('a'))
+        self.session.flush()
+
+    def test_forget(self):
+        scan(self.session, self.tmp_dir)
+        assert forget(self.session, self.tmp_dir) == 1
+        assert not self.session.query(IndexedRoot).count()
+        assert not self.session.query(IndexedDir).count(), 'listings should be removed with the path'
+
+
+@attr(benchmark=True)
+class TestFsIndexBenchmark(FlexGetBase):
+
+    __yaml__ = """
+        tasks: {}
+    """
+
+    def setup(self):
+        super(TestFsIndexBenchmark, self).setup()
+        self.tmp_dir = tempfile.mkdtemp()
+        # 50 * 20 directories with 500 files each
+        for i in xrange(50):
+            for j in xrange(20):
+                dirname = os.path.join(self.tmp_dir, 'show %s' % i, 'season %s' % j)
+                os.makedirs(dirname)
+                for k in xrange(500):
+                    open(os.path.join(dirname, 'Show.%s.S%02dE%03d.720p.mkv' % (i, j, k)), 'w').close()
+        age_tree(self.tmp_dir)
+
+    def teardown(self):
+        shutil.rmtree(self.tmp_dir)
+        super(TestFsIndexBenchmark, self).teardown()
+
+    def test_scan_large_tree(self):
+        start = time.time()
+        walked = len(list(path(self.tmp_dir).walk()))
+        self.log.info('path.walk of %s items took %.2fs' % (walked, time.time() - start))
+        session = Session()
+        try:
+            start = time.time()
+            assert len(scan(session, self.tmp_dir)) == walked
+            session.commit()
+            self.log.info('cold index scan took %.2fs' % (time.time() - start))
+            start = time.time()
+            assert len(scan(session, self.tmp_dir)) == walked
+            session.commit()
+            self.log.info('warm index scan took %.2fs' % (time.time() - start))
+            os.utime(os.path.join(self.tmp_dir, 'show 1', 'season 1'), None)
+            start = time.time()
+            assert len(scan(session, self.tmp_dir)) == walked
+            session.commit()
+            self.log.info('index scan with one changed directory took %.2fs' % (time.time() - start))
+        finally:
+            session.close()
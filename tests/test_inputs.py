@@ -1,7 +1,48 @@
 from __future__ import unicode_literals, division, absolute_import
+import threading
+import time
+
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.event import event
 from tests import FlexGetBase
 
 
+class DelayedInput(object):
+    """Returns entries after a delay, and records the thread and session it was ran with."""
+    calls = []
+
+    def on_task_input(self, task, config):
+        time.sleep(config['delay'])
+        DelayedInput.calls.append((threading.current_thread().name, task.session))
+        if config.get('persist'):
+            task.simple_persistence[config['titles'][0]] = True
+        return [Entry(title=title, url='http://%s' % title) for title in config['titles']]
+
+
+class DisablingInput(object):
+    """Disables the input phase, ran before other inputs."""
+
+    @plugin.priority(255)
+    def on_task_input(self, task, config):
+        task.disable_phase('input')
+
+
+class LateInput(object):
+    """Returns an entry, ran after other inputs."""
+
+    @plugin.priority(0)
+    def on_task_input(self, task, config):
+        return [Entry(title='late entry', url='http://late')]
+
+
+@event('plugin.register')
+def register():
+    plugin.register(DelayedInput, 'delayed_input', debug=True, api_ver=2)
+    plugin.register(DisablingInput, 'disabling_input', debug=True, api_ver=2)
+    plugin.register(LateInput, 'late_input', debug=True, api_ver=2)
+
+
 class TestInputs(FlexGetBase):
 
     __yaml__ = """
@@ -44,3 +85,72 @@ class TestInputs(FlexGetBase):
         # TODO: fix this
         self.execute_task('test_no_url')
         assert len(self.task.entries) == 2, 'Should have created 2 entries'"""
+
+
+class TestParallelInputs(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test_parallel:
+            parallel_inputs: yes
+            inputs:
+              - delayed_input: {delay: 0.3, titles: [title1, title2]}
+              - delayed_input: {delay: 0, titles: [title3, title2]}
+          test_task_inputs:
+            parallel_inputs: 2
+            mock:
+              - title: mock entry
+            delayed_input: {delay: 0, titles: [delayed entry]}
+          test_persistence:
+            parallel_inputs: 2
+            inputs:
+              - delayed_input: {delay: 0, titles: [title1], persist: yes}
+              - delayed_input: {delay: 0, titles: [title2], persist: yes}
+          test_serial:
+            inputs:
+              - delayed_input: {delay: 0, titles: [title1]}
+              - delayed_input: {delay: 0, titles: [title2]}
+          test_disabled:
+            parallel_inputs: 2
+            disabling_input: yes
+            delayed_input: {delay: 0.3, titles: [delayed entry]}
+            late_input: yes
+    """
+
+    def setup(self):
+        super(TestParallelInputs, self).setup()
+        DelayedInput.calls = []
+
+    def test_parallel(self):
+        self.execute_task('test_parallel')
+        assert [e['title'] for e in self.task.entries] == ['title1', 'title2', 'title3'], \
+            'entries should be in configured order'
+        assert len(set(thread for thread, session in DelayedInput.calls)) == 2, 'inputs should run in own threads'
+        assert len(set(session for thread, session in DelayedInput.calls)) == 2, 'inputs should have own sessions'
+        assert all(DelayedInput.calls), 'session should be set for inputs'
+
+    def test_task_inputs(self):
+        self.execute_task('test_task_inputs')
+        assert self.task.find_entry(title='mock entry')
+        assert self.task.find_entry(title='delayed entry')
+        assert DelayedInput.calls[0][0] != threading.current_thread().name, 'input should run in worker thread'
+
+    def test_serial_uses_plugin_session(self):
+        self.execute_task('test_serial')
+        assert len(self.task.entries) == 2
+        assert all(thread == threading.current_thread().name for thread, session in DelayedInput.calls)
+        assert DelayedInput.calls[0][1] is DelayedInput.calls[1][1], 'serial inputs should use the plugin session'
+
+    def test_disabled_phase(self):
+        self.execute_task('test_disabled')
+        assert not self.task.find_entry(title='late entry'), 'inputs should not be started after phase is disabled'
+
+    def test_persistence_plugin(self):
+        from flexget.manager import Session
+        from flexget.utils.simple_persistence import SimpleKeyValue
+        self.execute_task('test_persistence')
+        assert len(set(thread for thread, session in DelayedInput.calls)) == 2, 'inputs should run in own threads'
+        with Session() as session:
+            plugins = [kv.plugin for kv in
+                       session.query(SimpleKeyValue).filter(SimpleKeyValue.task == 'test_persistence')]
+        assert plugins == ['inputs', 'inputs'], 'values should be persisted for the running plugin, got %s' % plugins
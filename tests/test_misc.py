@@ -248,3 +248,27 @@ class TestSetPlugin(FlexGetBase):
         assert 'field' not in entry,\
                 '`field` should not have been created when jinja rendering fails'
         assert entry['otherfield'] == 'no series'
+
+
+class TestRenderFromEntry(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Entry 1'}
+    """
+
+    def test_layered_context(self):
+        from flexget.utils.template import render_from_entry
+        self.execute_task('test')
+        entry = self.task.find_entry(title='Entry 1')
+        entry.register_lazy_fields(['lazy_field'], lambda entry, field: 'lazy value')
+        assert render_from_entry('{{title}} {{lazy_field}} {{task}}', entry) == 'Entry 1 lazy value test'
+        assert render_from_entry('{{now.year}}', entry)
+        assert 'now' not in entry, 'rendering should not modify the entry'
+        assert entry.is_lazy('lazy_field')
+
+    def test_compiled_template_cache(self):
+        from flexget.utils.template import compile_template
+        assert compile_template('{{title}}') is compile_template('{{title}}'), 'compiled template should be reused'
@@ -1,14 +1,45 @@
 from __future__ import unicode_literals, division, absolute_import
 import os
 import glob
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
 
+from nose.plugins.attrib import attr
 from nose.tools import raises
 
-from tests import FlexGetBase
+from tests import FlexGetBase, log
 from flexget import plugin, plugins
+from flexget.event import event, remove_event_handlers
+
+startup_config = """
+tasks:
+  startup:
+    mock:
+      - {title: 'entry 1', url: 'http://localhost/1'}
+    accept_all: yes
+"""
+
+lazy_plugin_source = """
+from flexget import plugin
 from flexget.event import event
 
 
+class LazyTestPlugin(object):
+    schema = {'type': 'boolean'}
+
+    def on_task_input(self, task, config):
+        return []
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(LazyTestPlugin, 'lazy_test_plugin', api_ver=2)
+"""
+
+
 class TestPluginApi(object):
     """
     Contains plugin api related tests
@@ -80,3 +111,101 @@ class TestExternalPluginLoading(FlexGetBase):
     def test_external_plugin_loading(self):
         self.execute_task('ext_plugin')
         assert self.task.find_entry(title='test entry'), 'External plugin did not create entry'
+
+
+class TestLazyPluginLoading(object):
+    module = 'flexget.plugins.lazy_test_plugin'
+
+    def setup(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        plugin_dir = os.path.join(self.tmp_dir, 'plugins')
+        os.mkdir(plugin_dir)
+        with open(os.path.join(plugin_dir, 'lazy_test_plugin.py'), 'w') as f:
+            f.write(lazy_plugin_source)
+        self.manifest = os.path.join(self.tmp_dir, 'manifest.json')
+        os.environ['FLEXGET_PLUGIN_PATH'] = plugin_dir
+        os.environ['FLEXGET_PLUGIN_MANIFEST'] = self.manifest
+
+    def forget_plugin(self):
+        plugin.plugins.pop('lazy_test_plugin', None)
+        remove_event_handlers('plugin.lazy_test_plugin.input')
+        sys.modules.pop(self.module, None)
+
+    def teardown(self):
+        self.forget_plugin()
+        del os.environ['FLEXGET_PLUGIN_PATH']
+        del os.environ['FLEXGET_PLUGIN_MANIFEST']
+        shutil.rmtree(self.tmp_dir)
+        plugin.load_plugins()
+
+    def test_lazy_load(self):
+        plugin.load_plugins(lazy=True)
+        assert os.path.exists(self.manifest), 'manifest should have been written'
+        assert not plugin.get_plugin_by_name('lazy_test_plugin').lazy
+        # Start over, as if FlexGet was restarted
+        self.forget_plugin()
+        plugin.load_plugins(lazy=True)
+        info = plugin.get_plugin_by_name('lazy_test_plugin')
+        assert info.lazy, 'plugin should be loaded from manifest'
+        assert self.module not in sys.modules, 'plugin module should not be imported before use'
+        assert 'input' in info.phase_handlers
+        assert info.schema['type'] == 'boolean'
+        assert info.instance.__class__.__name__ == 'LazyTestPlugin'
+        assert not info.lazy, 'plugin should be resolved when used'
+        assert self.module in sys.modules
+        assert info.phase_handlers['input'].func == info.instance.on_task_input
+
+    def test_changed_files(self):
+        plugin.load_plugins(lazy=True)
+        self.forget_plugin()
+        plugin_file = os.path.join(os.environ['FLEXGET_PLUGIN_PATH'], 'lazy_test_plugin.py')
+        os.utime(plugin_file, (time.time() + 10, time.time() + 10))
+        plugin.load_plugins(lazy=True)
+        assert not plugin.get_plugin_by_name('lazy_test_plugin').lazy, 'out of date manifest should not be used'
+
+    def test_manifest_per_plugin_path(self):
+        del os.environ['FLEXGET_PLUGIN_MANIFEST']
+        try:
+            path = plugin._get_manifest_path(['/a/plugins', '/a/flexget/plugins'])
+            assert path == plugin._get_manifest_path(['/a/plugins', '/a/flexget/plugins'])
+            assert path != plugin._get_manifest_path(['/b/plugins', '/b/flexget/plugins']), \
+                'installs with different plugin paths should not share a manifest'
+        finally:
+            os.environ['FLEXGET_PLUGIN_MANIFEST'] = self.manifest
+
+
+@attr(benchmark=True)
+class TestStartupBenchmark(object):
+
+    def setup(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.tmp_dir, 'manifest.json')
+        self.config = os.path.join(self.tmp_dir, 'config.yml')
+        with open(self.config, 'w') as config:
+            config.write(startup_config)
+
+    def teardown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def startup_time(self, manifest, *args):
+        env = dict(os.environ, FLEXGET_PLUGIN_MANIFEST=manifest)
+        command = [sys.executable, '-c', 'from flexget import main; main()'] + list(args)
+        start = time.time()
+        subprocess.call(command, env=env, stdout=open(os.devnull, 'w'), stderr=subprocess.STDOUT)
+        return time.time() - start
+
+    def compare(self, *args):
+        # First run writes the manifest
+        self.startup_time(self.manifest, *args)
+        eager = min(self.startup_time('', *args) for _ in range(3))
+        lazy = min(self.startup_time(self.manifest, *args) for _ in range(3))
+        log.info('flexget %s took %.2fs eager, %.2fs with plugin manifest' % (' '.join(args), eager, lazy))
+        return eager, lazy
+
+    def test_help(self):
+        eager, lazy = self.compare('--help')
+        assert lazy < eager, 'lazy plugin loading should be faster'
+
+    def test_execute(self):
+        eager, lazy = self.compare('-c', self.config, 'execute', '--tasks', 'startup')
+        assert lazy < eager, 'lazy plugin loading should be faster'
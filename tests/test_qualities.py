@@ -2,7 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 from flexget.plugins.parsers.parser_guessit import ParserGuessit
 from flexget.plugins.parsers.parser_internal import ParserInternal
 from tests import FlexGetBase, build_parser_function
-from flexget.utils.qualities import Quality
+from flexget.utils.qualities import Quality, Requirements
 
 
 class TestQualityModule(object):
@@ -16,6 +16,21 @@ class TestQualityModule(object):
             got_val = Quality(test_val).name
             assert got_val == '720p', got_val
 
+    def test_parse_cache(self):
+        first = Quality('Test.File.720p.hdtv')
+        first.source = Quality('bluray').source
+        second = Quality('Test.File.720p.hdtv')
+        assert second.name == '720p hdtv', 'cached parse result should not be modified through an instance'
+        assert second.clean_text == 'Test.File..', second.clean_text
+
+    def test_requirements_recompiled(self):
+        req = Requirements('720p+')
+        assert req.allows('1080p hdtv')
+        req.parse_requirements('!hdtv')
+        assert not req.allows('1080p hdtv'), 'added requirement should be applied'
+        assert not req.allows('480p webdl')
+        assert req.allows('480p webdl', loose=True)
+
 
 class QualityParser(object):
 
@@ -1,5 +1,11 @@
 from __future__ import unicode_literals, division, absolute_import
-from tests import FlexGetBase, build_parser_function
+import time
+
+from nose.plugins.attrib import attr
+
+from flexget.entry import Entry
+from flexget.plugins.filter.regexp import EntryValues, FilterRegexp, RegexpList
+from tests import FlexGetBase, build_parser_function, log
 
 
 class TestRegexp(FlexGetBase):
@@ -150,4 +156,47 @@ class TestGuessitRegexp(TestRegexp):
 class TestInternalRegexp(TestRegexp):
     def __init__(self):
         super(TestInternalRegexp, self).__init__()
-        self.add_tasks_function(build_parser_function('internal'))
\ No newline at end of file
+        self.add_tasks_function(build_parser_function('internal'))
+
+class TestRegexpList(object):
+
+    def test_first_match(self):
+        regexps = FilterRegexp().prepare_config({'accept': ['foo', 'ba.', r'(z)\1', 'baz', {'url': {'from': 'url'}}]})
+        regexps = [regexp_opts.items()[0] for regexp_opts in regexps['accept']]
+        regexp_list = RegexpList([(regexp, opts.get('from')) for regexp, opts in regexps])
+        assert [chunk[3] is not None for chunk in regexp_list.chunks] == [True, False, False, False], \
+            'backreference should not be combined'
+        values = EntryValues(Entry(title='xbaz foo', url='http://url'))
+        assert regexp_list.first_match(values) == 0, 'first regexp in config order should win, not leftmost match'
+        assert regexp_list.first_match(values, 1) == 1
+        assert regexp_list.first_match(values, 2) == 3
+        assert regexp_list.first_match(EntryValues(Entry(title='zz', url='x'))) == 2
+        assert regexp_list.first_match(EntryValues(Entry(title='none', url='http://url'))) == 4
+
+
+@attr(benchmark=True)
+class TestRegexpBenchmark(object):
+
+    class MockTask(object):
+        def __init__(self, entries):
+            self.entries = entries
+
+    def test_many_regexps(self):
+        patterns = ['show.%d.s0[1-5]' % i for i in xrange(1000)]
+        titles = ['Show.%d.S0%dE01.720p.HDTV' % (i % 2000, i % 9) for i in xrange(5000)]
+        plugin = FilterRegexp()
+        regexps = plugin.prepare_config({'accept': patterns})['accept']
+
+        # Testing regexps one by one is slow, time a tenth of the entries
+        start = time.time()
+        accepted = [entry for entry in (Entry(title=title, url='') for title in titles[::10])
+                    if any(plugin.matches(entry, regexp_opts.keys()[0]) for regexp_opts in regexps)]
+        sequential = (time.time() - start) * 10
+
+        entries = [Entry(title=title, url='') for title in titles]
+        start = time.time()
+        plugin.filter(self.MockTask(entries), 'accept', regexps)
+        combined = time.time() - start
+        log.info('1000 regexps x 5000 entries: %.2fs one by one, %.2fs combined' % (sequential, combined))
+        assert sum(1 for entry in entries[::10] if entry.accepted) == len(accepted)
+        assert combined < sequential
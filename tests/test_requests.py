@@ -0,0 +1,51 @@
+from __future__ import unicode_literals, division, absolute_import
+import time
+
+from flexget.utils.requests import HostLimiter, HostLimits, Session
+
+
+class TestHostLimiter(object):
+
+    def test_token_bucket(self):
+        limiter = HostLimiter('example.com', delay='0.2 seconds', burst=2)
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == 0, 'burst should allow two requests at once'
+        wait = limiter.reserve()
+        assert 0 < wait <= 0.2, 'third request should have to wait'
+
+    def test_reserve_does_not_block(self):
+        limiter = HostLimiter('example.com', delay='10 seconds')
+        assert limiter.reserve() == 0
+        assert 9 < limiter.reserve() <= 10
+        assert 19 < limiter.reserve() <= 20, 'reservations should queue up'
+
+    def test_acquire_waits(self):
+        limiter = HostLimiter('example.com', delay='0.1 seconds')
+        limiter.acquire()
+        start = time.time()
+        limiter.acquire()
+        assert time.time() - start >= 0.09
+        assert limiter.stats()['waits'] == 1
+
+
+class TestHostLimits(object):
+
+    def test_subdomains(self):
+        limits = HostLimits()
+        limits.limit('example.com', '2 seconds')
+        assert limits.get('www.example.com').delay == 2
+        assert limits.get('notexample.com').delay == 0
+        limits.limit('www.example.com', '3 seconds')
+        assert limits.get('www.example.com').delay == 3, 'existing limiters should be reconfigured'
+        assert limits.get('other.example.com').delay == 2
+
+    def test_sessions_share_adapters(self):
+        assert Session().adapters['http://'] is Session().adapters['http://']
+
+    def test_session_domain_delay(self):
+        session = Session()
+        session.set_domain_delay('example.com', '10 seconds')
+        assert session.domain_limits.get('www.example.com').delay == 10
+        assert not Session().domain_limits.limited('www.example.com'), 'delay should only apply to its session'
+        session.set_domain_delay('example.com', '1 seconds')
+        assert session.domain_limits.get('www.example.com').delay == 1, 'delay should be replaced, not only grown'
@@ -0,0 +1,149 @@
+from __future__ import unicode_literals, division, absolute_import
+from datetime import datetime, timedelta
+import threading
+import time
+
+from nose.tools import raises
+
+from flexget.manager import Session
+from flexget.plugins.daemon.scheduler import CronExpression, DBTrigger, LastRuns, Scheduler, Trigger
+from tests import FlexGetBase
+
+
+class TestCronExpression(object):
+
+    def test_next_run(self):
+        cron = CronExpression('*/15 2-4 * * *')
+        assert cron.next_run(datetime(2015, 1, 1, 3, 14, 30)) == datetime(2015, 1, 1, 3, 15)
+        assert cron.next_run(datetime(2015, 1, 1, 3, 15)) == datetime(2015, 1, 1, 3, 30), 'should be strictly after'
+        assert cron.next_run(datetime(2015, 1, 1, 4, 45)) == datetime(2015, 1, 2, 2, 0)
+
+    def test_days(self):
+        # 2015-01-01 is a thursday
+        assert CronExpression('30 6 * * mon-fri').next_run(datetime(2015, 1, 2, 7)) == datetime(2015, 1, 5, 6, 30)
+        assert CronExpression('0 0 13 * 5').next_run(datetime(2015, 1, 1)) == datetime(2015, 1, 2), \
+            'either day of month or day of week should match'
+        assert CronExpression('0 0 29 feb *').next_run(datetime(2015, 1, 1)) == datetime(2016, 2, 29)
+        assert CronExpression('@weekly').next_run(datetime(2015, 1, 1)) == datetime(2015, 1, 4)
+        assert CronExpression('0 0 * * 7').next_run(datetime(2015, 1, 1)) == datetime(2015, 1, 4)
+        assert CronExpression('0 0 */2 * mon').next_run(datetime(2015, 1, 1)) == datetime(2015, 1, 5), \
+            'stepped * day should not count as restricted'
+
+    @raises(ValueError)
+    def test_invalid(self):
+        CronExpression('61 * * * *')
+
+    @raises(ValueError)
+    def test_never_matches(self):
+        CronExpression('0 0 30 2 *').next_run(datetime(2015, 1, 1))
+
+
+class TestTrigger(object):
+
+    def test_jitter(self):
+        last_run = datetime(2015, 1, 1)
+        for _ in range(20):
+            trigger = Trigger({'hours': 1}, ['*'], jitter='10 minutes')
+            trigger.last_run = last_run
+            trigger.schedule_next_run()
+            assert last_run + timedelta(hours=1) <= trigger.run_at <= last_run + timedelta(hours=1, minutes=10)
+
+    def test_jitter_does_not_drift(self):
+        trigger = Trigger({'hours': 1}, ['*'], jitter='10 minutes')
+        delay = trigger.jitter_delay
+        before = datetime.now()
+        trigger.trigger()
+        assert before - delay <= trigger.last_run <= datetime.now() - delay, 'jitter should not count as run time'
+
+    def test_jitter_does_not_change_uid(self):
+        assert hash(Trigger({'hours': 1}, ['a'])) == hash(Trigger({'hours': 1}, ['a'], jitter='5 minutes'))
+        assert hash(Trigger(None, ['a'], cron='0 * * * *')) != hash(Trigger({'hours': 1}, ['a']))
+
+    def test_config_not_modified(self):
+        interval = {'hours': 1}
+        Trigger(interval, ['a'])
+        assert interval == {'hours': 1}
+
+
+class FakeManager(object):
+
+    def __init__(self, config):
+        self.config = config
+        self.executed = []
+
+    def execute(self, options=None, priority=1):
+        self.executed.append(options.get('tasks'))
+        event = threading.Event()
+        event.set()
+        return [event]
+
+
+class TestScheduler(FlexGetBase):
+
+    __yaml__ = """
+        tasks: {}
+    """
+
+    def setup(self):
+        super(TestScheduler, self).setup()
+        now = datetime.now()
+        session = Session()
+        # Due now, in two hours and in half an hour
+        session.add(DBTrigger(hash(Trigger({'hours': 1}, ['a'])), now - timedelta(hours=1)))
+        session.add(DBTrigger(hash(Trigger({'hours': 3}, ['b'])), now - timedelta(hours=1)))
+        session.add(DBTrigger(hash(Trigger({'hours': 2}, ['c'])), now - timedelta(minutes=90)))
+        session.commit()
+        session.close()
+        config = {'schedules': [{'tasks': ['a'], 'interval': {'hours': 1}},
+                                {'tasks': ['b'], 'interval': {'hours': 3}},
+                                {'tasks': ['c'], 'interval': {'hours': 2}}]}
+        self.scheduler = Scheduler(FakeManager(config))
+        # Scheduler is a singleton, reset its state for each test
+        self.scheduler.manager = FakeManager(config)
+        self.scheduler.running_triggers = {}
+        self.scheduler.waiting_triggers = set()
+        self.scheduler.last_runs = LastRuns()
+        self.scheduler.last_runs.load()
+        self.scheduler.load_schedules()
+
+    def test_heap_order(self):
+        now = datetime.now()
+        timeout = self.scheduler.queue_pending_jobs()
+        assert self.scheduler.manager.executed == [['a']]
+        assert 1790 < timeout <= 1800, 'should sleep until the next trigger is due, not %s' % timeout
+        self.scheduler.queue_pending_jobs(now=self.scheduler._heap[0][0])
+        assert self.scheduler.manager.executed == [['a'], ['c']]
+        assert [entry[2].tasks for entry in sorted(self.scheduler._heap)] == [['a'], ['b'], ['c']]
+        assert self.scheduler._heap[0][2].run_at > now + timedelta(minutes=59)
+
+    def test_batched_last_run(self):
+        self.scheduler.queue_pending_jobs()
+        assert len(self.scheduler.last_runs.dirty) == 1
+        uid = hash(Trigger({'hours': 1}, ['a']))
+        session = Session()
+        assert session.query(DBTrigger).get(uid).last_run < datetime.now() - timedelta(minutes=59), \
+            'last_run should not be written until flushed'
+        session.close()
+        self.scheduler.last_runs.flush()
+        assert not self.scheduler.last_runs.dirty
+        session = Session()
+        assert session.query(DBTrigger).get(uid).last_run > datetime.now() - timedelta(minutes=1)
+        session.close()
+
+    def test_reload(self):
+        self.scheduler.manager.config = {'schedules': [{'tasks': ['d'], 'cron': '@hourly'}]}
+        self.scheduler.load_schedules()
+        assert [entry[2].tasks for entry in self.scheduler._heap] == [['d']]
+        assert self.scheduler._heap[0][2].run_at.minute == 0
+
+    def test_sleep(self):
+        with self.scheduler._condition:
+            start = time.time()
+            self.scheduler._sleep(0.2)
+            assert 0.2 <= time.time() - start < 2, 'should be woken when timeout has passed'
+        threading.Timer(0.2, self.scheduler.reload).start()
+        with self.scheduler._condition:
+            start = time.time()
+            self.scheduler._sleep()
+            assert time.time() - start < 2, 'should be woken by reload'
+        self.scheduler._reload = False
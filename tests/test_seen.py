@@ -1,7 +1,30 @@
 from __future__ import unicode_literals, division, absolute_import
+import time
+from datetime import datetime
+
+from nose.plugins.attrib import attr
+
 from tests import FlexGetBase
 
 
+def seed_seen(count, task='seeded', batch=50000):
+    """Fills the seen database with `count` entries, each having a single title field."""
+    from flexget.manager import Session
+    from flexget.plugins.filter.seen import SeenEntry, SeenField
+    from sqlalchemy import func
+    now = datetime.now()
+    with Session() as session:
+        offset = session.query(func.max(SeenEntry.id)).scalar() or 0
+        for start in xrange(offset, offset + count, batch):
+            ids = xrange(start + 1, min(start + batch, offset + count) + 1)
+            session.execute(SeenEntry.__table__.insert(),
+                            [{'id': i, 'title': 'seeded %s' % (i - offset), 'feed': task, 'added': now,
+                              'local': False} for i in ids])
+            session.execute(SeenField.__table__.insert(),
+                            [{'seen_entry_id': i, 'field': 'title', 'value': 'seeded %s' % (i - offset),
+                              'added': now} for i in ids])
+
+
 class TestFilterSeen(FlexGetBase):
 
     __yaml__ = """
@@ -145,3 +168,109 @@ class TestFilterSeenMovies(FlexGetBase):
         self.execute_task('strict')
         assert len(self.task.rejected) == 1, 'Too many movies were rejected'
         assert not self.task.find_entry(title='Seen movie title 10'), 'strict should not have passed movie 10'
+
+
+class TestSeenCache(FlexGetBase):
+
+    __yaml__ = """
+        seen_cache: yes
+
+        templates:
+          global:
+            accept_all: true
+
+        tasks:
+          test:
+            mock:
+              - {title: 'Seen title 1', url: 'http://localhost/seen1'}
+
+          test2:
+            mock:
+              - {title: 'Seen title 2', url: 'http://localhost/seen1'} # duplicate by url
+              - {title: 'Seen title 1', url: 'http://localhost/seen2'} # duplicate by title
+              - {title: 'Seen title 3', url: 'http://localhost/seen3'} # new
+    """
+
+    def setup(self):
+        from flexget.plugins.filter.seen import seen_cache
+        seen_cache.reset()
+        super(TestSeenCache, self).setup()
+
+    def test_seen(self):
+        from flexget.plugins.filter.seen import seen_cache
+        self.execute_task('test')
+        assert self.task.find_entry('accepted', title='Seen title 1'), 'Test entry missing'
+        skipped = seen_cache.skipped
+        assert skipped > 0, 'unseen values should not have been queried'
+        self.execute_task('test2')
+        assert self.task.find_entry('rejected', title='Seen title 1'), 'Seen test entry 1 should be rejected'
+        assert self.task.find_entry('rejected', title='Seen title 2'), 'Seen test entry 2 should be rejected'
+        assert self.task.find_entry('accepted', title='Seen title 3'), 'Unseen test entry 3 should be accepted'
+        assert seen_cache.hits >= 2
+        assert seen_cache.skipped > skipped
+
+    def test_external_add(self):
+        self.execute_task('test')
+        # values added directly to the database (ie. by another process) must not be missed
+        seed_seen(10)
+        self.manager.config['tasks']['test']['mock'] = [{'title': 'seeded 5'}]
+        self.execute_task('test')
+        assert self.task.find_entry('rejected', title='seeded 5'), 'seeded entry should have been rejected'
+
+    def test_forget_newest(self):
+        from flexget.plugins.filter.seen import seen_cache, forget
+        # Few forgotten values compared to all, so that the cache is not rebuilt because of them
+        seed_seen(20)
+        self.execute_task('test')
+        self.execute_task('test')
+        assert self.task.find_entry('rejected', title='Seen title 1')
+        rebuilds = seen_cache.rebuilds
+        forget('Seen title 1')
+        self.execute_task('test')
+        assert self.task.find_entry('accepted', title='Seen title 1'), 'forgotten entry should be accepted'
+        self.execute_task('test')
+        assert self.task.find_entry('rejected', title='Seen title 1'), 'learned again, should be rejected'
+        assert seen_cache.rebuilds == rebuilds, 'forgetting newest fields should not rebuild the cache'
+        assert seen_cache.stats()['forgotten'] == 2
+
+    def test_learned_counted_once(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.seen import seen_cache, SeenField
+        self.execute_task('test')
+        self.execute_task('test2')
+        self.execute_task('test')
+        with Session() as session:
+            fields = session.query(SeenField).count()
+        assert len(seen_cache.bloom) == fields, 'learned values should be added to the cache only once'
+
+
+class TestBloomFilter(object):
+
+    def test_membership(self):
+        from flexget.utils.bloom import BloomFilter
+        bloom = BloomFilter(1000)
+        bloom.update('value %s' % i for i in xrange(1000))
+        assert all('value %s' % i in bloom for i in xrange(1000)), 'bloom filter must not have false negatives'
+        false_positives = sum(1 for i in xrange(10000) if 'other %s' % i in bloom)
+        assert false_positives < 300, 'too many false positives (%s)' % false_positives
+
+
+@attr(benchmark=True)
+class TestSeenBenchmark(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          bench:
+            mock: []
+            accept_all: yes
+    """
+
+    def test_filter_large_table(self):
+        seed_seen(1000000)
+        # half of the entries are already seen
+        self.manager.config['tasks']['bench']['mock'] = [
+            {'title': 'seeded %s' % (i * 400), 'url': 'http://localhost/%s' % i} for i in xrange(1, 5001)]
+        start = time.time()
+        self.execute_task('bench')
+        self.log.info('seen filter with 1M seen rows and 5000 entries took %.2fs' % (time.time() - start))
+        assert len(self.task.rejected) == 2500, 'seeded entries should have been rejected'
@@ -213,6 +213,29 @@ class TestDatabase(FlexGetBase):
         self.execute_task('progress_2')
         assert not self.task.accepted, 'doppelgangers accepted'
 
+    def test_store_parsers(self):
+        """Series plugin: store many releases at once"""
+        from flexget.manager import Session
+        from flexget.plugin import get_plugin_by_name
+        from flexget.plugins.filter.series import Series, store_parser, store_parsers
+
+        self.execute_task('progress_1')
+        parser = get_plugin_by_name('parsing').instance.parse_series
+        parsers = [parser('Progress.S01E20.720p-FlexGet', name='progress'),
+                   parser('Progress.S01E21E22.HDTV-FlexGet', name='progress'),
+                   parser('Progress.S01E21.HDTV-FlexGet', name='progress'),
+                   parser('New.Show.S01E01.HDTV', name='new show')]
+        with Session() as session:
+            all_releases = store_parsers(session, parsers)
+            assert [len(releases) for releases in all_releases] == [1, 2, 1, 1]
+            assert all_releases[0][0].downloaded, 'existing release should be returned'
+            assert all_releases[1][0].episode is all_releases[2][0].episode, 'episode should be added only once'
+            assert all_releases[1][1].episode.identifier == 'S01E22'
+            assert all_releases[3][0].episode.series.name == 'new show'
+            assert all(release.id for releases in all_releases for release in releases)
+            series = session.query(Series).filter(Series.name == 'progress').one()
+            assert [r.id for r in store_parser(session, parsers[2], series=series)] == [all_releases[2][0].id]
+
 
 class TestGuessitDatabase(TestDatabase):
     def __init__(self):
@@ -2139,4 +2162,154 @@ class TestGuessitSpecials(TestSpecials):
 class TestInternalSpecials(TestSpecials):
     def __init__(self):
         super(TestInternalSpecials, self).__init__()
-        self.add_tasks_function(build_parser_function('internal'))
\ No newline at end of file
+        self.add_tasks_function(build_parser_function('internal'))
+
+class TestSeriesMatcher(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: '[group] Prefixed Show S01E01 HDTV'}
+              - {title: 'HD 720p: Prefixed Show S01E02 HDTV'}
+              - {title: 'Alternate.S01E03.HDTV'}
+              - {title: 'Some garbage', description: 'Description.Show.S01E04.HDTV'}
+              - {title: 'Regexp.Magic.S01E05.HDTV'}
+              - {title: 'Law.and.Order.S01E06.HDTV'}
+              - {title: 'Unrelated.S01E07.HDTV'}
+            series:
+              - Prefixed Show
+              - Another Show:
+                  alternate_name: Alternate
+              - Description Show
+              - Regexp Show:
+                  name_regexp: '^regexp\\W+magic'
+              - Law & Order
+    """
+
+    def test_candidates(self):
+        from flexget.plugins.filter.series import SeriesMatcher
+        from flexget.entry import Entry
+        matcher = SeriesMatcher([{'Foo Bar': {}}, {'Foo': {}}, {'Other (US)': {}}])
+        assert matcher.candidates(Entry(title='Foo.Bar.S01E01')) == set(['Foo Bar', 'Foo'])
+        assert matcher.candidates(Entry(title='[grp] other.S01E01')) == set(['Other (US)'])
+        assert not matcher.candidates(Entry(title='Bar.Foo.S01E01'))
+
+    def test_matching(self):
+        self.execute_task('test')
+        for title in ['[group] Prefixed Show S01E01 HDTV', 'HD 720p: Prefixed Show S01E02 HDTV',
+                      'Alternate.S01E03.HDTV', 'Some garbage', 'Regexp.Magic.S01E05.HDTV',
+                      'Law.and.Order.S01E06.HDTV']:
+            assert self.task.find_entry('accepted', title=title), '%s should have been accepted' % title
+        assert not self.task.find_entry(title='Unrelated.S01E07.HDTV').get('series_name')
+
+
+class TestGuessitSeriesMatcher(TestSeriesMatcher):
+    def __init__(self):
+        super(TestGuessitSeriesMatcher, self).__init__()
+        self.add_tasks_function(build_parser_function('guessit'))
+
+
+class TestInternalSeriesMatcher(TestSeriesMatcher):
+    def __init__(self):
+        super(TestInternalSeriesMatcher, self).__init__()
+        self.add_tasks_function(build_parser_function('internal'))
+
+
+class TestSeriesSummary(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            series:
+              - summary show:
+                  quality: 1080p
+            mock:
+              - {title: 'Summary.Show.S01E01.1080p.HDTV'}
+              - {title: 'Summary.Show.S01E02.720p.HDTV'}
+              - {title: 'Summary.Show.S01E03.720p.HDTV'}
+              - {title: 'Summary.Show.S01E04.720p.HDTV'}
+    """
+
+    def test_summary(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.series import Series, SeriesSummary, ensure_series_summaries
+
+        self.execute_task('test')
+        assert len(self.task.accepted) == 1
+        with Session() as session:
+            summary = session.query(SeriesSummary).join(SeriesSummary.series).\
+                filter(Series.name == 'summary show').one()
+            assert summary.latest_identifier == 'S01E01'
+            assert summary.latest_status == '1080p hdtv'
+            assert summary.behind == 3
+            assert summary.episode_count == 4
+            assert summary.configured
+            assert summary.premiere
+            assert summary.last_seen
+            # Summaries are rebuilt if they are missing
+            session.delete(summary)
+            session.flush()
+            ensure_series_summaries(session)
+            summary = session.query(Series).filter(Series.name == 'summary show').one().summary
+            assert summary.behind == 3
+
+    def test_incremental_update(self):
+        from flexget.manager import Session
+        from flexget.plugins.filter.series import Series, update_series_summaries
+
+        self.execute_task('test')
+        self.manager.config['tasks']['test']['mock'] = [
+            {'title': 'Summary.Show.S01E05.720p.HDTV'}, {'title': 'Summary.Show.S01E04.480p.HDTV'},
+            {'title': 'Other.Show.S01E01.720p.HDTV'}]
+        self.execute_task('test')
+        columns = ['latest_identifier', 'behind', 'last_seen', 'episode_count', 'configured', 'premiere']
+        with Session() as session:
+            for series in session.query(Series).all():
+                stored = [getattr(series.summary, column) for column in columns]
+                update_series_summaries(session, [series])
+                assert stored == [getattr(series.summary, column) for column in columns], \
+                    'summary of %s should match a full recalculation' % series.name
+            summary = session.query(Series).filter(Series.name == 'summary show').one().summary
+            assert summary.behind == 4
+            assert summary.episode_count == 5
+
+    def test_rebuilt_summaries_saved(self):
+        import argparse
+        import sys
+        from StringIO import StringIO
+        from flexget.manager import Session
+        from flexget.plugins.cli.series import display_summary
+        from flexget.plugins.filter.series import SeriesSummary
+
+        self.execute_task('test')
+        with Session() as session:
+            session.query(SeriesSummary).delete()
+        options = argparse.Namespace(configured='all', premieres=False, new=None, stale=None)
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            display_summary(options)
+        finally:
+            sys.stdout = stdout
+        with Session() as session:
+            assert session.query(SeriesSummary).count() == 1, 'rebuilt summaries should be committed'
+
+    def test_cli_list(self):
+        import argparse
+        import sys
+        from StringIO import StringIO
+        from flexget.plugins.cli.series import display_summary
+
+        self.execute_task('test')
+        options = argparse.Namespace(configured='all', premieres=False, new=None, stale=None)
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            display_summary(options)
+            options.configured = 'unconfigured'
+            display_summary(options)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        assert output.count('summary show') == 1, 'configured series should be listed once:\n%s' % output
+        assert 'S01E01 +3' in output, output
+        assert 'episodes behind' in output
@@ -0,0 +1,135 @@
+from __future__ import unicode_literals, division, absolute_import, print_function
+import logging
+import threading
+from StringIO import StringIO
+
+from flexget import plugin
+from flexget.event import event
+from flexget.task import Task, TaskLocks, task_locks
+from tests import FlexGetBase
+
+log = logging.getLogger('test_task_locks')
+
+
+class LockedPlugin(object):
+    held = {}
+
+    def on_task_input(self, task, config):
+        LockedPlugin.held['input'] = task_locks.held()
+        return []
+
+    def on_task_filter(self, task, config):
+        LockedPlugin.held['filter'] = task_locks.held()
+
+
+class LearnLockedPlugin(object):
+
+    def on_task_learn(self, task, config):
+        pass
+
+
+class OutputPlugin(object):
+    """Logs and prints, then waits until released so the test can produce output meanwhile."""
+    running = threading.Event()
+    release = threading.Event()
+
+    def on_task_input(self, task, config):
+        log.info('output of %s' % task.name)
+        print('printed by %s' % task.name)
+        OutputPlugin.running.set()
+        OutputPlugin.release.wait(5)
+        return []
+
+
+@event('plugin.register')
+def register():
+    plugin.register(LockedPlugin, 'locked_plugin', debug=True, api_ver=2, locks=['test_resource'])
+    plugin.register(LearnLockedPlugin, 'learn_locked_plugin', debug=True, api_ver=2, locks=['learn_resource'])
+    plugin.register(OutputPlugin, 'output_plugin', debug=True, api_ver=2)
+
+
+class TestTaskLocks(object):
+
+    def test_acquire_release(self):
+        locks = TaskLocks()
+        a, b = object(), object()
+        assert locks.acquire(set(['series']), a)
+        assert locks.acquire(set(['seen']), b), 'different lock should be available'
+        assert not locks.acquire(set(['series', 'other']), b, blocking=False), 'lock is held by another owner'
+        assert locks.held() == set(['series', 'seen']), 'failed acquire should not hold any locks'
+        assert locks.acquire(set(['series']), a), 'owner should be able to acquire its own lock again'
+        locks.release(set(['series']), a)
+        assert locks.acquire(set(['series', 'other']), b, blocking=False)
+
+    def test_exclusive(self):
+        locks = TaskLocks()
+        a, b = object(), object()
+        assert locks.acquire(set(['seen']), a)
+        assert not locks.acquire(set(['*']), b, blocking=False), 'exclusive lock should wait for all others'
+        locks.release(set(['seen']), a)
+        assert locks.acquire(set(['*']), b)
+        assert not locks.acquire(set(['series']), a, blocking=False), 'exclusive lock should block all others'
+
+    def test_blocking(self):
+        locks = TaskLocks()
+        a, b = object(), object()
+        locks.acquire(set(['series']), a)
+        acquired = threading.Event()
+
+        def waiter():
+            locks.acquire(set(['series']), b)
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        assert not acquired.wait(0.2), 'lock should not be acquired while held'
+        locks.release(set(['series']), a)
+        assert acquired.wait(5), 'lock should be acquired after release'
+        thread.join()
+
+
+class TestTaskPluginLocks(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            locked_plugin: yes
+          test_learn:
+            locked_plugin: yes
+            learn_locked_plugin: yes
+          output:
+            output_plugin: yes
+    """
+
+    def test_builtin_needs_locks(self):
+        self.execute_task('test')
+        assert 'series' in LockedPlugin.held['input'], 'series_db should lock series when task config has changed'
+        self.execute_task('test')
+        assert 'series' not in LockedPlugin.held['input'], 'series_db should not lock series of unchanged tasks'
+
+    def test_locks_held_during_execution(self):
+        self.execute_task('test')
+        assert 'test_resource' in LockedPlugin.held['input'], 'lock should be acquired before plugin runs'
+        assert 'test_resource' in LockedPlugin.held['filter'], 'lock should be held for rest of the task'
+        assert 'test_resource' not in task_locks.held(), 'lock should be released after execution'
+
+    def test_all_locks_acquired_together(self):
+        self.execute_task('test_learn')
+        assert 'learn_resource' in LockedPlugin.held['input'], \
+            'locks of later phases should be acquired with the first ones'
+
+    def test_output_per_task(self):
+        output = StringIO()
+        task = Task(self.manager, 'output', output=output)
+        thread = threading.Thread(target=task.execute)
+        thread.start()
+        try:
+            assert OutputPlugin.running.wait(5)
+            log.info('output of other thread')
+            print('printed by other thread')
+        finally:
+            OutputPlugin.release.set()
+        thread.join()
+        assert 'output of output' in output.getvalue()
+        assert 'printed by output' in output.getvalue()
+        assert 'other thread' not in output.getvalue(), 'output of other threads should not be sent to the stream'
@@ -1,9 +1,77 @@
 from __future__ import unicode_literals, division, absolute_import
+import hashlib
 import os
+import time
 
 from nose.plugins.attrib import attr
-from tests import FlexGetBase, with_filecopy
-from flexget.utils.bittorrent import Torrent
+from nose.tools import raises
+from tests import FlexGetBase, log, with_filecopy
+from flexget.utils.bittorrent import Torrent, bdecode, bencode, encode_dictionary
+
+
+def multi_file_torrent(files):
+    info = {'name': 'multi', 'piece length': 262144, 'pieces': b'\xff' * 20 * files,
+            'files': [{'length': i, 'path': ['dir %d' % (i % 10), 'file %d.mkv' % i]} for i in xrange(files)]}
+    return bencode({'announce': 'http://tracker/announce', 'info': info})
+
+
+class TestBencode(object):
+
+    def test_decode(self):
+        data = b'd4:dictd1:a0:e4:listli1ei-2e2:\xff\xfeee'
+        assert bdecode(data) == {'list': [1, -2, b'\xff\xfe'], 'dict': {'a': ''}}
+        assert bdecode(bytearray(data)) == bdecode(memoryview(data)) == bdecode(data)
+        assert bencode(bdecode(data)) == data
+
+    @raises(SyntaxError)
+    def test_trailing_junk(self):
+        bdecode(b'i1ei2e')
+
+    @raises(SyntaxError)
+    def test_truncated(self):
+        Torrent(multi_file_torrent(3)[:-10])
+
+    def test_lazy_files(self):
+        torrent = Torrent(multi_file_torrent(25))
+        assert len(torrent.files) == 25
+        assert torrent.files[12] == {'path': 'dir 2', 'name': 'file 12.mkv', 'size': 12}
+        assert torrent.size == sum(xrange(25))
+        assert torrent.get_filelist() == list(torrent.files)
+        assert torrent._content is None, 'reading files should not decode the whole torrent'
+
+    def test_info_hash_of_raw_info(self):
+        # Keys of info dictionary out of order, re-encoding would give a different hash
+        info = b'd6:lengthi5e4:name1:a12:piece lengthi1e6:pieces0:e'
+        unsorted_info = b'd4:name1:a6:lengthi5e12:piece lengthi1e6:pieces0:e'
+        assert encode_dictionary(bdecode(unsorted_info)) == info
+        torrent = Torrent(b'd4:info%se  ' % unsorted_info)
+        assert torrent.info_hash == hashlib.sha1(unsorted_info).hexdigest().upper()
+        assert torrent.encode() == b'd4:info%se' % unsorted_info
+
+    def test_modify(self):
+        torrent = Torrent(multi_file_torrent(3))
+        torrent.add_multitracker('http://other/announce')
+        assert torrent.trackers == ['http://other/announce', 'http://tracker/announce']
+        assert len(torrent.files) == 3, 'files should be read from modified content'
+        assert Torrent(torrent.encode()).trackers == torrent.trackers
+
+
+@attr(benchmark=True)
+class TestTorrentBenchmark(object):
+
+    def test_large_torrent(self):
+        data = multi_file_torrent(5000)
+        start = time.time()
+        torrent = Torrent(data)
+        torrent.info_hash, torrent.size, torrent.trackers, len(torrent.files)
+        lazy = time.time() - start
+        start = time.time()
+        content = bdecode(data)
+        hashlib.sha1(encode_dictionary(content['info'])).hexdigest()
+        full = time.time() - start
+        log.info('5000 file torrent: info_hash, size and trackers took %.3fs, full decode and re-encode took %.3fs' %
+                 (lazy, full))
+        assert lazy < full
 
 
 class TestInfoHash(FlexGetBase):
@@ -0,0 +1,59 @@
+from __future__ import unicode_literals, division, absolute_import
+
+from urllib2 import URLError
+
+from mock import patch
+
+from flexget.plugins.filter import torrent_alive
+from flexget.plugins.filter.torrent_alive import scrape_cache, scrape_torrents
+
+HASH_A = 'A' * 40
+HASH_B = 'B' * 40
+
+
+class TestScrapeTorrents(object):
+
+    def setup(self):
+        scrape_cache.clear()
+
+    @patch.object(torrent_alive, 'get_http_seeds_batch')
+    def test_batch_and_cache(self, mock_scrape):
+        mock_scrape.return_value = {HASH_A: 5, HASH_B: 2}
+        torrents = {HASH_A: ['http://tracker/announce'], HASH_B: ['http://tracker/announce']}
+        assert scrape_torrents(torrents) == {HASH_A: 5, HASH_B: 2}
+        assert mock_scrape.call_count == 1, 'torrents should be scraped from tracker with one request'
+        assert scrape_torrents(torrents) == {HASH_A: 5, HASH_B: 2}
+        assert mock_scrape.call_count == 1, 'second scrape should come from cache'
+
+    @patch.object(torrent_alive, 'get_udp_seeds_batch')
+    @patch.object(torrent_alive, 'get_http_seeds_batch')
+    def test_max_of_trackers(self, mock_http, mock_udp):
+        mock_http.return_value = {HASH_A: 1}
+        mock_udp.return_value = {HASH_A: 7}
+        seeds = scrape_torrents({HASH_A: ['http://tracker/announce', 'udp://tracker:80']})
+        assert seeds == {HASH_A: 7}
+
+    @patch.object(torrent_alive, 'get_http_seeds_batch')
+    def test_no_batch_support(self, mock_scrape):
+        # Tracker only answers for the first requested torrent
+        mock_scrape.side_effect = lambda url, hashes: {hashes[0]: len(hashes)}
+        seeds = scrape_torrents({HASH_A: ['http://tracker/announce'], HASH_B: ['http://tracker/announce']})
+        assert sorted(seeds.values()) == [1, 2], 'missing torrent should be scraped by itself'
+        assert mock_scrape.call_count == 2
+
+    @patch.object(torrent_alive, 'get_http_seeds_batch')
+    def test_failures_not_cached(self, mock_scrape):
+        mock_scrape.return_value = {}
+        assert scrape_torrents({HASH_A: ['http://tracker/announce']}) == {HASH_A: 0}
+        scrape_torrents({HASH_A: ['http://tracker/announce']})
+        assert mock_scrape.call_count == 2
+
+    @patch.object(torrent_alive, 'get_http_seeds_batch')
+    def test_failing_single_scrape(self, mock_scrape):
+        def scrape(url, hashes):
+            if len(hashes) == 1:
+                raise URLError('failing on purpose')
+            return {hashes[0]: 3}
+        mock_scrape.side_effect = scrape
+        seeds = scrape_torrents({HASH_A: ['http://tracker/announce'], HASH_B: ['http://tracker/announce']})
+        assert sorted(seeds.values()) == [0, 3], 'results from the batch should be kept'
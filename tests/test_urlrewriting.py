@@ -1,7 +1,40 @@
 from __future__ import unicode_literals, division, absolute_import
+import threading
+
 from tests import FlexGetBase
 from nose.tools import assert_true
+from flexget import plugin
+from flexget.event import event
 from flexget.plugin import get_plugin_by_name
+from flexget.plugins.plugin_urlrewriting import PluginUrlRewriting
+
+
+class HostRewriter(object):
+    url_hosts = ['first.example.com', 'second.example.com']
+    checked = []
+
+    def url_rewritable(self, task, entry):
+        HostRewriter.checked.append(entry['url'])
+        return entry['url'].startswith('http://first.example.com/')
+
+    def url_rewrite(self, task, entry):
+        entry['url'] = entry['url'].replace('first', 'second')
+
+
+class ChainedRewriter(object):
+    url_hosts = ['second.example.com']
+
+    def url_rewritable(self, task, entry):
+        return entry['url'].startswith('http://second.example.com/')
+
+    def url_rewrite(self, task, entry):
+        entry['url'] = entry['url'].replace('second', 'third')
+
+
+@event('plugin.register')
+def register():
+    plugin.register(HostRewriter, 'host_rewriter', groups=['urlrewriter'], debug=True, api_ver=2)
+    plugin.register(ChainedRewriter, 'chained_rewriter', groups=['urlrewriter'], debug=True, api_ver=2)
 
 
 class TestURLRewriters(FlexGetBase):
@@ -89,3 +122,45 @@ class TestRegexpurlrewriter(FlexGetBase):
         self.execute_task('test')
         assert self.task.find_entry(url='http://newzleech.com/?m=gen&dl=1&post=123'), \
             'did not url_rewrite properly'
+
+
+class TestRewriterIndex(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'chained', url: 'http://first.example.com/file'}
+              - {title: 'other', url: 'http://other.example.com/file'}
+            accept_all: yes
+    """
+
+    def test_dispatch(self):
+        HostRewriter.checked = []
+        self.execute_task('test')
+        assert self.task.find_entry(title='chained')['url'] == 'http://third.example.com/file', \
+            'url should be rewritten again by rewriters of the new host'
+        assert 'http://other.example.com/file' not in HostRewriter.checked, 'rewriter of other hosts was checked'
+        urlrewriting = get_plugin_by_name('urlrewriting').instance
+        names = [p.name for position, p in urlrewriting.rewriters('http://SECOND.example.com:8080/x')]
+        assert 'host_rewriter' in names and 'chained_rewriter' in names
+        assert 'urlrewrite' in names, 'rewriters without url_hosts should be checked for all urls'
+        assert 'nyaa' not in names
+        assert 'nyaa' in [p.name for position, p in urlrewriting.rewriters('magnet:?xt=urn:btih:abc')]
+
+    def test_concurrent_index_build(self):
+        urlrewriting = PluginUrlRewriting()
+        results = []
+
+        def lookup():
+            for _ in xrange(50):
+                results.append([p.name for position, p in urlrewriting.rewriters('http://first.example.com/file')])
+
+        threads = [threading.Thread(target=lookup) for _ in xrange(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 200, 'lookups failed while the index was being built'
+        assert all(names == results[0] for names in results)
+        assert 'host_rewriter' in results[0]